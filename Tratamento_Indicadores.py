@@ -2,8 +2,11 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import unicodedata
+from functools import lru_cache
 from typing import Optional, List
 
+from distintos_core import indice_atividade, IndiceAtividade
+
 def _format_brl(v):
     return f"R$ {v:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
 
@@ -177,35 +180,30 @@ def mes_maior_volume_ultimo_ano(df, top_n=3):
     res["VALOR_TOTAL"] = pd.to_numeric(res["VALOR_TOTAL"], errors="coerce").round(2)
     return res.head(int(top_n))
 
-def quantidade_empresas_que_venderam_ultimos_3_anos(df):
-    df = df.copy()
-    df["OF_DATA_DT"] = pd.to_datetime(df.get("OF_DATA"), errors="coerce")
+# colunas de fornecedor aceitas no ERP (1ª encontrada); também usadas pelos motores SQLite/polars
+CANDIDATOS_FORNECEDOR = [
+    "FORNECEDOR_CDG", "FORNECEDOR_ID", "COD_FORNECEDOR",
+    "FORN_CNPJ", "CNPJ", "PED_FORNECEDOR", "FORNECEDOR"
+]
+
+def quantidade_empresas_que_venderam_ultimos_3_anos(df, indice: IndiceAtividade | None = None, aproximado: bool = False):
+    """
+    Fornecedores distintos com venda (PRCTTL_INSUMO > 0) nos últimos 3 anos.
+    `indice`: índice de atividade já construído (distintos_core.indice_atividade com col_valor).
+    """
     limite = pd.Timestamp.today() - pd.DateOffset(years=3)
-    base = df[df["OF_DATA_DT"] >= limite].copy()
-    if base.empty:
-        return 0
-    if "PRCTTL_INSUMO" in base.columns:
-        v = pd.to_numeric(base["PRCTTL_INSUMO"], errors="coerce").fillna(0)
-        base = base[v > 0]
-        if base.empty:
-            return 0
-    candidatos = [
-        "FORNECEDOR_CDG", "FORNECEDOR_ID", "COD_FORNECEDOR",
-        "FORN_CNPJ", "CNPJ", "PED_FORNECEDOR", "FORNECEDOR"
-    ]
-    col_forn = next((c for c in candidatos if c in base.columns), None)
-    if not col_forn:
-        raise KeyError(
-            f"Não encontrei coluna de fornecedor. Tente uma destas: {candidatos}. Disponíveis: {list(base.columns)}"
+    if indice is None:
+        col_forn = next((c for c in CANDIDATOS_FORNECEDOR if c in df.columns), None)
+        if not col_forn:
+            raise KeyError(
+                f"Não encontrei coluna de fornecedor. Tente uma destas: {CANDIDATOS_FORNECEDOR}. "
+                f"Disponíveis: {list(df.columns)}"
+            )
+        indice = indice_atividade(
+            df, col_id=col_forn, col_data="OF_DATA",
+            col_valor="PRCTTL_INSUMO", hll=aproximado,
         )
-    s = (
-        base[col_forn]
-        .astype("string")
-        .str.strip()
-        .replace({"": pd.NA, "nan": pd.NA, "None": pd.NA})
-        .dropna()
-    )
-    return int(s.nunique())
+    return int(indice.contar(inicio=limite, aproximado=aproximado))
 
 def meses_top3_volume_geral(df, top_n=3):
     """
@@ -360,6 +358,95 @@ def menor_compra_item_unico(df):
 
     return out
 
+def indice_precos_item(df, col_item="INSUMO_CDG", col_preco="ITEM_PRCUNTPED", col_data="OF_DATA",
+                       min_hist: int = 5):
+    """
+    Índice de preços por item, construído uma vez:
+      hist  = ITEM | DATA | PRECO | POS   (ordenado por item e preço; POS = posição 1..N no item)
+      estat = ITEM | N_HIST | P05 | Q1 | MEDIANA | Q3 | P95 | LIM_INF | LIM_SUP
+    LIM_INF/LIM_SUP = cercas de Tukey (Q1 - 1,5·IQR / Q3 + 1,5·IQR), só para itens com N >= min_hist.
+    """
+    cols_hist = ["ITEM", "DATA", "PRECO", "POS"]
+    cols_estat = ["ITEM", "N_HIST", "P05", "Q1", "MEDIANA", "Q3", "P95", "LIM_INF", "LIM_SUP"]
+    if col_item not in df.columns or col_preco not in df.columns:
+        return pd.DataFrame(columns=cols_hist), pd.DataFrame(columns=cols_estat)
+
+    hist = pd.DataFrame({
+        "ITEM":  df[col_item].astype("string"),
+        "DATA":  pd.to_datetime(df[col_data], errors="coerce") if col_data in df.columns else pd.NaT,
+        "PRECO": pd.to_numeric(df[col_preco], errors="coerce"),
+    }).dropna(subset=["ITEM", "PRECO"])
+    hist = hist[hist["PRECO"] > 0]
+    if hist.empty:
+        return pd.DataFrame(columns=cols_hist), pd.DataFrame(columns=cols_estat)
+
+    hist = hist.sort_values(["ITEM", "PRECO", "DATA"], kind="mergesort").reset_index(drop=True)
+    hist["POS"] = hist.groupby("ITEM", sort=False).cumcount() + 1
+
+    g = hist.groupby("ITEM", sort=False)["PRECO"]
+    estat = g.quantile([0.05, 0.25, 0.5, 0.75, 0.95]).unstack()
+    estat.columns = ["P05", "Q1", "MEDIANA", "Q3", "P95"]
+    estat.insert(0, "N_HIST", g.size())
+    iqr = estat["Q3"] - estat["Q1"]
+    ok = estat["N_HIST"] >= int(min_hist)
+    estat["LIM_INF"] = (estat["Q1"] - 1.5 * iqr).where(ok)
+    estat["LIM_SUP"] = (estat["Q3"] + 1.5 * iqr).where(ok)
+    estat = estat.reset_index()
+    return hist, estat
+
+def percentil_preco_linhas(df, indice=None, col_item="INSUMO_CDG", col_preco="ITEM_PRCUNTPED"):
+    """
+    Percentil do preço unitário de cada linha frente ao histórico do próprio item (lote vetorizado).
+    PERCENTIL_PRECO = % do histórico do item com preço <= preço da linha.
+    OUTLIER = "ACIMA" / "ABAIXO" das cercas de Tukey do item (vazio se dentro ou sem histórico suficiente).
+    `indice`: resultado de indice_precos_item (reaproveitável entre chamadas).
+    """
+    hist, estat = indice if indice is not None else indice_precos_item(df, col_item=col_item, col_preco=col_preco)
+
+    cols_out = [c for c in ["OF_CDG", "OF_DATA", col_item, "INSUMO_DESC", "FORNECEDOR_DESC", col_preco]
+                if c in df.columns]
+    out = df[cols_out].copy()
+    out["_ITEM_"] = df[col_item].astype("string")
+    out["_PRECO_"] = pd.to_numeric(df[col_preco], errors="coerce")
+    out["_ORD_"] = np.arange(len(out))
+
+    q = out.dropna(subset=["_ITEM_", "_PRECO_"]).sort_values("_PRECO_", kind="mergesort")
+    if not q.empty and not hist.empty:
+        # busca ordenada agrupada: última posição do item com preço <= preço da linha
+        q = pd.merge_asof(
+            q, hist[["ITEM", "PRECO", "POS"]].sort_values("PRECO", kind="mergesort"),
+            left_on="_PRECO_", right_on="PRECO", left_by="_ITEM_", right_by="ITEM",
+            direction="backward",
+        )
+        out = out.merge(q[["_ORD_", "POS"]], on="_ORD_", how="left")
+    else:
+        out["POS"] = np.nan
+
+    out = out.merge(estat[["ITEM", "N_HIST", "MEDIANA", "LIM_INF", "LIM_SUP"]],
+                    left_on="_ITEM_", right_on="ITEM", how="left")
+    tem_hist = out["N_HIST"].notna() & out["_PRECO_"].notna()
+    out["PERCENTIL_PRECO"] = (out["POS"].fillna(0) / out["N_HIST"] * 100).where(tem_hist).round(2)
+    out["OUTLIER"] = np.select(
+        [out["_PRECO_"] > out["LIM_SUP"], out["_PRECO_"] < out["LIM_INF"]],
+        ["ACIMA", "ABAIXO"],
+        default="",
+    )
+    out = (out.sort_values("_ORD_")
+              .rename(columns={"MEDIANA": "MEDIANA_ITEM"})
+              .drop(columns=["_ITEM_", "_PRECO_", "_ORD_", "POS", "ITEM", "LIM_INF", "LIM_SUP"]))
+    out.index = df.index
+    return out
+
+def itens_preco_fora_do_mercado(df, indice=None, top_n: int | None = 20):
+    """Linhas com preço acima das cercas do item, ordenadas pelo excesso sobre a mediana."""
+    res = percentil_preco_linhas(df, indice=indice)
+    res = res[res["OUTLIER"] == "ACIMA"].copy()
+    if res.empty:
+        return res
+    res["EXCESSO_%"] = ((pd.to_numeric(res["ITEM_PRCUNTPED"], errors="coerce") / res["MEDIANA_ITEM"] - 1) * 100).round(2)
+    res = res.sort_values("EXCESSO_%", ascending=False)
+    return res.head(int(top_n)) if top_n else res
+
 def valor_medio_por_item(df):
     if "PRCTTL_INSUMO" not in df.columns:
         return 0.0, pd.DataFrame(columns=["PRECO_TOTAL_ITEM"])
@@ -390,21 +477,149 @@ def categorias_mais_compradas_ultimos_anos(df, anos=5, col_cat="INSUMO_CATEGORIA
     grp["VALOR_TOTAL"] = grp["VALOR_TOTAL"].round(2)
     return grp.sort_values("VALOR_TOTAL", ascending=False)
 
+def concentracao_fornecedores(df, por="INSUMO_CATEGORIA", anos: int | None = None,
+                              col_forn="FORNECEDOR_CDG", col_val="PRCTTL_INSUMO",
+                              corte_pct: float = 80.0):
+    """
+    Concentração de gasto em fornecedores por grupo (categoria, UF, ...), numa única agregação
+    (grupo, fornecedor) + somas acumuladas vetorizadas para todos os grupos de uma vez.
+    Retorna: <GRUPO> | VALOR_TOTAL | N_FORNECEDORES | HHI | TOP1_FORNECEDOR | TOP1_PART_% | N_FORN_<corte>%
+      HHI = Σ participação² × 10.000 (0..10.000)
+      N_FORN_<corte>% = menor nº de fornecedores que somam corte_pct% do gasto do grupo
+    """
+    rotulo = {"INSUMO_CATEGORIA": "CATEGORIA", "FORNECEDOR_UF": "UF"}.get(por, por)
+    col_n = f"N_FORN_{int(corte_pct)}%"
+    cols = [rotulo, "VALOR_TOTAL", "N_FORNECEDORES", "HHI", "TOP1_FORNECEDOR", "TOP1_PART_%", col_n]
+    if por not in df.columns or col_forn not in df.columns:
+        return pd.DataFrame(columns=cols)
+
+    base = df
+    if anos:
+        dt = pd.to_datetime(df["OF_DATA"], errors="coerce")
+        base = df[dt >= pd.Timestamp.today() - pd.DateOffset(years=anos)]
+    v = pd.to_numeric(base[col_val], errors="coerce")
+    base = base.assign(_V_=v)[v > 0]
+    if base.empty:
+        return pd.DataFrame(columns=cols)
+
+    aggs = {"VALOR": ("_V_", "sum")}
+    if "FORNECEDOR_DESC" in base.columns:
+        aggs["DESC"] = ("FORNECEDOR_DESC", "first")
+    g = base.groupby([por, col_forn], as_index=False, observed=True).agg(**aggs)
+    g = g.sort_values([por, "VALOR"], ascending=[True, False], kind="mergesort")
+
+    tot = g.groupby(por, sort=False, observed=True)["VALOR"].transform("sum")
+    g["_PART_"] = g["VALOR"] / tot
+    g["_ACUM_ANT_"] = g.groupby(por, sort=False, observed=True)["_PART_"].cumsum() - g["_PART_"]
+    g["_NO_CORTE_"] = g["_ACUM_ANT_"] < (corte_pct / 100.0 - 1e-12)
+    g["_PART2_"] = g["_PART_"] ** 2
+    g["_TOP_"] = (g["DESC"] if "DESC" in g.columns else g[col_forn]).astype("string")
+
+    out = g.groupby(por, sort=False, observed=True).agg(
+        VALOR_TOTAL=("VALOR", "sum"),
+        N_FORNECEDORES=(col_forn, "size"),
+        HHI=("_PART2_", "sum"),
+        TOP1_FORNECEDOR=("_TOP_", "first"),
+        TOP1_PART=("_PART_", "first"),
+        N_CORTE=("_NO_CORTE_", "sum"),
+    ).reset_index()
+
+    out["HHI"] = (out["HHI"] * 10000).round(0).astype(int)
+    out["TOP1_PART_%"] = (out["TOP1_PART"] * 100).round(2)
+    out["VALOR_TOTAL"] = out["VALOR_TOTAL"].round(2)
+    out = out.rename(columns={por: rotulo, "N_CORTE": col_n})[cols]
+    return out.sort_values("VALOR_TOTAL", ascending=False).reset_index(drop=True)
+
+def lead_time_requisicao(df, por: str | None = "INSUMO_CATEGORIA", anos: int | None = None,
+                         col_req="REQ_DATA", col_of="OF_DATA"):
+    """
+    Prazo requisição → OF (dias), por grupo, com quantis agrupados vetorizados (sem laço por grupo).
+    por: coluna do ERP (categoria, UF, fornecedor, ...), "MES" (mês da OF — tendência) ou None (geral).
+    Linhas sem uma das datas, ou com OF anterior à requisição, ficam de fora.
+    Retorna: <GRUPO> | N_LINHAS | MEDIA_DIAS | P50_DIAS | P90_DIAS
+    """
+    rotulo = {"INSUMO_CATEGORIA": "CATEGORIA", "FORNECEDOR_UF": "UF",
+              "FORNECEDOR_DESC": "FORNECEDOR"}.get(por, por)
+    cols = ([rotulo] if por else []) + ["N_LINHAS", "MEDIA_DIAS", "P50_DIAS", "P90_DIAS"]
+    if col_req not in df.columns or col_of not in df.columns or (por and por != "MES" and por not in df.columns):
+        return pd.DataFrame(columns=cols)
+
+    req = pd.to_datetime(df[col_req], errors="coerce").dt.normalize()
+    dt_of = pd.to_datetime(df[col_of], errors="coerce")
+    dias = (dt_of.dt.normalize() - req) / pd.Timedelta(days=1)
+    ok = dias.notna() & (dias >= 0)
+    if anos:
+        ok &= dt_of >= pd.Timestamp.today() - pd.DateOffset(years=anos)
+    dias = dias[ok]
+    if dias.empty:
+        return pd.DataFrame(columns=cols)
+
+    if not por:
+        q = dias.quantile([0.5, 0.9])
+        out = pd.DataFrame([{"N_LINHAS": int(dias.size), "MEDIA_DIAS": dias.mean(),
+                             "P50_DIAS": q.loc[0.5], "P90_DIAS": q.loc[0.9]}])
+    else:
+        # mês como datetime64 truncado (agrupa bem mais rápido que Period) -> Period no fim
+        chave = (pd.Series(dt_of[ok].to_numpy(dtype="datetime64[M]"), index=dias.index)
+                 if por == "MES" else df.loc[ok, por])
+        g = dias.groupby(chave, observed=True, sort=True)
+        q = g.quantile([0.5, 0.9]).unstack()
+        out = pd.DataFrame({
+            "N_LINHAS": g.size(),
+            "MEDIA_DIAS": g.mean(),
+            "P50_DIAS": q[0.5],
+            "P90_DIAS": q[0.9],
+        })
+        out = out.rename_axis(rotulo).reset_index()
+        if por == "MES":
+            out["MES"] = pd.PeriodIndex(out["MES"], freq="M")
+        else:
+            out = out.sort_values("N_LINHAS", ascending=False, kind="mergesort")
+    for c in ("MEDIA_DIAS", "P50_DIAS", "P90_DIAS"):
+        out[c] = out[c].astype(float).round(1)
+    out["N_LINHAS"] = out["N_LINHAS"].astype(int)
+    return out[cols].reset_index(drop=True)
+
+# ---------- Normalização de texto (cache por valor distinto) ----------
+@lru_cache(maxsize=65536)
+def _norm_txt_cache(s: str) -> str:
+    t = unicodedata.normalize("NFKD", s)
+    t = "".join(ch for ch in t if not unicodedata.combining(ch))
+    return t.strip().lower()
+
 def _norm_txt(s: str) -> str:
     if s is None:
         return ""
-    t = unicodedata.normalize("NFKD", str(s))
-    t = "".join(ch for ch in t if not unicodedata.combining(ch))
-    return t.strip().lower()
+    return _norm_txt_cache(str(s))
 
-def _split_tokens(text: str) -> set:
-    if text is None:
-        return set()
-    t = _norm_txt(text)
+@lru_cache(maxsize=65536)
+def _split_tokens_cache(t: str) -> frozenset:
     for sep in [",", ";", "/", "|", "&", "+"]:
         t = t.replace(sep, ",")
     parts = [p.strip() for p in t.split(",") if p.strip()]
-    return {p for p in parts if len(p) > 1}
+    return frozenset(p for p in parts if len(p) > 1)
+
+def _split_tokens(text: str) -> frozenset:
+    if text is None:
+        return frozenset()
+    return _split_tokens_cache(_norm_txt(text))
+
+def _norm_serie(s: pd.Series) -> pd.Series:
+    """
+    Normaliza uma coluna de texto pagando o custo só uma vez por valor distinto:
+    codifica (factorize), normaliza os únicos e devolve por código. Nulos -> "".
+    """
+    codigos, unicos = pd.factorize(s, use_na_sentinel=True)
+    norm = np.array([_norm_txt(u) for u in unicos] + [""], dtype=object)
+    return pd.Series(norm[codigos], index=s.index, dtype="string")
+
+def _mapear_unicos(s: pd.Series, fn) -> np.ndarray:
+    """Aplica fn uma vez por valor distinto de s e devolve o resultado por linha (nulos -> None)."""
+    codigos, unicos = pd.factorize(s, use_na_sentinel=True)
+    res = np.empty(len(unicos) + 1, dtype=object)
+    res[:-1] = [fn(u) for u in unicos]
+    res[-1] = None
+    return res[codigos]
 
 def _pick_col(df: pd.DataFrame, candidatos: List[str]) -> Optional[str]:
     up = {c.strip().upper(): c for c in df.columns}
@@ -429,55 +644,107 @@ def categorias_basicos_distintos(df: pd.DataFrame, col_cat: str = "INSUMO_CATEGO
            .to_frame(name="CATEGORIA").sort_values("CATEGORIA"))
     return out.reset_index(drop=True)
 
-def _set_categorias_basicos(df_erp: pd.DataFrame, col_cat: str = "INSUMO_CATEGORIA") -> set:
+def _categorias_basicos_exibicao(df_erp: pd.DataFrame, col_cat: str = "INSUMO_CATEGORIA") -> dict:
+    """Categoria básica normalizada -> primeiro rótulo original visto no ERP (para exibição)."""
     if "TIPO_MATERIAL" not in df_erp.columns or col_cat not in df_erp.columns:
-        return set()
-    base = df_erp[df_erp["TIPO_MATERIAL"] == "BÁSICO"]
-    cats = base[col_cat].dropna().astype("string").unique().tolist()
-    return {_norm_txt(c) for c in cats if str(c).strip()}
-
-def fornecedores_basicos_por_local_cadastro(
-    df_forn: pd.DataFrame,
-    df_erp: pd.DataFrame,
-    locais: tuple[str, ...] = ("RJ", "SP", "SC"),
-) -> pd.DataFrame:
-    # categorias "básico" observadas no ERP (INSUMO_CATEGORIA)
-    cat_bas = _set_categorias_basicos(df_erp, col_cat="INSUMO_CATEGORIA")
-    if not cat_bas:
-        return pd.DataFrame(columns=["LOCAL", "FORNECEDORES_BÁSICO_CAD"])
+        return {}
+    orig = df_erp.loc[df_erp["TIPO_MATERIAL"] == "BÁSICO", col_cat].astype("string").str.strip()
+    norm = _norm_serie(orig)
+    par = pd.DataFrame({"N": norm, "O": orig}).dropna()
+    par = par[par["N"] != ""].drop_duplicates("N")
+    return dict(zip(par["N"], par["O"]))
+
+def matriz_basicos_uf(df_forn: pd.DataFrame, df_erp: pd.DataFrame):
+    """
+    Cobertura do cadastro nas categorias básicas, construída uma vez:
+      pares  = UF | <categoria básica 1> | <categoria básica 2> | ...   (bool)
+               uma linha por (UF, fornecedor) distinto; True = o cadastro atende a categoria
+      matriz = UF × categoria básica -> nº de fornecedores cadastrados distintos (0 = lacuna)
+    O casamento de CATEGORIAS com as categorias básicas do ERP é o mesmo de sempre (token
+    dentro da categoria ou vice-versa), feito uma vez por valor distinto de CATEGORIAS.
+    """
+    rotulos = _categorias_basicos_exibicao(df_erp, col_cat="INSUMO_CATEGORIA")
+    if not rotulos:
+        return pd.DataFrame(columns=["UF"]), pd.DataFrame()
 
     # exigidos no cadastro
     if "FORN_UF" not in df_forn.columns or "CATEGORIAS" not in df_forn.columns:
         raise KeyError("No cadastro preciso das colunas FORN_UF e CATEGORIAS.")
 
-    df = df_forn.copy()
-    # tenta achar um ID p/ contar distintos; se não achar, conta linhas
-    col_id = _pick_col(df, [
+    cat_bas = sorted(rotulos)
+    nomes = [rotulos[b] for b in cat_bas]
+    # tenta achar um ID p/ contar distintos; se não achar, cada linha conta como um fornecedor
+    col_id = _pick_col(df_forn, [
         "FORNECEDOR_CDG","FORNECEDOR_ID","COD_FORNECEDOR",
         "FORN_CNPJ","CNPJ","FORNECEDOR"
     ])
 
-    df["FORN_UF"]   = df["FORN_UF"].astype("string").str.upper().str.strip()
-    df["CATEGORIAS"] = df["CATEGORIAS"].astype("string")
-
-    def _is_apto(cel) -> bool:
+    # categoria atendida por valor distinto de CATEGORIAS (última linha = nulo)
+    codigos, unicos = pd.factorize(df_forn["CATEGORIAS"].astype("string"), use_na_sentinel=True)
+    atende = np.zeros((len(unicos) + 1, len(cat_bas)), dtype=bool)
+    for i, cel in enumerate(unicos):
         toks = _split_tokens(cel)        # já separa por vírgula/;//|/&/+
-        if not toks: return False
         # match aproximado: token dentro da categoria básica (ou vice-versa)
-        return any(any(t in b or b in t for b in cat_bas) for t in toks)
+        atende[i] = [any(t in b or b in t for t in toks) for b in cat_bas]
+
+    linhas = pd.DataFrame(atende[codigos], columns=nomes, index=df_forn.index)
+    linhas.insert(0, "UF", df_forn["FORN_UF"].astype("string").str.upper().str.strip())
+    if col_id:
+        linhas["_ID_"] = df_forn[col_id].astype("string")
+        pares = (linhas.dropna(subset=["UF", "_ID_"])
+                       .groupby(["UF", "_ID_"], sort=False)[nomes].any()
+                       .reset_index(level="_ID_", drop=True).reset_index())
+    else:
+        pares = linhas.dropna(subset=["UF"]).reset_index(drop=True)
 
-    df["_APTO_BASICO_"] = df["CATEGORIAS"].apply(_is_apto)
+    matriz = pares.groupby("UF")[nomes].sum().astype(int)
+    return pares, matriz
 
-    out = []
-    for uf in locais:
-        m = (df["_APTO_BASICO_"]) & (df["FORN_UF"] == uf.upper())
-        if col_id:
-            q = int(df.loc[m, col_id].astype("string").dropna().nunique())
-        else:
-            q = int(m.sum())  # fallback: conta linhas
-        out.append({"LOCAL": uf, "FORNECEDORES_BÁSICO_CAD": q})
+def cobertura_basicos_por_uf(
+    df_forn: pd.DataFrame | None = None,
+    df_erp: pd.DataFrame | None = None,
+    ufs=None,
+    categorias=None,
+    indice=None,
+) -> pd.DataFrame:
+    """
+    UF | FORNECEDORES_BÁSICO_CAD | CATEGORIAS_COBERTAS | CATEGORIAS_SEM_FORNECEDOR | LACUNAS
+    FORNECEDORES_BÁSICO_CAD = fornecedores distintos que atendem ao menos uma das `categorias`
+    (None = todas as básicas). `ufs` fixa as linhas (UFs sem cadastro aparecem zeradas).
+    `indice`: resultado de matriz_basicos_uf (reaproveitável entre chamadas).
+    """
+    cols = ["UF", "FORNECEDORES_BÁSICO_CAD", "CATEGORIAS_COBERTAS", "CATEGORIAS_SEM_FORNECEDOR", "LACUNAS"]
+    pares, matriz = indice if indice is not None else matriz_basicos_uf(df_forn, df_erp)
+    todas = [c for c in pares.columns if c != "UF"]
+    sel = todas if categorias is None else [c for c in todas if c in set(categorias)]
+    ufs = sorted(matriz.index) if ufs is None else [str(u).upper().strip() for u in ufs]
+    if not ufs:
+        return pd.DataFrame(columns=cols)
+
+    qtd = pares.loc[pares[sel].any(axis=1), "UF"].value_counts()
+    m = matriz.reindex(index=ufs, columns=sel, fill_value=0).to_numpy() > 0
+    nomes = np.array(sel, dtype=object)
+    return pd.DataFrame({
+        "UF": ufs,
+        "FORNECEDORES_BÁSICO_CAD": qtd.reindex(ufs, fill_value=0).astype(int).to_numpy(),
+        "CATEGORIAS_COBERTAS": m.sum(axis=1),
+        "CATEGORIAS_SEM_FORNECEDOR": (~m).sum(axis=1),
+        "LACUNAS": [", ".join(nomes[~linha]) for linha in m],
+    })
 
-    return pd.DataFrame(out).sort_values("LOCAL").reset_index(drop=True)
+def fornecedores_basicos_por_local_cadastro(
+    df_forn: pd.DataFrame,
+    df_erp: pd.DataFrame,
+    locais: tuple[str, ...] = ("RJ", "SP", "SC"),
+    indice=None,
+) -> pd.DataFrame:
+    """Fornecedores cadastrados aptos a algum básico, por UF (fatia da matriz UF × categoria)."""
+    pares, matriz = indice if indice is not None else matriz_basicos_uf(df_forn, df_erp)
+    if len(pares.columns) <= 1:   # sem categorias básicas no ERP
+        return pd.DataFrame(columns=["LOCAL", "FORNECEDORES_BÁSICO_CAD"])
+    cob = cobertura_basicos_por_uf(ufs=list(locais), indice=(pares, matriz))
+    out = pd.DataFrame({"LOCAL": list(locais), "FORNECEDORES_BÁSICO_CAD": cob["FORNECEDORES_BÁSICO_CAD"].to_numpy()})
+    return out.sort_values("LOCAL").reset_index(drop=True)
 
 def itens_da_of(df, of_cdg, top_n: int | None = 5):
     def _pick(cands, cols):
@@ -689,3 +956,45 @@ def categorias_crescimento_desde_2015(
         return res
     return res.sort_values("CRESC_AA_%", ascending=False).reset_index(drop=True)
 
+# ---------- Motores ----------
+INDICADORES = [
+    "fornecedor_top_por_uf", "maior_ordem_fornecimento", "menor_ordem_fornecimento",
+    "valor_medio_por_of", "percentual_ofs_basicas_ultimo_ano", "mes_maior_volume_ultimo_ano",
+    "quantidade_empresas_que_venderam_ultimos_3_anos", "meses_top3_volume_geral",
+    "maior_compra_item_unico", "menor_compra_item_unico", "valor_medio_por_item",
+    "categorias_mais_compradas_ultimos_anos", "categorias_basicos_distintos",
+    "fornecedores_basicos_por_local_cadastro", "itens_da_of",
+    "categorias_com_venda_continua_ultimos_anos", "categorias_crescimento_desde_2015",
+    "total_empresas_cadastradas", "serie_fornecedores_ativos_ultimos_anos",
+    "serie_fornecedores_cadastrados_por_ano",
+]
+
+def motor_indicadores(nome: str = "pandas"):
+    """
+    Seleciona o motor de execução dos indicadores (mesmas assinaturas e saídas):
+      "pandas" -> este módulo + fornecedores_core (DataFrames em memória)
+      "polars" -> motor_polars (lazy/multi-thread; aceita o caminho do cache Parquet)
+      "sqlite" -> armazem_core (recebe um Armazem)
+    Retorna um namespace com uma função por indicador.
+    """
+    import sys
+    from types import SimpleNamespace
+    import fornecedores_core as fc
+
+    if nome == "pandas":
+        mods = [sys.modules[__name__], fc]
+    elif nome == "polars":
+        import motor_polars
+        mods = [motor_polars]
+    elif nome == "sqlite":
+        import armazem_core
+        mods = [armazem_core]
+    else:
+        raise ValueError(f"Motor desconhecido: {nome!r} (use 'pandas', 'polars' ou 'sqlite').")
+
+    fns = {}
+    for n in INDICADORES + ["concentracao_fornecedores", "lead_time_requisicao"]:
+        fn = next((getattr(m, n) for m in mods if hasattr(m, n)), None)
+        if fn is not None:
+            fns[n] = fn
+    return SimpleNamespace(nome=nome, **fns)
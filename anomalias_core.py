@@ -0,0 +1,174 @@
+# anomalias_core.py
+"""
+Anomalias em linhas de item e em totais de OF (prováveis erros de digitação).
+
+Z-score robusto: z = (x - mediana) / (1,4826 · MAD), em escala log (valores monetários são
+muito assimétricos). Mediana e MAD saem para todos os grupos de uma vez: ordena por
+(grupo, valor) e lê as posições centrais de cada grupo — sem loop por grupo.
+  - PRCTTL_INSUMO e ITEM_PRCUNTPED: referência = o próprio item (INSUMO_CDG) quando ele tem
+    pelo menos `min_obs` linhas; senão, a categoria;
+  - total da OF: referência = a categoria principal da OF (a da linha de maior valor).
+Os escores ficam guardados por linha; o limiar só é aplicado na consulta. As estatísticas
+de referência também ficam guardadas, para pontuar linhas novas sem reprocessar a base.
+"""
+import numpy as np
+import pandas as pd
+
+_K_MAD = 1.4826        # MAD -> desvio-padrão (normal)
+_K_MEDIA = 1.2533      # desvio absoluto médio -> desvio-padrão (quando MAD = 0)
+
+def _mediana_grupos(cod: np.ndarray, v: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """(mediana, contagem) de v por código 0..n-1 (uma ordenação para todos os grupos)."""
+    # ordena por valor e depois, de forma estável, pelo código (inteiro curto -> radix sort)
+    o = np.argsort(v)
+    c = cod.astype(np.int16) if n < np.iinfo(np.int16).max else cod
+    vs = v[o[np.argsort(c[o], kind="stable")]]
+    cont = np.bincount(cod, minlength=n)
+    ini = np.concatenate([[0], np.cumsum(cont)[:-1]])
+    med = np.full(n, np.nan)
+    ok = cont > 0
+    med[ok] = (vs[ini[ok] + (cont[ok] - 1) // 2] + vs[ini[ok] + cont[ok] // 2]) / 2.0
+    return med, cont
+
+def _codificar(chave: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    cod, grupos = pd.factorize(chave, use_na_sentinel=True)
+    return cod, pd.Index(grupos)
+
+def _estatisticas(cod: np.ndarray, grupos: pd.Index, x: np.ndarray) -> pd.DataFrame:
+    """MEDIANA | ESCALA | N por grupo (x já em escala log; NaN e código -1 ficam de fora)."""
+    ok = ~np.isnan(x) & (cod >= 0)
+    cod, v = cod[ok], x[ok]
+    med, cont = _mediana_grupos(cod, v, len(grupos))
+    desvio = np.abs(v - med[cod])
+    mad, _ = _mediana_grupos(cod, desvio, len(grupos))
+    media_abs = np.bincount(cod, weights=desvio, minlength=len(grupos)) / np.maximum(cont, 1)
+    escala = np.where(mad > 0, _K_MAD * mad, _K_MEDIA * media_abs)
+    return pd.DataFrame({"MEDIANA": med, "ESCALA": escala, "N": cont}, index=grupos)
+
+def _z(i: np.ndarray, x: np.ndarray, est: pd.DataFrame, min_obs: int) -> np.ndarray:
+    """
+    Escore de cada linha contra o grupo i (posição em est; -1 = sem grupo);
+    NaN se o grupo tem menos de min_obs.
+    """
+    z = np.full(len(x), np.nan)
+    ok = (i >= 0) & ~np.isnan(x)
+    med = est["MEDIANA"].to_numpy()[i[ok]]
+    esc = est["ESCALA"].to_numpy()[i[ok]]
+    n = est["N"].to_numpy()[i[ok]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        zz = np.where(esc > 0, (x[ok] - med) / esc, 0.0)
+    z[ok] = np.where(n >= min_obs, zz, np.nan)
+    return z
+
+def _log_pos(s: pd.Series) -> np.ndarray:
+    v = pd.to_numeric(s, errors="coerce").to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(v > 0, np.log(v), np.nan)
+
+class DetectorAnomalias:
+    """
+    Escores robustos por linha (total do item, preço unitário, total da OF) e as
+    estatísticas de referência usadas para pontuá-los.
+    """
+
+    def __init__(self, df: pd.DataFrame, min_obs: int = 8,
+                 col_of: str = "OF_CDG", col_item: str = "INSUMO_CDG", col_cat: str = "INSUMO_CATEGORIA",
+                 col_total: str = "PRCTTL_INSUMO", col_pu: str = "ITEM_PRCUNTPED"):
+        self.df = df
+        self.min_obs = int(min_obs)
+        self.cols = dict(of=col_of, item=col_item, cat=col_cat, total=col_total, pu=col_pu)
+        cat = df[col_cat] if col_cat in df.columns else pd.Series(pd.NA, index=df.index)
+        i_item, itens = _codificar(df[col_item])
+        i_cat, cats = _codificar(cat)
+
+        # referências por item e por categoria
+        self.ref = {}
+        x_tot = _log_pos(df[col_total])
+        x_pu = _log_pos(df[col_pu]) if col_pu in df.columns else np.full(len(df), np.nan)
+        for nome, x in (("total", x_tot), ("pu", x_pu)):
+            self.ref[(nome, "item")] = _estatisticas(i_item, itens, x)
+            self.ref[(nome, "categoria")] = _estatisticas(i_cat, cats, x)
+
+        # totais de OF por categoria principal
+        ofs = self._totais_of(df)
+        i_of, cats_of = _codificar(ofs["CATEGORIA"])
+        x_of = _log_pos(ofs["VALOR_TOTAL"])
+        self.ref[("of", "categoria")] = _estatisticas(i_of, cats_of, x_of)
+        ofs["Z_OF"] = _z(i_of, x_of, self.ref[("of", "categoria")], self.min_obs)
+        self.ofs_base = ofs
+
+        self.z = self._pontuar_linhas(i_item, i_cat, x_tot, x_pu, df.index)
+        self.z["Z_OF"] = ofs["Z_OF"].reindex(df[col_of].to_numpy()).to_numpy()
+
+    def _totais_of(self, df: pd.DataFrame) -> pd.DataFrame:
+        c = self.cols
+        val = pd.to_numeric(df[c["total"]], errors="coerce")
+        cat = df[c["cat"]] if c["cat"] in df.columns else pd.Series(pd.NA, index=df.index)
+        base = pd.DataFrame({"OF": df[c["of"]].to_numpy(), "V": val.to_numpy(), "CAT": cat.to_numpy()})
+        principal = base.sort_values("V", ascending=False, kind="stable").drop_duplicates("OF")
+        tot = base.groupby("OF", sort=False)["V"].sum()
+        return pd.DataFrame({
+            "VALOR_TOTAL": tot,
+            "CATEGORIA": principal.set_index("OF")["CAT"].reindex(tot.index),
+        })
+
+    def _pontuar_linhas(self, i_item, i_cat, x_tot, x_pu, indice) -> pd.DataFrame:
+        out = {}
+        for nome, x in (("TOTAL", x_tot), ("PU", x_pu)):
+            zi = _z(i_item, x, self.ref[(nome.lower(), "item")], self.min_obs)
+            zc = _z(i_cat, x, self.ref[(nome.lower(), "categoria")], self.min_obs)
+            out[f"Z_{nome}"] = np.where(np.isnan(zi), zc, zi)
+            out[f"REF_{nome}"] = np.where(np.isnan(zi), np.where(np.isnan(zc), "", "categoria"), "item")
+        return pd.DataFrame(out, index=indice)
+
+    # ---------- Consultas (limiar aplicado aqui) ----------
+    def mascara_linhas(self, limiar: float = 3.5) -> np.ndarray:
+        """Linhas anômalas: item fora do padrão ou pertencente a uma OF anômala."""
+        z = self.z[["Z_TOTAL", "Z_PU", "Z_OF"]].abs().to_numpy()
+        return np.nan_to_num(z, nan=0.0).max(axis=1) > limiar
+
+    def linhas(self, limiar: float = 3.5, mascara: np.ndarray | None = None, top_n: int | None = 50) -> pd.DataFrame:
+        """Linhas com |z| do total ou do preço unitário acima do limiar, do maior escore ao menor."""
+        z = self.z
+        forte = np.nan_to_num(z[["Z_TOTAL", "Z_PU"]].abs().to_numpy(), nan=0.0).max(axis=1)
+        sel = forte > limiar
+        if mascara is not None:
+            sel &= mascara
+        cols = [c for c in ("OF_CDG", "OF_DATA", "INSUMO_CDG", "INSUMO_DESC", "INSUMO_CATEGORIA",
+                            "FORNECEDOR_DESC", "QTD_PED", "ITEM_PRCUNTPED", "PRCTTL_INSUMO") if c in self.df.columns]
+        out = pd.concat([self.df.loc[sel, cols], z.loc[sel, ["Z_TOTAL", "REF_TOTAL", "Z_PU", "REF_PU"]]], axis=1)
+        out = out.iloc[np.argsort(-forte[sel], kind="stable")]
+        return out.head(top_n) if top_n else out
+
+    def ofs(self, limiar: float = 3.5, mascara: np.ndarray | None = None, top_n: int | None = 50) -> pd.DataFrame:
+        """OF_CDG | VALOR_TOTAL | CATEGORIA | Z_OF, OFs com |z| acima do limiar."""
+        o = self.ofs_base
+        o = o[o["Z_OF"].abs() > limiar]
+        if mascara is not None:
+            o = o[o.index.isin(self.df.loc[mascara, self.cols["of"]].unique())]
+        o = o.reindex(o["Z_OF"].abs().sort_values(ascending=False).index)
+        out = o.rename_axis("OF_CDG").reset_index()
+        return out.head(top_n) if top_n else out
+
+    def pontuar(self, novas: pd.DataFrame, limiar: float = 3.5) -> pd.DataFrame:
+        """
+        Pontua linhas recém-chegadas contra as referências guardadas (sem reprocessar a base).
+        Devolve as linhas com Z_TOTAL/Z_PU/Z_OF e ANOMALIA. Z_OF considera só as linhas novas
+        de cada OF (adequado para OFs novas).
+        """
+        c = self.cols
+        cat = novas[c["cat"]] if c["cat"] in novas.columns else pd.Series(pd.NA, index=novas.index)
+        # posições nas referências guardadas (item/categoria fora delas -> -1, sem escore)
+        i_item = self.ref[("total", "item")].index.get_indexer(novas[c["item"]])
+        i_cat = self.ref[("total", "categoria")].index.get_indexer(cat)
+        x_pu = _log_pos(novas[c["pu"]]) if c["pu"] in novas.columns else np.full(len(novas), np.nan)
+        z = self._pontuar_linhas(i_item, i_cat, _log_pos(novas[c["total"]]), x_pu, novas.index)
+        ofs = self._totais_of(novas)
+        ref_of = self.ref[("of", "categoria")]
+        z_of = _z(ref_of.index.get_indexer(ofs["CATEGORIA"]), _log_pos(ofs["VALOR_TOTAL"]), ref_of, self.min_obs)
+        z["Z_OF"] = pd.Series(z_of, index=ofs.index).reindex(novas[c["of"]].to_numpy()).to_numpy()
+        zmax = np.nan_to_num(z[["Z_TOTAL", "Z_PU", "Z_OF"]].abs().to_numpy(), nan=0.0).max(axis=1)
+        return pd.concat([novas, z], axis=1).assign(ANOMALIA=zmax > limiar)
+
+def detectar_anomalias(df: pd.DataFrame, min_obs: int = 8, **cols) -> DetectorAnomalias:
+    return DetectorAnomalias(df, min_obs=min_obs, **cols)
@@ -0,0 +1,404 @@
+# armazem_core.py
+"""
+Backend alternativo: ERP + cadastro de fornecedores persistidos num arquivo SQLite local.
+
+Cada indicador de Tratamento_Indicadores / fornecedores_core tem aqui uma versão com a
+mesma assinatura, recebendo um `Armazem` no lugar do DataFrame. O filtro de período
+(OF_DATA, indexada) e as agregações são empurrados para o SQL; quando o cálculo final é
+mais simples em pandas, só as linhas/colunas necessárias são lidas e a função original
+é aplicada sobre elas (mesmo resultado do caminho em memória).
+"""
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+import Tratamento_Indicadores as ti
+import fornecedores_core as fc
+
+_TAB_ERP = "erp"
+_TAB_FORN = "fornecedores"
+_TAB_META = "_meta"
+_FMT_DT = "%Y-%m-%d %H:%M:%S"
+_DATAS_ERP = ["REQ_DATA", "OF_DATA"]
+
+# ---------- Carga ----------
+class Armazem:
+    """Aponta para o arquivo SQLite; abre e fecha uma conexão por consulta (seguro entre threads)."""
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+
+    def conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def consulta(self, sql: str, params=(), parse_dates=None) -> pd.DataFrame:
+        with closing(self.conectar()) as con:
+            df = pd.read_sql_query(sql, con, params=list(params))
+        for c in parse_dates or []:
+            if c in df.columns:
+                df[c] = pd.to_datetime(df[c], errors="coerce")
+        return df
+
+    def escalar(self, sql: str, params=()):
+        with closing(self.conectar()) as con:
+            row = con.execute(sql, list(params)).fetchone()
+        return row[0] if row else None
+
+    def colunas(self, tabela: str = _TAB_ERP) -> list[str]:
+        with closing(self.conectar()) as con:
+            return [r[1] for r in con.execute(f'PRAGMA table_info("{tabela}")')]
+
+    def ler(self, colunas=None, where: str = "", params=(), tabela: str = _TAB_ERP) -> pd.DataFrame:
+        """Lê só as colunas/linhas pedidas (projeção + predicado empurrados para o SQL)."""
+        disp = self.colunas(tabela)
+        cols = [c for c in (colunas or disp) if c in disp]
+        sel = ", ".join(f'"{c}"' for c in cols) if cols else "*"
+        sql = f'SELECT {sel} FROM "{tabela}"'
+        if where:
+            sql += f" WHERE {where}"
+        sql += " ORDER BY rowid"
+        datas = _DATAS_ERP if tabela == _TAB_ERP else []
+        df = self.consulta(sql, params, parse_dates=datas)
+        if tabela == _TAB_ERP:
+            for c in ("INSUMO_CDG", "FORNECEDOR_CDG"):
+                if c in df.columns:
+                    df[c] = df[c].astype("string")
+        return df
+
+    def impressao(self) -> str | None:
+        """Impressão digital das bases gravadas (None se o arquivo não a registra)."""
+        try:
+            return self.escalar(f"SELECT valor FROM {_TAB_META} WHERE chave = 'impressao'")
+        except sqlite3.Error:
+            return None
+
+def _datas_para_texto(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    for c in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[c]):
+            out[c] = out[c].dt.strftime(_FMT_DT)
+    return out
+
+def salvar_armazem(df_erp: pd.DataFrame, df_forn: pd.DataFrame | None = None,
+                   path: Path | str | None = None, impressao: str | None = None) -> Armazem:
+    """
+    Persiste as bases no SQLite (padrão: indicadores.sqlite ao lado deste arquivo).
+    Datas viram texto ISO (comparáveis no SQL); escrita num arquivo temporário + troca atômica.
+    Com `impressao` (impressao_core), não regrava se o arquivo já guarda a mesma impressão.
+    """
+    base_dir = Path(__file__).parent
+    destino = Path(path) if path else base_dir / "indicadores.sqlite"
+    if impressao and destino.exists() and Armazem(destino).impressao() == impressao:
+        return Armazem(destino)
+    tmp = destino.with_suffix(destino.suffix + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+
+    with closing(sqlite3.connect(tmp)) as con, con:
+        _datas_para_texto(df_erp).to_sql(_TAB_ERP, con, index=False, chunksize=50_000)
+        for c in ("OF_DATA", "OF_CDG", "FORNECEDOR_CDG", "INSUMO_CDG"):
+            if c in df_erp.columns:
+                con.execute(f'CREATE INDEX "ix_{_TAB_ERP}_{c}" ON "{_TAB_ERP}" ("{c}")')
+        if df_forn is not None:
+            _datas_para_texto(df_forn).to_sql(_TAB_FORN, con, index=False, chunksize=50_000)
+        if impressao:
+            con.execute(f"CREATE TABLE {_TAB_META} (chave TEXT PRIMARY KEY, valor TEXT)")
+            con.execute(f"INSERT INTO {_TAB_META} VALUES ('impressao', ?)", [impressao])
+    tmp.replace(destino)
+    return Armazem(destino)
+
+def abrir_armazem(path: Path | str | None = None) -> Armazem:
+    base_dir = Path(__file__).parent
+    destino = Path(path) if path else base_dir / "indicadores.sqlite"
+    if not destino.exists():
+        raise FileNotFoundError(f"Armazém não encontrado: {destino}")
+    return Armazem(destino)
+
+# ---------- Helpers ----------
+def _limite(anos: int) -> str:
+    return (pd.Timestamp.today() - pd.DateOffset(years=anos)).strftime(_FMT_DT)
+
+_ID_LIMPO = "NULLIF(NULLIF(NULLIF(TRIM({c}), ''), 'nan'), 'None')"
+
+# ---------- Indicadores (ERP) ----------
+def fornecedor_top_por_uf(db: Armazem, anos=10, ufs=("RJ", "SP")):
+    if not ufs:
+        return pd.DataFrame()
+    marc = ", ".join("?" for _ in ufs)
+    g = db.consulta(
+        f"""
+        SELECT FORNECEDOR_UF AS UF, FORNECEDOR_CDG, FORNECEDOR_DESC, SUM(PRCTTL_INSUMO) AS VALOR
+        FROM {_TAB_ERP}
+        WHERE OF_DATA >= ? AND FORNECEDOR_UF IN ({marc})
+          AND FORNECEDOR_CDG IS NOT NULL AND FORNECEDOR_DESC IS NOT NULL
+        GROUP BY FORNECEDOR_UF, FORNECEDOR_CDG, FORNECEDOR_DESC
+        """,
+        [_limite(anos), *ufs],
+    )
+    out = []
+    for uf in ufs:
+        top = g[g["UF"] == uf].sort_values("VALOR", ascending=False).head(1)
+        if not top.empty:
+            out.append({
+                "UF": uf,
+                "FORNECEDOR_CDG": top.iloc[0]["FORNECEDOR_CDG"],
+                "FORNECEDOR_DESC": top.iloc[0]["FORNECEDOR_DESC"],
+                "VALOR": float(top.iloc[0]["VALOR"]),
+            })
+    out = pd.DataFrame(out)
+    if not out.empty:
+        out["FORNECEDOR_CDG"] = out["FORNECEDOR_CDG"].astype("string")
+        w = int(out["FORNECEDOR_CDG"].dropna().astype(str).str.len().max())
+        if w > 0:
+            out["FORNECEDOR_CDG"] = out["FORNECEDOR_CDG"].str.zfill(w)
+        out["VALOR"] = pd.to_numeric(out["VALOR"], errors="coerce").round(2)
+    return out
+
+def _of_extrema(db: Armazem, desc: bool):
+    ordem = "DESC" if desc else "ASC"
+    return db.escalar(
+        f"""
+        SELECT OF_CDG FROM {_TAB_ERP}
+        WHERE OF_CDG IS NOT NULL
+        GROUP BY OF_CDG
+        HAVING TOTAL(PRCTTL_INSUMO) > 0
+        ORDER BY TOTAL(PRCTTL_INSUMO) {ordem}
+        LIMIT 1
+        """
+    )
+
+def maior_ordem_fornecimento(db: Armazem):
+    of = _of_extrema(db, desc=True)
+    if of is None:
+        return ti.maior_ordem_fornecimento(db.ler(["OF_CDG", "OF_DATA", "PRCTTL_INSUMO", "EMPRD_DESC",
+                                                   "FORNECEDOR_DESC", "INSUMO_CDG"], "0"))
+    return ti.maior_ordem_fornecimento(db.ler(where="OF_CDG = ?", params=[of]))
+
+def menor_ordem_fornecimento(db: Armazem):
+    of = _of_extrema(db, desc=False)
+    if of is None:
+        return ti.menor_ordem_fornecimento(db.ler(["OF_CDG", "OF_DATA", "PRCTTL_INSUMO", "EMPRD_DESC",
+                                                   "FORNECEDOR_DESC", "INSUMO_CDG"], "0"))
+    return ti.menor_ordem_fornecimento(db.ler(where="OF_CDG = ?", params=[of]))
+
+def valor_medio_por_of(db: Armazem):
+    tot = db.consulta(
+        f"""
+        SELECT OF_CDG, TOTAL(PRCTTL_INSUMO) AS VALOR_TOTAL_OF
+        FROM {_TAB_ERP} WHERE OF_CDG IS NOT NULL
+        GROUP BY OF_CDG ORDER BY OF_CDG
+        """
+    )
+    tot["VALOR_TOTAL_OF"] = pd.to_numeric(tot["VALOR_TOTAL_OF"], errors="coerce").round(2)
+    media = float(tot["VALOR_TOTAL_OF"].mean()) if not tot.empty else 0.0
+    return media, tot
+
+def percentual_ofs_basicas_ultimo_ano(db: Armazem):
+    grp = db.consulta(
+        f"""
+        SELECT OF_CDG,
+               CASE WHEN MAX(TIPO_MATERIAL = 'BÁSICO') = 1 THEN 'BÁSICO' ELSE 'ESPECÍFICO' END AS TIPO_OF
+        FROM {_TAB_ERP}
+        WHERE OF_DATA >= ? AND OF_CDG IS NOT NULL
+        GROUP BY OF_CDG ORDER BY OF_CDG
+        """,
+        [_limite(1)],
+    )
+    if grp.empty:
+        return 0.0, pd.DataFrame(columns=["OF_CDG", "TIPO_OF"])
+    total = len(grp)
+    bas = int((grp["TIPO_OF"] == "BÁSICO").sum())
+    pct = (bas / total * 100.0) if total else 0.0
+    return pct, grp
+
+def mes_maior_volume_ultimo_ano(db: Armazem, top_n=3):
+    res = db.consulta(
+        f"""
+        SELECT substr(OF_DATA, 1, 7) AS ANO_MES, TOTAL(PRCTTL_INSUMO) AS VALOR_TOTAL
+        FROM {_TAB_ERP} WHERE OF_DATA >= ?
+        GROUP BY substr(OF_DATA, 1, 7)
+        """,
+        [_limite(1)],
+    )
+    if res.empty:
+        return pd.DataFrame(columns=["ANO_MES", "VALOR_TOTAL", "PART_%"])
+    res["ANO_MES"] = pd.PeriodIndex(res["ANO_MES"], freq="M")
+    res = res.sort_values("VALOR_TOTAL", ascending=False)
+    total = res["VALOR_TOTAL"].sum()
+    res["PART_%"] = (res["VALOR_TOTAL"] / total * 100).round(2) if total else 0.0
+    res["VALOR_TOTAL"] = pd.to_numeric(res["VALOR_TOTAL"], errors="coerce").round(2)
+    return res.head(int(top_n))
+
+def quantidade_empresas_que_venderam_ultimos_3_anos(db: Armazem, indice=None, aproximado: bool = False):
+    disp = db.colunas()
+    col = next((c for c in ti.CANDIDATOS_FORNECEDOR if c in disp), None)
+    if not col:
+        raise KeyError(f"Não encontrei coluna de fornecedor. Tente uma destas: {ti.CANDIDATOS_FORNECEDOR}. "
+                       f"Disponíveis: {disp}")
+    q = db.escalar(
+        f"""
+        SELECT COUNT(DISTINCT {_ID_LIMPO.format(c=col)})
+        FROM {_TAB_ERP} WHERE OF_DATA >= ? AND PRCTTL_INSUMO > 0
+        """,
+        [_limite(3)],
+    )
+    return int(q or 0)
+
+def meses_top3_volume_geral(db: Armazem, top_n=3):
+    agg = db.consulta(
+        f"""
+        SELECT CAST(substr(OF_DATA, 6, 2) AS INTEGER) AS MES, TOTAL(PRCTTL_INSUMO) AS VALOR_TOTAL
+        FROM {_TAB_ERP} WHERE OF_DATA IS NOT NULL
+        GROUP BY MES ORDER BY MES
+        """
+    )
+    if agg.empty:
+        return pd.DataFrame(columns=["MES_ROTULO", "VALOR_TOTAL", "PART_%"])
+    _MES_LABEL = {1:"Jan",2:"Fev",3:"Mar",4:"Abr",5:"Mai",6:"Jun",7:"Jul",8:"Ago",9:"Set",10:"Out",11:"Nov",12:"Dez"}
+    total = agg["VALOR_TOTAL"].sum()
+    agg["PART_%"] = (agg["VALOR_TOTAL"]/total*100).round(2) if total else 0.0
+    agg["MES_ROTULO"] = agg["MES"].map(_MES_LABEL)
+    agg["VALOR_TOTAL"] = pd.to_numeric(agg["VALOR_TOTAL"], errors="coerce").round(2)
+    out = agg.sort_values("VALOR_TOTAL", ascending=False).head(int(top_n))
+    return out[["MES_ROTULO", "VALOR_TOTAL", "PART_%"]]
+
+def _linha_extrema(db: Armazem, maior: bool) -> pd.DataFrame:
+    if maior:
+        where = "PRCTTL_INSUMO IS NOT NULL ORDER BY PRCTTL_INSUMO DESC"
+    else:
+        pos = db.escalar(f"SELECT COUNT(*) FROM {_TAB_ERP} WHERE PRCTTL_INSUMO > 0")
+        where = ("PRCTTL_INSUMO > 0" if pos else "PRCTTL_INSUMO IS NOT NULL") + " ORDER BY PRCTTL_INSUMO ASC"
+    rid = db.escalar(f"SELECT rowid FROM {_TAB_ERP} WHERE {where} LIMIT 1")
+    return db.ler(where="rowid = ?", params=[rid if rid is not None else -1])
+
+def maior_compra_item_unico(db: Armazem):
+    return ti.maior_compra_item_unico(_linha_extrema(db, maior=True))
+
+def menor_compra_item_unico(db: Armazem):
+    return ti.menor_compra_item_unico(_linha_extrema(db, maior=False))
+
+def valor_medio_por_item(db: Armazem):
+    return ti.valor_medio_por_item(db.ler(["PRCTTL_INSUMO"], "PRCTTL_INSUMO > 0"))
+
+def categorias_mais_compradas_ultimos_anos(db: Armazem, anos=5, col_cat="INSUMO_CATEGORIA"):
+    if col_cat not in db.colunas():
+        return pd.DataFrame(columns=["CATEGORIA", "VALOR_TOTAL", "PART_%"])
+    grp = db.consulta(
+        f"""
+        SELECT "{col_cat}" AS CATEGORIA, TOTAL(PRCTTL_INSUMO) AS VALOR_TOTAL
+        FROM {_TAB_ERP} WHERE OF_DATA >= ? AND "{col_cat}" IS NOT NULL
+        GROUP BY "{col_cat}"
+        """,
+        [_limite(anos)],
+    )
+    if grp.empty:
+        return pd.DataFrame(columns=["CATEGORIA", "VALOR_TOTAL", "PART_%"])
+    tot = float(grp["VALOR_TOTAL"].sum())
+    grp["PART_%"] = (grp["VALOR_TOTAL"] / tot * 100).round(2) if tot else 0.0
+    grp["VALOR_TOTAL"] = grp["VALOR_TOTAL"].round(2)
+    return grp.sort_values("VALOR_TOTAL", ascending=False)
+
+def categorias_basicos_distintos(db: Armazem, col_cat: str = "INSUMO_CATEGORIA") -> pd.DataFrame:
+    return ti.categorias_basicos_distintos(
+        db.ler(["TIPO_MATERIAL", col_cat], "TIPO_MATERIAL = 'BÁSICO'"), col_cat=col_cat
+    )
+
+def fornecedores_basicos_por_local_cadastro(db: Armazem, df_erp=None, locais=("RJ", "SP", "SC")) -> pd.DataFrame:
+    """`df_erp` é ignorado (as duas bases vêm do armazém); mantido pela assinatura."""
+    erp_bas = db.ler(["TIPO_MATERIAL", "INSUMO_CATEGORIA"], "TIPO_MATERIAL = 'BÁSICO'")
+    return ti.fornecedores_basicos_por_local_cadastro(db.ler(tabela=_TAB_FORN), erp_bas, locais=locais)
+
+def itens_da_of(db: Armazem, of_cdg, top_n: int | None = 5):
+    return ti.itens_da_of(db.ler(where="OF_CDG = ?", params=[of_cdg]), of_cdg=of_cdg, top_n=top_n)
+
+def categorias_com_venda_continua_ultimos_anos(db: Armazem, anos: int = 5, col_cat: str = "INSUMO_CATEGORIA",
+                                               col_data: str = "OF_DATA", col_val: str = "PRCTTL_INSUMO"):
+    base = db.ler([col_cat, col_data, col_val], f'"{col_data}" IS NOT NULL AND "{col_val}" IS NOT NULL')
+    return ti.categorias_com_venda_continua_ultimos_anos(base, anos=anos, col_cat=col_cat,
+                                                         col_data=col_data, col_val=col_val)
+
+def categorias_crescimento_desde_2015(db: Armazem, start_year: int = 2015, col_cat: str = "INSUMO_CATEGORIA",
+                                      col_data: str = "OF_DATA", col_val: str = "PRCTTL_INSUMO",
+                                      min_anos_validos: int = 3, clip_pct: float | None = 500.0,
+                                      require_continuous_last_n: int | None = None) -> pd.DataFrame:
+    base = db.ler([col_cat, col_data, col_val], f'"{col_data}" IS NOT NULL AND "{col_val}" IS NOT NULL')
+    return ti.categorias_crescimento_desde_2015(
+        base, start_year=start_year, col_cat=col_cat, col_data=col_data, col_val=col_val,
+        min_anos_validos=min_anos_validos, clip_pct=clip_pct,
+        require_continuous_last_n=require_continuous_last_n,
+    )
+
+def concentracao_fornecedores(db: Armazem, por="INSUMO_CATEGORIA", anos: int | None = None,
+                              col_forn="FORNECEDOR_CDG", col_val="PRCTTL_INSUMO",
+                              corte_pct: float = 80.0):
+    disp = db.colunas()
+    if por not in disp or col_forn not in disp:
+        return ti.concentracao_fornecedores(pd.DataFrame(), por=por, col_forn=col_forn, corte_pct=corte_pct)
+    where, params = f'"{col_val}" > 0', []
+    if anos:
+        where += ' AND "OF_DATA" >= ?'
+        params.append(_limite(anos))
+    base = db.ler([por, col_forn, col_val, "FORNECEDOR_DESC"], where, params)
+    return ti.concentracao_fornecedores(base, por=por, anos=None, col_forn=col_forn,
+                                        col_val=col_val, corte_pct=corte_pct)
+
+def lead_time_requisicao(db: Armazem, por: str | None = "INSUMO_CATEGORIA", anos: int | None = None,
+                         col_req="REQ_DATA", col_of="OF_DATA"):
+    disp = db.colunas()
+    if col_req not in disp or col_of not in disp or (por and por != "MES" and por not in disp):
+        return ti.lead_time_requisicao(pd.DataFrame(), por=por)
+    cols = [col_req, col_of] + ([por] if por and por != "MES" else [])
+    # comparação por dia (como o cálculo em pandas, que normaliza as datas)
+    where = f'"{col_req}" IS NOT NULL AND substr("{col_of}", 1, 10) >= substr("{col_req}", 1, 10)'
+    params = []
+    if anos:
+        where += f' AND "{col_of}" >= ?'
+        params.append(_limite(anos))
+    base = db.ler(cols, where, params)
+    return ti.lead_time_requisicao(base, por=por, anos=None, col_req=col_req, col_of=col_of)
+
+# ---------- Indicadores (fornecedores) ----------
+def total_empresas_cadastradas(db: Armazem, col_id: str | None = None) -> int:
+    vazio = pd.DataFrame(columns=db.colunas(_TAB_FORN))
+    try:
+        col = col_id or fc._col(vazio, ["FORNECEDOR_CDG"])
+    except KeyError:
+        col = fc._col(vazio, ["FORN_CNPJ", "CNPJ"])
+    q = db.escalar(f'SELECT COUNT(DISTINCT {_ID_LIMPO.format(c=chr(34) + col + chr(34))}) FROM {_TAB_FORN}')
+    return int(q or 0)
+
+def serie_fornecedores_ativos_ultimos_anos(db: Armazem, anos: int = 10, col_id: str = "FORNECEDOR_CDG",
+                                           col_data: str = "OF_DATA", indice=None,
+                                           aproximado: bool = False) -> tuple[pd.DataFrame, dict]:
+    vazio = pd.DataFrame(columns=["ANO", "FORNECEDORES_ATIVOS"]), {
+        "primeiro_ano": None, "ultimo_ano": None, "var_abs": 0, "var_pct": 0.0
+    }
+    if col_id not in db.colunas():
+        return vazio
+    serie = db.consulta(
+        f"""
+        SELECT CAST(substr("{col_data}", 1, 4) AS INTEGER) AS ANO,
+               COUNT(DISTINCT {_ID_LIMPO.format(c=chr(34) + col_id + chr(34))}) AS FORNECEDORES_ATIVOS
+        FROM {_TAB_ERP} WHERE "{col_data}" >= ?
+        GROUP BY ANO HAVING FORNECEDORES_ATIVOS > 0 ORDER BY ANO
+        """,
+        [_limite(anos)],
+    )
+    if serie.empty:
+        return vazio
+    prim = serie.iloc[0]["FORNECEDORES_ATIVOS"]
+    ult  = serie.iloc[-1]["FORNECEDORES_ATIVOS"]
+    resumo = {
+        "primeiro_ano": int(serie.iloc[0]["ANO"]),
+        "ultimo_ano":   int(serie.iloc[-1]["ANO"]),
+        "var_abs":      int(ult - prim),
+        "var_pct":      float((ult - prim) / prim * 100) if prim else 0.0,
+    }
+    return serie, resumo
+
+def serie_fornecedores_cadastrados_por_ano(db: Armazem, anos: int = 10, col_id: str | None = None,
+                                           col_data_cad: str | None = None) -> pd.DataFrame:
+    df = db.ler(tabela=_TAB_FORN)
+    return fc.serie_fornecedores_cadastrados_por_ano(df, anos=anos, col_id=col_id, col_data_cad=col_data_cad)
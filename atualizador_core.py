@@ -0,0 +1,172 @@
+# atualizador_core.py
+"""
+Atualização das bases em segundo plano com troca atômica.
+
+Uma thread observa os arquivos de origem (mtime + tamanho). Quando mudam — e ficam estáveis
+por uma verificação, para não ler planilha pela metade —, confere o hash do conteúdo
+(impressao_core); só se ele mudou reconstrói os dados tipados e os agregados derivados fora
+do caminho da requisição e publica a nova versão de uma vez.
+Quem lê sempre recebe uma versão completa (a antiga até a nova ficar pronta).
+Derivados caros podem vir como `Adiado`: na 1ª carga são calculados só quando lidos
+(a página aparece antes); nas recargas a thread os calcula antes da troca.
+"""
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable
+
+from impressao_core import impressao_arquivos
+
+@dataclass(frozen=True)
+class VersaoBases:
+    dados: dict
+    assinatura: tuple            # ((nome, mtime, tamanho), ...) dos arquivos usados
+    carregado_em: float          # epoch da publicação
+    max_mtime: float             # mtime mais recente entre os arquivos (carimbo "Atualizado em")
+    numero: int = 0
+    impressao: str = ""          # hash do conteúdo dos arquivos (chave dos caches derivados)
+    erro: str | None = field(default=None, compare=False)
+
+class Adiado:
+    """Valor calculado na primeira leitura, uma única vez (seguro entre threads)."""
+
+    def __init__(self, calcular: Callable[[], object]):
+        self._calcular = calcular
+        self._lock = threading.Lock()
+        self._pronto = False
+        self._valor = None
+        self._erro: Exception | None = None
+
+    @property
+    def pronto(self) -> bool:
+        return self._pronto
+
+    def valor(self):
+        if not self._pronto:
+            with self._lock:
+                if not self._pronto:
+                    try:
+                        self._valor = self._calcular()
+                    except Exception as e:
+                        self._erro = e
+                    self._pronto = True
+                    self._calcular = None
+        if self._erro is not None:
+            raise self._erro
+        return self._valor
+
+def _aquecer(dados: dict):
+    for v in dados.values():
+        if isinstance(v, Adiado):
+            try:
+                v.valor()
+            except Exception:
+                pass  # o erro fica guardado e reaparece para quem ler o valor
+
+def assinatura_arquivos(arquivos: list[Path]) -> tuple:
+    out = []
+    for p in arquivos:
+        p = Path(p)
+        try:
+            st = p.stat()
+            out.append((p.name, st.st_mtime, st.st_size))
+        except FileNotFoundError:
+            out.append((p.name, None, 0))
+    return tuple(out)
+
+def _max_mtime(assinatura: tuple) -> float:
+    return max((m for _, m, _ in assinatura if m), default=0.0)
+
+class AtualizadorBases:
+    """
+    Uso:
+        atu = AtualizadorBases([arq1, arq2], construir=lambda: {...}, intervalo=30)
+        atu.iniciar()           # 1ª carga síncrona + thread de observação
+        v = atu.atual()         # VersaoBases completa e imutável
+    """
+
+    def __init__(self, arquivos: list[Path], construir: Callable[[], dict], intervalo: float = 30.0):
+        self.arquivos = [Path(a) for a in arquivos]
+        self.construir = construir
+        self.intervalo = float(intervalo)
+        self._versao: VersaoBases | None = None
+        self._lock = threading.Lock()          # serializa reconstruções
+        self._parar = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.ultimo_erro: str | None = None
+        self._assinatura_com_erro: tuple | None = None
+
+    def atual(self) -> VersaoBases:
+        v = self._versao
+        if v is None:
+            self.recarregar()
+            v = self._versao
+        return v
+
+    def recarregar(self, assinatura: tuple | None = None, aquecer: bool = False) -> bool:
+        """
+        Reconstrói e publica; em caso de erro mantém a versão anterior. Retorna True se trocou.
+        aquecer=True calcula os valores `Adiado` antes da troca (usado pela thread).
+        """
+        with self._lock:
+            assinatura = assinatura or assinatura_arquivos(self.arquivos)
+            if self._versao is not None and self._versao.assinatura == assinatura:
+                return False
+            impressao = impressao_arquivos(self.arquivos)
+            if self._versao is not None and self._versao.impressao == impressao:
+                # só metadados mudaram (cópia/touch): mesma versão, nova assinatura
+                self._versao = replace(self._versao, assinatura=assinatura)
+                return False
+            try:
+                dados = self.construir()
+                if aquecer:
+                    _aquecer(dados)
+            except Exception as e:
+                self.ultimo_erro = f"{type(e).__name__}: {e}"
+                self._assinatura_com_erro = assinatura
+                if self._versao is None:
+                    raise
+                return False
+            numero = self._versao.numero + 1 if self._versao else 1
+            # atribuição única: leitores veem a versão antiga ou a nova, nunca um meio-termo
+            self._versao = VersaoBases(
+                dados=dados,
+                assinatura=assinatura,
+                carregado_em=time.time(),
+                max_mtime=_max_mtime(assinatura),
+                numero=numero,
+                impressao=impressao,
+            )
+            self.ultimo_erro = None
+            return True
+
+    def verificar(self, anterior: tuple | None = None) -> tuple:
+        """Uma rodada de observação; recarrega se a assinatura mudou e está estável."""
+        atual = assinatura_arquivos(self.arquivos)
+        v = self._versao
+        if (v is not None and atual != v.assinatura and atual == anterior
+                and atual != self._assinatura_com_erro):
+            self.recarregar(atual, aquecer=True)
+        return atual
+
+    def _loop(self):
+        anterior = None
+        while not self._parar.wait(self.intervalo):
+            try:
+                anterior = self.verificar(anterior)
+            except Exception as e:  # a thread nunca deve morrer
+                self.ultimo_erro = f"{type(e).__name__}: {e}"
+
+    def iniciar(self) -> "AtualizadorBases":
+        self.atual()
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name="atualizador-bases", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.intervalo + 1)
@@ -0,0 +1,82 @@
+# benchmarks/bench_inicializacao.py
+"""
+Tempo até a primeira pintura do streamlit_app (e até as bases e o resumo ficarem prontos),
+num processo novo por rodada, com uma base sintética gravada como total_indicadores.xlsx.
+
+    python -m benchmarks.bench_inicializacao --linhas 50000
+
+Rodadas:
+  fria  -> nenhum processo publicou a base ainda (lê o xlsx e publica em memória compartilhada)
+  morna -> novo processo com a base já publicada (só mapeia o Arrow IPC)
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.sintetico import gerar_erp
+
+_RAIZ = Path(__file__).resolve().parent.parent
+
+_FILHO = """
+import sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_st = time.perf_counter() - t0
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+at.run()
+print(t_st, len(at.exception))
+"""
+
+def _preparar(destino: Path, linhas: int):
+    for p in _RAIZ.iterdir():
+        if p.suffix in (".py", ".xlsx") and p.name != "total_indicadores.xlsx":
+            shutil.copy(p, destino)
+    df = gerar_erp(linhas).drop(columns=["TIPO_MATERIAL"])
+    df.to_excel(destino / "total_indicadores.xlsx", sheet_name="Planilha1", index=False)
+
+def _rodar(app: Path, shm: Path, marcas: Path) -> dict:
+    env = dict(os.environ, INDICADORES_SHM_DIR=str(shm), INDICADORES_MARCAS=str(marcas))
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _FILHO, str(app)], cwd=app.parent, env=env,
+                         capture_output=True, text=True, check=True)
+    total = time.perf_counter() - t0
+    t_st, n_exc = out.stdout.split()[-2:]
+    res = json.loads(marcas.read_text(encoding="utf-8"))
+    res["processo_total"] = total
+    res["import_streamlit"] = float(t_st)
+    res["excecoes"] = int(n_exc)
+    return res
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--linhas", type=int, default=50_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        app_dir, shm = tmp / "app", tmp / "shm"
+        app_dir.mkdir()
+        shm.mkdir()
+        _preparar(app_dir, args.linhas)
+        app = app_dir / "streamlit_app.py"
+
+        linhas = []
+        for rodada in ("fria", "morna"):
+            r = _rodar(app, shm, tmp / f"marcas_{rodada}.json")
+            linhas.append({"RODADA": rodada, **{k: round(v, 3) if isinstance(v, float) else v
+                                               for k, v in r.items()}})
+
+    res = pd.DataFrame(linhas).set_index("RODADA").T
+    print(f"Base sintética: {args.linhas:,} linhas (segundos desde o início do script)".replace(",", "."))
+    print(res.to_string())
+
+if __name__ == "__main__":
+    main()
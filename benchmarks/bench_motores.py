@@ -0,0 +1,71 @@
+# benchmarks/bench_motores.py
+"""
+Compara o tempo de cada indicador nos motores pandas (DataFrame em memória) e polars
+(lazy sobre o cache Parquet) numa base sintética.
+
+    python -m benchmarks.bench_motores --linhas 2000000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from Tratamento_Indicadores import motor_indicadores
+from benchmarks.sintetico import gerar_erp
+
+CHAMADAS = [
+    ("fornecedor_top_por_uf", {"anos": 10}),
+    ("maior_ordem_fornecimento", {}),
+    ("menor_ordem_fornecimento", {}),
+    ("valor_medio_por_of", {}),
+    ("percentual_ofs_basicas_ultimo_ano", {}),
+    ("mes_maior_volume_ultimo_ano", {"top_n": 3}),
+    ("quantidade_empresas_que_venderam_ultimos_3_anos", {}),
+    ("meses_top3_volume_geral", {"top_n": 3}),
+    ("maior_compra_item_unico", {}),
+    ("menor_compra_item_unico", {}),
+    ("valor_medio_por_item", {}),
+    ("categorias_mais_compradas_ultimos_anos", {"anos": 5}),
+    ("categorias_com_venda_continua_ultimos_anos", {"anos": 5}),
+    ("categorias_crescimento_desde_2015", {"require_continuous_last_n": 5}),
+    ("serie_fornecedores_ativos_ultimos_anos", {"anos": 10}),
+    ("concentracao_fornecedores", {"anos": 5}),
+]
+
+def _tempo(fn, *a, repeticoes=3, **k) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn(*a, **k)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--linhas", type=int, default=1_000_000)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    args = ap.parse_args()
+
+    df = gerar_erp(args.linhas)
+    m_pd = motor_indicadores("pandas")
+    m_pl = motor_indicadores("polars")
+    from motor_polars import salvar_cache_parquet
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pq = salvar_cache_parquet(df, Path(tmp) / "erp.parquet")
+        linhas = []
+        for nome, kw in CHAMADAS:
+            t_pd = _tempo(getattr(m_pd, nome), df, repeticoes=args.repeticoes, **kw)
+            t_pl = _tempo(getattr(m_pl, nome), pq, repeticoes=args.repeticoes, **kw)
+            linhas.append({"INDICADOR": nome, "PANDAS_S": round(t_pd, 4),
+                           "POLARS_S": round(t_pl, 4), "SPEEDUP": round(t_pd / t_pl, 2) if t_pl else None})
+
+    res = pd.DataFrame(linhas)
+    print(f"Base sintética: {args.linhas:,} linhas".replace(",", "."))
+    print(res.to_string(index=False))
+    print(f"Total: pandas {res['PANDAS_S'].sum():.2f}s | polars {res['POLARS_S'].sum():.2f}s")
+
+if __name__ == "__main__":
+    main()
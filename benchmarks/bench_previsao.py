@@ -0,0 +1,45 @@
+# benchmarks/bench_previsao.py
+"""
+Tempo da previsão de 12 meses para todas as categorias, por modelo, numa base sintética
+com muitas categorias (a base sintética padrão tem só 10).
+
+    python -m benchmarks.bench_previsao --linhas 2000000 --categorias 5000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.sintetico import gerar_erp
+from previsao_core import MODELOS, matriz_mensal, prever_categorias
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--linhas", type=int, default=1_000_000)
+    ap.add_argument("--categorias", type=int, default=2_000)
+    ap.add_argument("--meses", type=int, default=60)
+    args = ap.parse_args()
+
+    df = gerar_erp(args.linhas)
+    rng = np.random.default_rng(0)
+    df["INSUMO_CATEGORIA"] = np.char.add("CATEGORIA ", rng.integers(0, args.categorias, len(df)).astype(str))
+
+    t0 = time.perf_counter()
+    cats, meses, _ = matriz_mensal(df, meses=args.meses)
+    t_matriz = time.perf_counter() - t0
+
+    linhas = []
+    for modelo in MODELOS:
+        t0 = time.perf_counter()
+        p = prever_categorias(df, modelo=modelo, meses_historico=args.meses)
+        linhas.append({"MODELO": modelo, "SEGUNDOS": round(time.perf_counter() - t0, 3),
+                       "CATEGORIAS": len(p.categorias), "LINHAS_PREVISAO": len(p.previsao)})
+
+    fmt = lambda n: f"{n:,}".replace(",", ".")
+    print(f"Base sintética: {fmt(args.linhas)} linhas, {fmt(len(cats))} categorias × {len(meses)} meses "
+          f"(matriz em {t_matriz:.3f}s; cada tempo abaixo inclui a matriz)")
+    print(pd.DataFrame(linhas).set_index("MODELO").to_string())
+
+if __name__ == "__main__":
+    main()
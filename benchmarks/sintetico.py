@@ -0,0 +1,63 @@
+# benchmarks/sintetico.py
+"""Base ERP sintética (mesmas colunas/tipos de carregar_bases) para benchmarks e testes."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_CATEGORIAS = ["CIMENTO", "AÇO", "TINTAS", "ELÉTRICA", "HIDRÁULICA",
+               "EPI", "MADEIRA", "CONSULTORIAS", "FERRAGENS", "AGREGADOS"]
+_UFS = ["RJ", "SP", "SC", "MG", "ES", "PR", "BA"]
+
+def _codigos_basicos() -> list[str]:
+    arq = Path(__file__).resolve().parent.parent / "MateriaisBasicos.xlsx"
+    try:
+        df = pd.read_excel(arq, sheet_name="Final", usecols=["Código"], dtype={"Código": "string"})
+        return df["Código"].dropna().drop_duplicates().tolist()
+    except Exception:
+        return [f"B.{i:04d}" for i in range(100)]
+
+def gerar_erp(n_linhas: int = 100_000, n_fornecedores: int = 2_000, n_itens: int = 5_000,
+              anos: int = 12, seed: int = 0, hoje: pd.Timestamp | None = None) -> pd.DataFrame:
+    """
+    ERP sintético determinístico (seed). Datas relativas a `hoje` (padrão: hoje) para que as
+    janelas "últimos N anos" dos indicadores tenham dados. ~4 linhas por OF.
+    """
+    r = np.random.default_rng(seed)
+    hoje = (hoje or pd.Timestamp.today()).normalize()
+    n_of = max(1, n_linhas // 4)
+
+    of = np.sort(r.integers(0, n_of, n_linhas))
+    dias_of = r.integers(0, 365 * anos, n_of)
+    forn_of = r.integers(0, n_fornecedores, n_of)
+    obra_of = r.integers(0, max(1, n_of // 50), n_of)
+    data = hoje - pd.to_timedelta(dias_of[of], unit="D")
+
+    basicos = _codigos_basicos()
+    item = r.integers(0, n_itens, n_linhas)
+    eh_bas = item % 7 == 0
+    cod = np.where(eh_bas, np.array(basicos, dtype=object)[item % len(basicos)],
+                   np.char.add("X.", np.char.zfill(item.astype(str), 5)).astype(object))
+
+    qtd = r.integers(1, 200, n_linhas).astype(float)
+    pu = np.round(r.lognormal(3.0, 1.0, n_linhas) * (1 + item % 10), 2)
+    forn = forn_of[of]
+
+    df = pd.DataFrame({
+        "REQ_DATA": data - pd.to_timedelta(r.integers(0, 90, n_linhas), unit="D"),
+        "OF_DATA": data,
+        "OF_CDG": (of + 10_000).astype(np.int64),
+        "EMPRD_DESC": np.char.add("OBRA ", obra_of[of].astype(str)),
+        "INSUMO_CDG": pd.Series(cod, dtype="string"),
+        "TIPO_MATERIAL": np.where(eh_bas, "BÁSICO", "ESPECÍFICO"),
+        "INSUMO_DESC": np.char.add("INSUMO ", item.astype(str)),
+        "INSUMO_CATEGORIA": np.array(_CATEGORIAS)[item % len(_CATEGORIAS)],
+        "FORNECEDOR_CDG": pd.Series(np.char.zfill(forn.astype(str), 6), dtype="string"),
+        "FORNECEDOR_DESC": np.char.add("FORNECEDOR ", forn.astype(str)),
+        "FORNECEDOR_UF": np.array(_UFS)[forn % len(_UFS)],
+        "QTD_PED": qtd,
+        "ITEM_PRCUNTPED": pu,
+        "PRCTTL_INSUMO": np.round(qtd * pu, 2),
+    })
+    df["TOTAL"] = df.groupby("OF_CDG")["PRCTTL_INSUMO"].transform("sum")
+    return df
@@ -0,0 +1,152 @@
+# comparativo_core.py
+"""
+KPIs do resumo por período, com comparação (período atual × período anterior).
+
+Os agregados são calculados uma vez por base: nº de OFs, soma dos totais das OFs, OFs com
+item básico, linhas com valor e soma dessas linhas, cadastros novos. Guardados como somas
+acumuladas por dia, qualquer período sai por diferença (O(1)), então os dois períodos da
+comparação vêm dos mesmos vetores. Fornecedores distintos vêm do índice de atividade
+(união dos bitmaps mensais + linhas das pontas).
+
+Os dois períodos têm a mesma extensão e terminam no mesmo dia do ano: "12m" são os 12
+meses móveis até hoje × os 12 meses imediatamente antes; "ytd" é 1º/jan até hoje × o
+mesmo intervalo do ano anterior.
+"""
+import numpy as np
+import pandas as pd
+
+import fornecedores_core as fc
+from distintos_core import IndiceAtividade, indice_atividade
+
+MODOS = {
+    "12m": "Últimos 12 meses × 12 meses anteriores",   # janelas móveis contíguas, terminando hoje
+    "ytd": "Ano até hoje × mesmo período do ano anterior",
+}
+
+KPIS = ["valor_medio_por_of", "pct_ofs_basicas", "empresas_que_venderam",
+        "cadastrados", "ticket_medio_item"]
+
+def _ordinal_dia(datas: pd.Series) -> np.ndarray:
+    """Dias desde 1970-01-01 (int64); NaT -> mínimo int64."""
+    dt = pd.to_datetime(datas, errors="coerce")
+    d = dt.to_numpy(dtype="datetime64[D]").astype(np.int64)
+    d[dt.isna().to_numpy()] = np.iinfo(np.int64).min
+    return d
+
+def _dia(ts: pd.Timestamp) -> int:
+    return int(np.datetime64(ts.to_datetime64(), "D").astype(np.int64))
+
+def _dia_ts(ordinal: int) -> pd.Timestamp:
+    return pd.Timestamp(np.datetime64(int(ordinal), "D"))
+
+class AgregadosMensais:
+    """Somas acumuladas diárias dos ingredientes dos KPIs do resumo."""
+
+    def __init__(self, df_erp: pd.DataFrame, df_forn: pd.DataFrame | None = None,
+                 indice_vendas: IndiceAtividade | None = None, hoje=None):
+        hoje = pd.Timestamp(hoje) if hoje is not None else pd.Timestamp.today()
+        self.hoje = hoje.normalize()
+        self.dia_hoje = _dia(self.hoje)
+        self.indice_vendas = indice_vendas if indice_vendas is not None else indice_atividade(
+            df_erp, col_id="FORNECEDOR_CDG", col_data="OF_DATA", col_valor="PRCTTL_INSUMO")
+
+        serie = {}
+        val = pd.to_numeric(df_erp["PRCTTL_INSUMO"], errors="coerce")
+        dia_linha = _ordinal_dia(df_erp["OF_DATA"])
+
+        # por OF: dia da 1ª data, total (como em valor_medio_por_of) e se tem item básico
+        bas = (df_erp["TIPO_MATERIAL"] == "BÁSICO").fillna(False) if "TIPO_MATERIAL" in df_erp.columns \
+            else pd.Series(False, index=df_erp.index)
+        of = pd.DataFrame({"OF": df_erp["OF_CDG"].to_numpy(), "DIA": dia_linha,
+                           "V": val.to_numpy(), "B": bas.to_numpy(dtype=bool)})
+        g = of.groupby("OF", sort=False).agg(DIA=("DIA", "min"), V=("V", "sum"), B=("B", "max"))
+        g = g[g["DIA"] > np.iinfo(np.int64).min]
+        serie["OFS"] = (g["DIA"].to_numpy(), np.ones(len(g)))
+        serie["SOMA_OF"] = (g["DIA"].to_numpy(), g["V"].round(2).to_numpy())
+        serie["OFS_BAS"] = (g["DIA"].to_numpy(), g["B"].to_numpy(dtype=float))
+
+        # linhas com valor > 0 (ticket médio por item)
+        pos = (val > 0).to_numpy() & (dia_linha > np.iinfo(np.int64).min)
+        serie["ITENS"] = (dia_linha[pos], np.ones(int(pos.sum())))
+        serie["SOMA_ITENS"] = (dia_linha[pos], val.to_numpy()[pos])
+
+        # cadastros: primeira data de cadastro por fornecedor
+        if df_forn is not None and not df_forn.empty:
+            try:
+                col_id = fc._col(df_forn, fc.CANDIDATOS_ID_CADASTRO)
+                col_dt = fc._col(df_forn, fc.CANDIDATOS_DATA_CADASTRO)
+                prim = pd.to_datetime(df_forn[col_dt], errors="coerce").groupby(df_forn[col_id]).min().dropna()
+                d = _ordinal_dia(prim)
+                serie["CADASTROS"] = (d, np.ones(len(d)))
+            except KeyError:
+                pass
+
+        todos = np.concatenate([d for d, _ in serie.values() if len(d)] or [np.array([self.dia_hoje])])
+        self.dia0 = int(min(todos.min(), self.dia_hoje))
+        n = int(max(todos.max(), self.dia_hoje)) - self.dia0 + 1
+        self.acum = {}
+        for nome, (d, v) in serie.items():
+            por_dia = np.bincount(d - self.dia0, weights=v, minlength=n) if len(d) else np.zeros(n)
+            self.acum[nome] = np.concatenate([[0.0], np.cumsum(por_dia)])
+        self.n_dias = n
+
+    def _soma(self, nome: str, ini: int, fim: int) -> float:
+        """Soma dos dias [ini, fim] (ordinais), fora da base conta zero."""
+        a = self.acum.get(nome)
+        if a is None:
+            return float("nan")
+        i0 = min(max(ini - self.dia0, 0), self.n_dias)
+        i1 = min(max(fim - self.dia0 + 1, 0), self.n_dias)
+        return float(a[i1] - a[i0]) if i1 > i0 else 0.0
+
+    def periodos(self, modo: str = "12m") -> tuple[tuple[int, int], tuple[int, int]]:
+        """
+        ((ini, fim) atual, (ini, fim) anterior) em dias ordinais, inclusivos. O atual vai até
+        hoje; o anterior, até o mesmo dia um ano antes (29/02 -> 28/02).
+        "12m": (hoje - 1 ano, hoje] × (hoje - 2 anos, hoje - 1 ano] — contíguos, sem buraco.
+        """
+        h = self.hoje
+        um_ano, dia = pd.DateOffset(years=1), pd.Timedelta(days=1)
+        if modo == "ytd":
+            ini = h.replace(month=1, day=1)
+            return (_dia(ini), _dia(h)), (_dia(ini - um_ano), _dia(h - um_ano))
+        if modo == "12m":
+            h1, h2 = h - um_ano, h - pd.DateOffset(years=2)
+            return (_dia(h1 + dia), _dia(h)), (_dia(h2 + dia), _dia(h1))
+        raise ValueError(f"Modo desconhecido: {modo!r} (use {', '.join(MODOS)}).")
+
+    def kpis(self, ini: int, fim: int) -> dict:
+        ofs = self._soma("OFS", ini, fim)
+        itens = self._soma("ITENS", ini, fim)
+        return {
+            "valor_medio_por_of": self._soma("SOMA_OF", ini, fim) / ofs if ofs else 0.0,
+            "pct_ofs_basicas": self._soma("OFS_BAS", ini, fim) / ofs * 100.0 if ofs else 0.0,
+            "empresas_que_venderam": self.indice_vendas.contar(_dia_ts(ini), _dia_ts(fim + 1)),
+            "cadastrados": int(self._soma("CADASTROS", ini, fim)) if "CADASTROS" in self.acum else None,
+            "ticket_medio_item": self._soma("SOMA_ITENS", ini, fim) / itens if itens else 0.0,
+        }
+
+    def comparar(self, modo: str = "12m") -> pd.DataFrame:
+        """
+        KPI | ATUAL | ANTERIOR | VAR_ABS | VAR_%  (+ attrs com os rótulos dos períodos).
+        """
+        (a0, a1), (b0, b1) = self.periodos(modo)
+        atual, ant = self.kpis(a0, a1), self.kpis(b0, b1)
+        linhas = []
+        for k in KPIS:
+            x, y = atual[k], ant[k]
+            if x is None or y is None:
+                continue
+            linhas.append({
+                "KPI": k, "ATUAL": x, "ANTERIOR": y, "VAR_ABS": x - y,
+                "VAR_%": ((x - y) / y * 100.0) if y else None,
+            })
+        out = pd.DataFrame(linhas)
+        fmt = lambda i, f: f"{_dia_ts(i):%d/%m/%Y}–{_dia_ts(f):%d/%m/%Y}"
+        out.attrs["periodo_atual"] = fmt(a0, a1)
+        out.attrs["periodo_anterior"] = fmt(b0, b1)
+        return out
+
+def agregados_mensais(df_erp: pd.DataFrame, df_forn: pd.DataFrame | None = None,
+                      indice_vendas: IndiceAtividade | None = None, hoje=None) -> AgregadosMensais:
+    return AgregadosMensais(df_erp, df_forn, indice_vendas=indice_vendas, hoje=hoje)
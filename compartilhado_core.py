@@ -0,0 +1,92 @@
+# compartilhado_core.py
+"""
+Base tipada publicada uma única vez em memória compartilhada (Arrow IPC mapeado).
+
+O primeiro processo que carrega as planilhas grava o DataFrame tipado num arquivo Arrow IPC
+(sem compressão) em /dev/shm — ou no diretório temporário, se não houver — com o nome
+derivado da impressão digital das bases. Os demais processos/réplicas só mapeiam o arquivo:
+a leitura é imediata, as colunas de texto e as numéricas sem nulos apontam direto para as
+páginas compartilhadas (somente leitura) e não há nova leitura do xlsx.
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # dependência opcional (instalada com o Streamlit)
+    pa = None
+
+_PREFIXO = "indicadores_suprimentos"
+
+def diretorio_compartilhado() -> Path:
+    """INDICADORES_SHM_DIR, senão /dev/shm (tmpfs), senão o temporário do sistema."""
+    d = os.environ.get("INDICADORES_SHM_DIR")
+    if d:
+        return Path(d)
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return shm
+    return Path(tempfile.gettempdir())
+
+def caminho_publicado(nome: str, impressao: str, diretorio: Path | None = None) -> Path:
+    return (diretorio or diretorio_compartilhado()) / f"{_PREFIXO}-{nome}-{impressao}.arrow"
+
+def publicar(df: pd.DataFrame, nome: str, impressao: str, diretorio: Path | None = None) -> Path:
+    """
+    Grava o DataFrame como Arrow IPC (arquivo temporário + troca atômica) e remove as
+    publicações antigas do mesmo nome. Quem já as mapeou continua lendo normalmente.
+    """
+    destino = caminho_publicado(nome, impressao, diretorio)
+    if destino.exists():
+        return destino
+    tab = pa.Table.from_pandas(df, preserve_index=False)
+    tmp = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), "wb") as f:
+        with pa.ipc.new_file(f, tab.schema) as w:
+            w.write_table(tab, max_chunksize=250_000)
+    tmp.replace(destino)
+    for antigo in destino.parent.glob(f"{_PREFIXO}-{nome}-*.arrow"):
+        if antigo != destino:
+            try:
+                antigo.unlink()
+            except OSError:
+                pass
+    return destino
+
+def anexar(nome: str, impressao: str, diretorio: Path | None = None) -> pd.DataFrame | None:
+    """
+    Mapeia a publicação (somente leitura) e devolve o DataFrame sem copiar os dados
+    sempre que o tipo permite. None se ainda não foi publicada.
+    """
+    destino = caminho_publicado(nome, impressao, diretorio)
+    try:
+        fonte = pa.memory_map(str(destino), "r")
+    except (FileNotFoundError, OSError):
+        return None
+    tab = pa.ipc.open_file(fonte).read_all()
+    # split_blocks: uma coluna por bloco (sem consolidar numéricos numa cópia)
+    return tab.to_pandas(split_blocks=True)
+
+def base_compartilhada(nome: str, impressao: str, construir: Callable[[], pd.DataFrame],
+                       diretorio: Path | None = None) -> pd.DataFrame:
+    """
+    Devolve a base publicada para esta impressão; se ainda não existir, constrói,
+    publica e devolve a versão mapeada (a mesma que os outros processos verão).
+    Sem pyarrow, apenas constrói.
+    """
+    if pa is None:
+        return construir()
+    df = anexar(nome, impressao, diretorio)
+    if df is not None:
+        return df
+    df = construir()
+    try:
+        publicar(df, nome, impressao, diretorio)
+    except OSError:
+        return df
+    mapeada = anexar(nome, impressao, diretorio)
+    return mapeada if mapeada is not None else df
@@ -0,0 +1,188 @@
+# coortes_core.py
+"""
+Coortes e churn de fornecedores sobre uma matriz de bits fornecedor × ano.
+
+Os IDs do ERP (FORNECEDOR_CDG, com zeros à esquerda) e do cadastro (FORN_CNPJ) são
+normalizados e codificados num único dicionário. Cada fornecedor vira um inteiro de 64 bits
+em que o bit j indica atividade (ao menos uma OF com valor > 0) no ano ano0 + j. A partir
+daí tudo é contagem vetorizada:
+  - coorte = ano do cadastro ou ano da primeira compra;
+  - retenção: quantos de cada coorte estão ativos k anos depois;
+  - churn no ano Y: ativos em Y-1 que não compraram em Y (e novos/reativados/retidos).
+"""
+import numpy as np
+import pandas as pd
+
+import fornecedores_core as fc
+from distintos_core import _NULOS
+
+COORTES = {
+    "cadastro": "Ano de cadastro",
+    "primeira_compra": "Ano da primeira compra",
+}
+
+def normalizar_ids(s: pd.Series) -> pd.Series:
+    """Texto sem espaços e sem zeros à esquerda ("000123" e 123 viram "123"); vazios -> nulo."""
+    t = s.astype("string").str.strip().replace(_NULOS)
+    t = t.str.replace(r"\.0$", "", regex=True)
+    z = t.str.lstrip("0")
+    return z.mask(z == "", "0").where(t.notna())
+
+class CoortesFornecedores:
+    """Máscara de anos ativos por fornecedor + ano de cadastro e de primeira compra."""
+
+    def __init__(self, df_erp: pd.DataFrame, df_forn: pd.DataFrame | None = None,
+                 col_id: str = "FORNECEDOR_CDG", col_data: str = "OF_DATA", col_valor: str = "PRCTTL_INSUMO",
+                 hoje=None):
+        hoje = pd.Timestamp(hoje) if hoje is not None else pd.Timestamp.today()
+        self.ano_corrente = int(hoje.year)
+
+        # atividade no ERP (linhas com valor > 0)
+        erp = df_erp
+        if col_valor in erp.columns:
+            erp = erp[pd.to_numeric(erp[col_valor], errors="coerce") > 0]
+        dt = pd.to_datetime(erp[col_data], errors="coerce")
+        id_erp = normalizar_ids(erp[col_id])
+        ok = dt.notna().to_numpy() & id_erp.notna().to_numpy()
+        id_erp, ano_erp = id_erp[ok], dt[ok].dt.year.to_numpy()
+
+        # cadastro: primeira data por fornecedor
+        id_cad, ano_cad = pd.Series([], dtype="string"), np.empty(0, dtype=np.int64)
+        if df_forn is not None and not df_forn.empty:
+            try:
+                c_id = fc._col(df_forn, fc.CANDIDATOS_ID_CADASTRO)
+                c_dt = fc._col(df_forn, fc.CANDIDATOS_DATA_CADASTRO)
+                prim = pd.to_datetime(df_forn[c_dt], errors="coerce").groupby(normalizar_ids(df_forn[c_id])).min().dropna()
+                id_cad, ano_cad = pd.Series(prim.index, dtype="string"), prim.dt.year.to_numpy()
+            except KeyError:
+                pass
+
+        # um dicionário para as duas fontes
+        cod, self.ids = pd.factorize(pd.concat([id_erp, id_cad], ignore_index=True))
+        cod_erp, cod_cad = cod[:len(id_erp)], cod[len(id_erp):]
+        n = len(self.ids)
+
+        anos_todos = np.concatenate([ano_erp, ano_cad]).astype(np.int64)
+        self.ano0 = int(anos_todos.min()) if anos_todos.size else self.ano_corrente
+        self.n_anos = (max(int(anos_todos.max()), self.ano_corrente) if anos_todos.size else self.ano_corrente) - self.ano0 + 1
+        if self.n_anos > 64:
+            raise ValueError("Histórico com mais de 64 anos não cabe na máscara de bits.")
+
+        self.mascara = np.zeros(n, dtype=np.uint64)
+        np.bitwise_or.at(self.mascara, cod_erp, np.left_shift(np.uint64(1), (ano_erp - self.ano0).astype(np.uint64)))
+
+        self.ano_cadastro = np.full(n, -1, dtype=np.int64)
+        self.ano_cadastro[cod_cad] = ano_cad - self.ano0
+        # primeira compra = bit menos significativo ligado
+        m = self.mascara
+        menor_bit = m & (~m + np.uint64(1))
+        self.ano_primeira_compra = np.where(m > 0, np.log2(np.maximum(menor_bit, 1).astype(np.float64)).astype(np.int64), -1)
+
+    def anos(self) -> np.ndarray:
+        return np.arange(self.ano0, self.ano0 + self.n_anos)
+
+    def matriz(self) -> np.ndarray:
+        """Matriz booleana fornecedor × ano (expande os bits)."""
+        return ((self.mascara[:, None] >> np.arange(self.n_anos, dtype=np.uint64)) & np.uint64(1)).astype(bool)
+
+    def _coorte(self, coorte: str) -> np.ndarray:
+        if coorte == "cadastro":
+            return self.ano_cadastro
+        if coorte == "primeira_compra":
+            return self.ano_primeira_compra
+        raise ValueError(f"Coorte desconhecida: {coorte!r} (use {', '.join(COORTES)}).")
+
+    def _ultimo_ano(self, incluir_ano_corrente: bool) -> int:
+        """Índice do último ano considerado (o corrente está incompleto)."""
+        return self.ano_corrente - self.ano0 - (0 if incluir_ano_corrente else 1)
+
+    def retencao(self, coorte: str = "cadastro", percentual: bool = True,
+                 desde: int | None = None, incluir_ano_corrente: bool = False) -> pd.DataFrame:
+        """
+        Linhas = ano da coorte; colunas = anos desde a coorte (0, 1, 2...); valor = fornecedores
+        da coorte ativos naquele ano (em % do tamanho da coorte, se percentual=True).
+        Coluna TAMANHO = fornecedores na coorte.
+        """
+        c = self._coorte(coorte)
+        T = self._ultimo_ano(incluir_ano_corrente) + 1
+        sel = (c >= 0) & (c < T)
+        if desde is not None:
+            sel &= c >= (int(desde) - self.ano0)
+        if not sel.any():
+            return pd.DataFrame()
+        c = c[sel]
+        B = self.matriz()[sel][:, :T]
+        linhas, anos = np.nonzero(B)
+        desloc = anos - c[linhas]
+        ok = desloc >= 0
+        tab = np.bincount(c[linhas[ok]] * T + desloc[ok], minlength=T * T).reshape(T, T).astype(float)
+        tamanho = np.bincount(c, minlength=T)
+        presentes = np.unique(c)
+        tab, tamanho = tab[presentes], tamanho[presentes]
+        # células além do último ano observado ficam vazias
+        max_desloc = (T - 1) - presentes
+        tab[np.arange(T)[None, :] > max_desloc[:, None]] = np.nan
+        if percentual:
+            tab = tab / np.maximum(tamanho, 1)[:, None] * 100.0
+        out = pd.DataFrame(tab, index=pd.Index(presentes + self.ano0, name="COORTE"), columns=range(T))
+        out = out.loc[:, out.notna().any(axis=0)]
+        out.insert(0, "TAMANHO", tamanho)
+        return out
+
+    def churn(self, incluir_ano_corrente: bool = False) -> pd.DataFrame:
+        """
+        ANO | ATIVOS | ATIVOS_ANO_ANTERIOR | RETIDOS | PERDIDOS | NOVOS | REATIVADOS | CHURN_% | RETENCAO_%
+        (NOVOS = primeira compra no ano; REATIVADOS = compraram antes, mas não no ano anterior).
+        """
+        T = self._ultimo_ano(incluir_ano_corrente) + 1
+        m = self.mascara
+        linhas = []
+        for j in range(1, T):
+            cur = (m >> np.uint64(j)) & np.uint64(1) == 1
+            prev = (m >> np.uint64(j - 1)) & np.uint64(1) == 1
+            antes = (m & ((np.uint64(1) << np.uint64(j - 1)) - np.uint64(1))) > 0
+            n_prev, ret = int(prev.sum()), int((cur & prev).sum())
+            linhas.append({
+                "ANO": self.ano0 + j,
+                "ATIVOS": int(cur.sum()),
+                "ATIVOS_ANO_ANTERIOR": n_prev,
+                "RETIDOS": ret,
+                "PERDIDOS": n_prev - ret,
+                "NOVOS": int((cur & ~prev & ~antes).sum()),
+                "REATIVADOS": int((cur & ~prev & antes).sum()),
+                "CHURN_%": ((n_prev - ret) / n_prev * 100.0) if n_prev else np.nan,
+                "RETENCAO_%": (ret / n_prev * 100.0) if n_prev else np.nan,
+            })
+        out = pd.DataFrame(linhas)
+        return out[out["ATIVOS"] + out["ATIVOS_ANO_ANTERIOR"] > 0].reset_index(drop=True) if not out.empty else out
+
+    def churn_por_coorte(self, coorte: str = "cadastro", incluir_ano_corrente: bool = False) -> pd.DataFrame:
+        """
+        Linhas = coorte; colunas = ano Y; valor = % dos ativos da coorte em Y-1 que não
+        compraram em Y (só anos a partir da coorte).
+        """
+        c = self._coorte(coorte)
+        T = self._ultimo_ano(incluir_ano_corrente) + 1
+        sel = (c >= 0) & (c < T)
+        if not sel.any() or T < 2:
+            return pd.DataFrame()
+        c = c[sel]
+        B = self.matriz()[sel][:, :T]
+        # só transições a partir do ano da coorte (Y-1 >= coorte)
+        desde_coorte = np.arange(T - 1)[None, :] >= c[:, None]
+        prev = B[:, :-1] & desde_coorte
+        perdido = prev & ~B[:, 1:]
+        k = T - 1
+        def _por_coorte(M):
+            r, y = np.nonzero(M)
+            return np.bincount(c[r] * k + y, minlength=T * k).reshape(T, k).astype(float)
+        n_prev, n_perd = _por_coorte(prev), _por_coorte(perdido)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tab = np.where(n_prev > 0, n_perd / n_prev * 100.0, np.nan)
+        presentes = np.unique(c)
+        out = pd.DataFrame(tab[presentes], index=pd.Index(presentes + self.ano0, name="COORTE"),
+                           columns=np.arange(self.ano0 + 1, self.ano0 + T))
+        return out.loc[:, out.notna().any(axis=0)].dropna(how="all")
+
+def coortes_fornecedores(df_erp: pd.DataFrame, df_forn: pd.DataFrame | None = None, **kw) -> CoortesFornecedores:
+    return CoortesFornecedores(df_erp, df_forn, **kw)
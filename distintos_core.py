@@ -0,0 +1,204 @@
+# distintos_core.py
+import numpy as np
+import pandas as pd
+
+# ---------- Codificação ----------
+_NULOS = {"": pd.NA, "nan": pd.NA, "None": pd.NA}
+
+def codificar_ids(s: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """
+    Codifica IDs (dicionário) para inteiros 0..K-1.
+    Aplica a mesma limpeza usada nas contagens (strip, ''/'nan'/'None' -> nulo).
+    Retorna (codigos, categorias); nulos recebem código -1.
+    """
+    limpo = s.astype("string").str.strip().replace(_NULOS)
+    codigos, categorias = pd.factorize(limpo, use_na_sentinel=True)
+    return codigos.astype(np.int64), pd.Index(categorias)
+
+# ---------- Bitmaps ----------
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def _contar_bits(bitmap: np.ndarray) -> int:
+    return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+def _bitmap(codigos: np.ndarray, n_ids: int) -> np.ndarray:
+    bits = np.zeros(n_ids, dtype=bool)
+    bits[codigos] = True
+    return np.packbits(bits)
+
+# ---------- HyperLogLog ----------
+_HLL_P = 12
+_HLL_M = 1 << _HLL_P
+
+def _hash64(codigos: np.ndarray) -> np.ndarray:
+    # splitmix64
+    with np.errstate(over="ignore"):
+        z = codigos.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+def _hll_registros(codigos: np.ndarray) -> np.ndarray:
+    reg = np.zeros(_HLL_M, dtype=np.uint8)
+    if codigos.size == 0:
+        return reg
+    h = _hash64(codigos)
+    idx = (h >> np.uint64(64 - _HLL_P)).astype(np.int64)
+    resto = h & np.uint64((1 << (64 - _HLL_P)) - 1)   # 52 bits: exato em float64
+    _, bits = np.frexp(resto.astype(np.float64))
+    rho = ((64 - _HLL_P) - bits + 1).astype(np.uint8)
+    np.maximum.at(reg, idx, rho)
+    return reg
+
+def _hll_estimar(reg: np.ndarray) -> int:
+    m = float(_HLL_M)
+    alpha = 0.7213 / (1.0 + 1.079 / m)
+    est = alpha * m * m / float(np.sum(np.ldexp(1.0, -reg.astype(np.int64))))
+    zeros = int((reg == 0).sum())
+    if est <= 2.5 * m and zeros:
+        est = m * np.log(m / zeros)
+    return int(round(est))
+
+# ---------- Índice de atividade ----------
+class IndiceAtividade:
+    """
+    Fornecedores ativos por mês: IDs codificados + um bitmap por mês
+    (e, opcionalmente, registros HyperLogLog por mês).
+    Contagem distinta de qualquer janela = união dos meses inteiros
+    + linhas dos meses de borda (parciais).
+    """
+
+    def __init__(self, codigos: np.ndarray, datas: pd.Series, categorias: pd.Index, hll: bool = False):
+        dt = pd.to_datetime(datas, errors="coerce")
+        ok = (codigos >= 0) & dt.notna().to_numpy()
+        dias = dt.to_numpy(dtype="datetime64[D]")[ok].astype(np.int64)
+        cod = codigos[ok]
+
+        ordem = np.argsort(dias, kind="stable")
+        self.dias = dias[ordem]
+        self.codigos = cod[ordem]
+        self.categorias = categorias
+        self.n_ids = len(categorias)
+
+        if self.dias.size == 0:
+            self.mes0 = 0
+            self.inicio_mes = np.zeros(1, dtype=np.int64)
+            self.bitmaps = np.zeros((0, (self.n_ids + 7) // 8), dtype=np.uint8)
+            self.hll = np.zeros((0, _HLL_M), dtype=np.uint8) if hll else None
+            return
+
+        meses = self.dias.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        self.mes0 = int(meses[0])
+        n_meses = int(meses[-1]) - self.mes0 + 1
+        # fronteiras (em linhas) de cada mês dentro do vetor ordenado
+        self.inicio_mes = np.searchsorted(meses, np.arange(self.mes0, self.mes0 + n_meses + 1))
+
+        self.bitmaps = np.zeros((n_meses, (self.n_ids + 7) // 8), dtype=np.uint8)
+        self.hll = np.zeros((n_meses, _HLL_M), dtype=np.uint8) if hll else None
+        for i in range(n_meses):
+            fatia = self.codigos[self.inicio_mes[i]:self.inicio_mes[i + 1]]
+            if fatia.size:
+                self.bitmaps[i] = _bitmap(fatia, self.n_ids)
+                if hll:
+                    self.hll[i] = _hll_registros(np.unique(fatia))
+
+    @property
+    def n_meses(self) -> int:
+        return int(self.bitmaps.shape[0])
+
+    def meses(self) -> pd.PeriodIndex:
+        return pd.PeriodIndex(
+            pd.to_datetime(np.arange(self.mes0, self.mes0 + self.n_meses).astype("datetime64[M]")),
+            freq="M",
+        )
+
+    def codigos_mes(self, i: int) -> np.ndarray:
+        """Códigos (com repetição) das linhas do i-ésimo mês do índice."""
+        return self.codigos[self.inicio_mes[i]:self.inicio_mes[i + 1]]
+
+    def _dia(self, ts) -> int | None:
+        # resolução diária: limites com horário arredondam para o dia seguinte,
+        # como em `OF_DATA >= pd.Timestamp.today() - ...` sobre datas sem hora
+        if ts is None:
+            return None
+        ts = pd.Timestamp(ts).ceil("D")
+        return int(np.datetime64(ts.to_datetime64(), "D").astype(np.int64))
+
+    def _mes_do_dia(self, dia: int) -> int:
+        return int(np.datetime64(dia, "D").astype("datetime64[M]").astype(np.int64))
+
+    def _primeiro_dia_mes(self, mes: int) -> int:
+        return int(np.datetime64(mes, "M").astype("datetime64[D]").astype(np.int64))
+
+    def _fatiar(self, inicio, fim):
+        """Separa [inicio, fim) em meses inteiros (faixa de índices) + linhas parciais."""
+        if self.n_meses == 0:
+            return 0, 0, np.empty(0, dtype=np.int64)
+        d0 = self._dia(inicio)
+        d1 = self._dia(fim)
+        lo = 0 if d0 is None else int(np.searchsorted(self.dias, d0, side="left"))
+        hi = self.dias.size if d1 is None else int(np.searchsorted(self.dias, d1, side="left"))
+        if hi <= lo:
+            return 0, 0, np.empty(0, dtype=np.int64)
+
+        # meses inteiramente contidos na janela
+        m0 = 0
+        if d0 is not None:
+            m = self._mes_do_dia(d0) - self.mes0
+            m0 = max(0, m + (0 if d0 == self._primeiro_dia_mes(m + self.mes0) else 1))
+        m1 = self.n_meses
+        if d1 is not None:
+            m1 = min(self.n_meses, max(0, self._mes_do_dia(d1) - self.mes0))
+        if m1 <= m0:
+            return 0, 0, self.codigos[lo:hi]
+
+        parciais = np.concatenate([
+            self.codigos[lo:self.inicio_mes[m0]],
+            self.codigos[self.inicio_mes[m1]:hi],
+        ])
+        return m0, m1, parciais
+
+    def contar(self, inicio=None, fim=None, aproximado: bool = False) -> int:
+        """Fornecedores distintos com atividade em [inicio, fim). None = sem limite."""
+        m0, m1, parciais = self._fatiar(inicio, fim)
+        if aproximado:
+            if self.hll is None:
+                raise ValueError("Índice construído sem HyperLogLog (use hll=True).")
+            reg = self.hll[m0:m1].max(axis=0) if m1 > m0 else np.zeros(_HLL_M, dtype=np.uint8)
+            if parciais.size:
+                reg = np.maximum(reg, _hll_registros(np.unique(parciais)))
+            return _hll_estimar(reg)
+
+        if m1 > m0:
+            uniao = np.bitwise_or.reduce(self.bitmaps[m0:m1], axis=0)
+        else:
+            uniao = np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+        if parciais.size:
+            uniao = uniao | _bitmap(parciais, self.n_ids)
+        return _contar_bits(uniao)
+
+    def ids(self, inicio=None, fim=None) -> pd.Index:
+        """IDs (valores originais) ativos em [inicio, fim)."""
+        m0, m1, parciais = self._fatiar(inicio, fim)
+        bits = np.zeros(self.n_ids, dtype=bool)
+        if m1 > m0:
+            uniao = np.bitwise_or.reduce(self.bitmaps[m0:m1], axis=0)
+            bits |= np.unpackbits(uniao, count=self.n_ids).astype(bool)
+        bits[parciais] = True
+        return self.categorias[bits]
+
+def indice_atividade(df: pd.DataFrame,
+                     col_id: str = "FORNECEDOR_CDG",
+                     col_data: str = "OF_DATA",
+                     col_valor: str | None = None,
+                     hll: bool = False) -> IndiceAtividade:
+    """
+    Constrói o índice de atividade a partir do ERP.
+    Se col_valor for informado, considera só linhas com valor > 0.
+    """
+    base = df
+    if col_valor and col_valor in df.columns:
+        v = pd.to_numeric(df[col_valor], errors="coerce").fillna(0)
+        base = df[v > 0]
+    codigos, categorias = codificar_ids(base[col_id])
+    return IndiceAtividade(codigos, base[col_data], categorias, hll=hll)
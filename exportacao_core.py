@@ -0,0 +1,241 @@
+# exportacao_core.py
+"""
+Downloads sem manter cópias das bases na memória do processo entre cliques.
+
+- Arquivos do repositório: mapeados com mmap (somente leitura). As páginas vêm do cache
+  do sistema operacional e são compartilhadas entre sessões; nada é copiado até o clique.
+- Exportações: geradas sob demanda a partir do DataFrame já carregado, bloco a bloco,
+  num arquivo temporário.
+
+No clique, o conteúdo inteiro ainda vira um único `bytes` (st.download_button não aceita
+um fluxo): o ganho é não ter essa cópia em memória a cada execução do script.
+"""
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # dependência opcional (instalada com o Streamlit)
+    pa = None
+
+_BLOCO_LINHAS = 50_000
+
+# ---------- Arquivos mapeados ----------
+class ArquivoMapeado:
+    """
+    Arquivo mapeado em memória, somente leitura.
+    Se o arquivo for trocado no disco (replace atômico), o mapa continua válido
+    sobre o conteúdo antigo até ser fechado.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self.tamanho = os.fstat(f.fileno()).st_size
+            # mmap não aceita arquivo vazio
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.tamanho else None
+
+    def ler(self) -> bytes:
+        """Conteúdo inteiro numa cópia `bytes` (feita só quando chamado — p.ex. no clique)."""
+        return self._mm[:] if self._mm is not None else b""
+
+    def fechar(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+def download_sob_demanda(path: Path | str, mapa: ArquivoMapeado | None = None) -> Callable[[], bytes]:
+    """Callable para st.download_button(data=...): o arquivo só é lido (inteiro) no clique."""
+    def _gerar() -> bytes:
+        return (mapa or ArquivoMapeado(path)).ler()
+    return _gerar
+
+# ---------- Exportação em blocos ----------
+def _tabela_csv(bloco: pd.DataFrame, decimal: str) -> "pa.Table":
+    """Bloco como tabela Arrow já no formato brasileiro (datas dd/mm/aaaa, vírgula decimal)."""
+    tab = pa.Table.from_pandas(bloco, preserve_index=False)
+    cols = []
+    for col in tab.columns:
+        if pa.types.is_timestamp(col.type) or pa.types.is_date(col.type):
+            col = pc.strftime(col, format="%d/%m/%Y")
+        elif pa.types.is_floating(col.type) and decimal != ".":
+            col = pc.replace_substring(pc.cast(col, pa.string()), ".", decimal)
+        cols.append(col)
+    return pa.table(cols, names=tab.column_names)
+
+def blocos_csv(df: pd.DataFrame, linhas: int = _BLOCO_LINHAS, sep: str = ";",
+               decimal: str = ",", encoding: str = "utf-8-sig") -> Iterator[bytes]:
+    """
+    CSV em blocos de `linhas` (cabeçalho e BOM só no primeiro).
+    Com pyarrow (vem com o Streamlit) a formatação e a escrita são colunares;
+    sem ele, cai no DataFrame.to_csv.
+    """
+    n = len(df)
+    for i in range(0, max(n, 1), linhas):
+        bloco = df.iloc[i:i + linhas]
+        if pa is None:
+            txt = bloco.to_csv(index=False, header=(i == 0), sep=sep,
+                               decimal=decimal, date_format="%d/%m/%Y")
+            yield txt.encode(encoding if i == 0 else encoding.replace("-sig", ""))
+            continue
+        buf = pa.BufferOutputStream()
+        pa_csv.write_csv(_tabela_csv(bloco, decimal), buf,
+                         pa_csv.WriteOptions(include_header=(i == 0), delimiter=sep,
+                                             quoting_style="needed"))
+        dados = buf.getvalue().to_pybytes()
+        if encoding.lower() in ("utf-8", "utf-8-sig", "utf8"):
+            yield (b"\xef\xbb\xbf" + dados) if (i == 0 and encoding.lower() == "utf-8-sig") else dados
+        else:
+            yield dados.decode("utf-8").encode(encoding)
+
+def gravar_blocos(blocos: Iterator[bytes], destino=None):
+    """
+    Grava os blocos num arquivo (padrão: temporário anônimo) e devolve o arquivo
+    posicionado no início — pronto para st.download_button ou para copiar em blocos.
+    """
+    f = destino if destino is not None else tempfile.TemporaryFile()
+    for b in blocos:
+        f.write(b)
+    f.seek(0)
+    return f
+
+# ---------- Recortes filtrados ----------
+FORMATOS = {
+    "xlsx":    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv":     "text/csv",
+    "parquet": "application/octet-stream",
+}
+
+def _em(df: pd.DataFrame, col: str, valores) -> np.ndarray:
+    if not valores or col not in df.columns:
+        return np.ones(len(df), dtype=bool)
+    return df[col].isin(list(valores)).to_numpy(dtype=bool)
+
+def mascara_erp(df: pd.DataFrame,
+                inicio=None, fim=None,
+                ufs=None, categorias=None, fornecedores=None, tipos=None,
+                col_data: str = "OF_DATA") -> np.ndarray:
+    """
+    Máscara booleana do recorte: OF_DATA em [inicio, fim] (dias inteiros), UF, categoria,
+    fornecedor (FORNECEDOR_DESC) e TIPO_MATERIAL. Filtros vazios/None não restringem.
+    Serve para contar linhas (m.sum()) sem copiar a base.
+    """
+    m = np.ones(len(df), dtype=bool)
+    if (inicio is not None or fim is not None) and col_data in df.columns:
+        dt = df[col_data]
+        if inicio is not None:
+            m &= (dt >= pd.Timestamp(inicio).normalize()).to_numpy(dtype=bool)
+        if fim is not None:
+            m &= (dt < pd.Timestamp(fim).normalize() + pd.Timedelta(days=1)).to_numpy(dtype=bool)
+    m &= _em(df, "FORNECEDOR_UF", ufs)
+    m &= _em(df, "INSUMO_CATEGORIA", categorias)
+    m &= _em(df, "FORNECEDOR_DESC", fornecedores)
+    m &= _em(df, "TIPO_MATERIAL", tipos)
+    return m
+
+def filtrar_erp(df: pd.DataFrame, **filtros) -> pd.DataFrame:
+    """Recorte do ERP pelos filtros de mascara_erp; a cópia acontece uma única vez, na seleção final."""
+    m = mascara_erp(df, **filtros)
+    return df if m.all() else df[m]
+
+_MAX_LINHAS_XLSX = 1_048_575   # linhas de dados por planilha (fora o cabeçalho)
+_EPOCA_EXCEL = np.datetime64("1899-12-30", "ns")
+
+def _colunas_xlsx(bloco: pd.DataFrame) -> list[tuple[str, np.ndarray, np.ndarray]]:
+    """
+    Cada coluna do bloco como (tipo, valores, nulos): 'n' números (datas já convertidas
+    para o serial do Excel, vetorizado) ou 's' textos. Nulos viram célula vazia.
+    """
+    cols = []
+    for c in bloco.columns:
+        s = bloco[c]
+        nulos = pd.isna(s).to_numpy()
+        if pd.api.types.is_datetime64_any_dtype(s):
+            ns = s.to_numpy(dtype="datetime64[ns]")
+            v = (ns - _EPOCA_EXCEL) / np.timedelta64(1, "D")
+            cols.append(("n", v.tolist(), nulos))
+        elif pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            cols.append(("n", s.to_numpy(dtype="float64", na_value=np.nan).tolist(), nulos))
+        else:
+            cols.append(("s", s.astype(object).to_numpy(copy=True).tolist(), nulos))
+    return cols
+
+def gravar_xlsx(df: pd.DataFrame, destino, aba: str = "Recorte", linhas: int = _BLOCO_LINHAS):
+    """
+    XLSX com xlsxwriter em modo constant_memory: cada linha vai para o disco assim que
+    escrita, então a memória não cresce com o número de linhas. Escrita tipada por coluna
+    (write_number/write_string), sem a detecção de tipo célula a célula do write().
+    """
+    import xlsxwriter
+
+    if len(df) > _MAX_LINHAS_XLSX:
+        raise ValueError(f"Recorte com {len(df):,} linhas excede o limite do Excel; use CSV ou Parquet.")
+    wb = xlsxwriter.Workbook(destino, {
+        "constant_memory": True, "in_memory": False,
+        "strings_to_numbers": False, "strings_to_formulas": False, "strings_to_urls": False,
+    })
+    ws = wb.add_worksheet(aba)
+    fmt_data = wb.add_format({"num_format": "dd/mm/yyyy"})
+    cab = wb.add_format({"bold": True})
+    ws.write_row(0, 0, [str(c) for c in df.columns], cab)
+    formatos = []
+    for j, c in enumerate(df.columns):
+        eh_data = pd.api.types.is_datetime64_any_dtype(df[c])
+        formatos.append(fmt_data if eh_data else None)
+        if eh_data:
+            ws.set_column(j, j, 11)
+
+    num, txt = ws.write_number, ws.write_string
+    lin = 1
+    for i in range(0, len(df), linhas):
+        cols = _colunas_xlsx(df.iloc[i:i + linhas])
+        n = len(cols[0][1]) if cols else 0
+        for k in range(n):
+            for j, (tipo, v, nulos) in enumerate(cols):
+                if nulos[k]:
+                    continue
+                if tipo == "n":
+                    num(lin, j, v[k], formatos[j])
+                else:
+                    txt(lin, j, str(v[k]))
+            lin += 1
+    wb.close()
+
+def gravar_parquet(df: pd.DataFrame, destino, linhas: int = 250_000):
+    """Parquet em grupos de linhas (pyarrow), sem converter a base inteira de uma vez."""
+    import pyarrow.parquet as pq
+
+    esquema = pa.Schema.from_pandas(df.head(0), preserve_index=False)
+    with pq.ParquetWriter(destino, esquema) as w:
+        for i in range(0, max(len(df), 1), linhas):
+            w.write_table(pa.Table.from_pandas(df.iloc[i:i + linhas], schema=esquema, preserve_index=False))
+
+def exportar(df: pd.DataFrame, formato: str = "xlsx", destino=None):
+    """
+    Gera o recorte no formato pedido ('xlsx', 'csv' ou 'parquet') num arquivo
+    (padrão: temporário anônimo) e devolve o arquivo posicionado no início.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato não suportado: {formato!r} (use {', '.join(FORMATOS)}).")
+    f = destino if destino is not None else tempfile.TemporaryFile()
+    if formato == "csv":
+        gravar_blocos(blocos_csv(df), f)
+    elif formato == "parquet":
+        gravar_parquet(df, f)
+    else:
+        gravar_xlsx(df, f)
+    f.seek(0)
+    return f
+
+def exportar_bytes(df: pd.DataFrame, formato: str = "xlsx") -> bytes:
+    """Como exportar(), devolvendo o conteúdo (para download_button) e descartando o temporário."""
+    with exportar(df, formato) as f:
+        return f.read()
@@ -0,0 +1,130 @@
+# filtros_core.py
+"""
+Filtros globais do painel sobre índices pré-calculados do ERP.
+
+Cada dimensão (UF, categoria, tipo de material, fornecedor, mês da OF) vira um vetor de
+códigos inteiros por linha. Uma seleção vira uma tabela de consulta (código -> bool) e a
+máscara da dimensão sai de um único "gather" vetorizado; as máscaras ficam guardadas
+compactadas (np.packbits) e são combinadas por AND/OR direto nos bytes. Refiltrar só
+recalcula a dimensão que mudou.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DIMENSOES = {
+    "uf": "FORNECEDOR_UF",
+    "categoria": "INSUMO_CATEGORIA",
+    "tipo": "TIPO_MATERIAL",
+    "fornecedor": "FORNECEDOR_DESC",
+}
+
+def _menor_int(k: int):
+    for t in (np.int8, np.int16, np.int32):
+        if k < np.iinfo(t).max:
+            return t
+    return np.int64
+
+class IndiceFiltros:
+    """Códigos por linha de cada dimensão + cache LRU das máscaras compactadas."""
+
+    def __init__(self, df: pd.DataFrame, col_data: str = "OF_DATA", max_cache: int = 64):
+        self.df = df
+        self.n = len(df)
+        self.codigos: dict[str, np.ndarray] = {}
+        self.valores: dict[str, pd.Index] = {}
+        for dim, col in DIMENSOES.items():
+            if col not in df.columns:
+                continue
+            limpo = df[col].astype("string").str.strip().replace({"": pd.NA, "nan": pd.NA, "None": pd.NA})
+            cod, cats = pd.factorize(limpo, sort=True, use_na_sentinel=True)
+            # +1: o código 0 fica para nulos (nunca selecionável)
+            self.codigos[dim] = (cod + 1).astype(_menor_int(len(cats) + 1))
+            self.valores[dim] = pd.Index(cats)
+
+        # mês da OF: meses desde o 1º mês da base (0 = sem data)
+        dt = pd.to_datetime(df[col_data], errors="coerce") if col_data in df.columns else pd.Series(pd.NaT, index=df.index)
+        m = dt.to_numpy(dtype="datetime64[M]").astype(np.int64)
+        nulo = dt.isna().to_numpy()
+        m0 = int(m[~nulo].min()) if (~nulo).any() else 0
+        m1 = int(m[~nulo].max()) if (~nulo).any() else -1
+        cod_mes = np.where(nulo, 0, m - m0 + 1)
+        self.codigos["mes"] = cod_mes.astype(_menor_int(m1 - m0 + 2))
+        self.valores["mes"] = pd.period_range(
+            pd.Period(np.datetime64(m0, "M"), freq="M"), periods=max(0, m1 - m0 + 1), freq="M"
+        ) if m1 >= m0 else pd.PeriodIndex([], freq="M")
+
+        self._cache: OrderedDict = OrderedDict()
+        self._max_cache = max_cache
+        self._lock = threading.Lock()          # índice compartilhado entre as sessões
+
+    def opcoes(self, dim: str) -> list:
+        return list(self.valores.get(dim, []))
+
+    # ---------- Máscaras ----------
+    def _lembrar(self, chave, calcular):
+        with self._lock:
+            v = self._cache.pop(chave, None)
+            if v is not None:
+                self._cache[chave] = v         # volta para o fim (mais recente)
+                return v
+        # cálculo fora do lock; duas sessões pedindo a mesma máscara só calculam em dobro
+        v = calcular()
+        with self._lock:
+            self._cache[chave] = v
+            while len(self._cache) > self._max_cache:
+                self._cache.popitem(last=False)
+        return v
+
+    def _mascara_dim(self, dim: str, selecao) -> np.ndarray:
+        """Máscara compactada das linhas cujo valor da dimensão está na seleção."""
+        def calcular():
+            vals = self.valores[dim]
+            idx = vals.get_indexer(pd.Index(list(selecao)))
+            tabela = np.zeros(len(vals) + 1, dtype=bool)
+            tabela[idx[idx >= 0] + 1] = True
+            return np.packbits(tabela[self.codigos[dim]])
+        return self._lembrar((dim, frozenset(selecao)), calcular)
+
+    def _mascara_periodo(self, inicio, fim) -> np.ndarray:
+        def calcular():
+            meses = self.valores["mes"]
+            i0 = 0 if inicio is None else int(np.searchsorted(meses.asi8, pd.Period(inicio, freq="M").ordinal))
+            i1 = len(meses) if fim is None else int(np.searchsorted(meses.asi8, pd.Period(fim, freq="M").ordinal, side="right"))
+            tabela = np.zeros(len(meses) + 1, dtype=bool)
+            tabela[i0 + 1:i1 + 1] = True
+            return np.packbits(tabela[self.codigos["mes"]])
+        return self._lembrar(("mes", inicio, fim), calcular)
+
+    def mascara(self, inicio=None, fim=None, modo: str = "E", **selecoes) -> np.ndarray | None:
+        """
+        Máscara booleana das linhas selecionadas; None quando nada filtra.
+        inicio/fim: meses (inclusive) da OF. selecoes: uf=, categoria=, tipo=, fornecedor= (listas).
+        Valores de uma mesma dimensão somam-se (OU); entre dimensões, modo "E" ou "OU".
+        O período sempre restringe (E) o resultado.
+        """
+        partes = [self._mascara_dim(d, v) for d, v in selecoes.items() if v and d in self.codigos]
+        comb = None
+        if partes:
+            op = np.bitwise_and if modo == "E" else np.bitwise_or
+            comb = op.reduce(np.vstack(partes), axis=0) if len(partes) > 1 else partes[0]
+        if inicio is not None or fim is not None:
+            per = self._mascara_periodo(inicio, fim)
+            comb = per if comb is None else (comb & per)
+        if comb is None:
+            return None
+        return np.unpackbits(comb, count=self.n).astype(bool)
+
+    def contar(self, **filtros) -> int:
+        m = self.mascara(**filtros)
+        return self.n if m is None else int(np.count_nonzero(m))
+
+    def subconjunto(self, **filtros) -> pd.DataFrame:
+        """Linhas selecionadas (a própria base, sem cópia, quando nada filtra)."""
+        m = self.mascara(**filtros)
+        return self.df if m is None else self.df[m]
+
+def indice_filtros(df: pd.DataFrame, col_data: str = "OF_DATA") -> IndiceFiltros:
+    return IndiceFiltros(df, col_data=col_data)
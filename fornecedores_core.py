@@ -1,7 +1,16 @@
 # fornecedores_core.py
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from distintos_core import codificar_ids, indice_atividade, IndiceAtividade
+
+# colunas aceitas no cadastro (1ª encontrada, via _col)
+CANDIDATOS_ID_CADASTRO = ["FORNECEDOR_CDG", "FORNECEDOR_ID", "COD_FORNECEDOR", "FORN_CNPJ", "CNPJ"]
+CANDIDATOS_DATA_CADASTRO = ["DATA_CADASTRO", "DT_CADASTRO", "DATA_INCLUSAO", "DT_INCLUSAO",
+                            "CRIACAO", "DATA_CRIACAO", "CADASTRO_DATA", "INCLUSAO", "DT_CAD", "DATA",
+                            "FORN_DTCADASTRO"]
+
 # ---------- Carga ----------
 def carregar_fornecedores(path: Path | None = None, sheet: int | str = 0) -> pd.DataFrame:
     """
@@ -52,40 +61,44 @@ def total_empresas_cadastradas(df_forn: pd.DataFrame, col_id: str | None = None)
         # fallback direto para CNPJ/variantes
         col = _col(df_forn, ["FORN_CNPJ", "CNPJ"])
 
-    s = (
-        df_forn[col]
-        .astype("string")
-        .str.strip()
-        .replace({"": pd.NA, "nan": pd.NA, "None": pd.NA})
-        .dropna()
-    )
-    return int(s.nunique())
+    _, categorias = codificar_ids(df_forn[col])
+    return int(len(categorias))
 
 def serie_fornecedores_ativos_ultimos_anos(df_erp: pd.DataFrame,
                                            anos: int = 10,
                                            col_id: str = "FORNECEDOR_CDG",
-                                           col_data: str = "OF_DATA") -> tuple[pd.DataFrame, dict]:
+                                           col_data: str = "OF_DATA",
+                                           indice: IndiceAtividade | None = None,
+                                           aproximado: bool = False) -> tuple[pd.DataFrame, dict]:
     """
     Série anual (últimos N anos) de fornecedores *ativos* no ERP (ao menos 1 OF no ano).
+    Usa o índice de atividade por mês (distintos_core); passe `indice` para reaproveitá-lo
+    entre chamadas e `aproximado=True` para contagem via HyperLogLog.
     Retorna (df_serie, resumo) onde:
       df_serie = ANO | FORNECEDORES_ATIVOS
       resumo = {'primeiro_ano':..., 'ultimo_ano':..., 'var_abs':..., 'var_pct':...}
     """
-    df = df_erp.copy()
-    df[col_data + "_DT"] = pd.to_datetime(df[col_data], errors="coerce")
+    vazio = pd.DataFrame(columns=["ANO", "FORNECEDORES_ATIVOS"]), {
+        "primeiro_ano": None, "ultimo_ano": None, "var_abs": 0, "var_pct": 0.0
+    }
+    if indice is None:
+        if col_id not in df_erp.columns:
+            return vazio
+        indice = indice_atividade(df_erp, col_id=col_id, col_data=col_data, hll=aproximado)
 
     limite = pd.Timestamp.today() - pd.DateOffset(years=anos)
-    base = df[df[col_data + "_DT"] >= limite].copy()
-    if base.empty or col_id not in base.columns:
-        return pd.DataFrame(columns=["ANO", "FORNECEDORES_ATIVOS"]), {
-            "primeiro_ano": None, "ultimo_ano": None, "var_abs": 0, "var_pct": 0.0
-        }
-
-    base["ANO"] = base[col_data + "_DT"].dt.year
-    serie = (base.groupby("ANO")[col_id]
-             .nunique()
-             .reset_index(name="FORNECEDORES_ATIVOS")
-             .sort_values("ANO"))
+    meses = indice.meses()
+    if len(meses) == 0 or meses[-1].end_time < limite:
+        return vazio
+
+    linhas = []
+    for ano in range(limite.year, int(meses[-1].year) + 1):
+        ini = max(limite, pd.Timestamp(year=ano, month=1, day=1))
+        fim = pd.Timestamp(year=ano + 1, month=1, day=1)
+        q = indice.contar(ini, fim, aproximado=aproximado)
+        if q:
+            linhas.append({"ANO": ano, "FORNECEDORES_ATIVOS": q})
+    serie = pd.DataFrame(linhas, columns=["ANO", "FORNECEDORES_ATIVOS"])
 
     if serie.empty:
         return serie, {"primeiro_ano": None, "ultimo_ano": None, "var_abs": 0, "var_pct": 0.0}
@@ -103,6 +116,47 @@ def serie_fornecedores_ativos_ultimos_anos(df_erp: pd.DataFrame,
     }
     return serie, resumo
 
+def serie_fornecedores_ativos_rolante(df_erp: pd.DataFrame,
+                                      janela_meses: int = 12,
+                                      col_id: str = "FORNECEDOR_CDG",
+                                      col_data: str = "OF_DATA",
+                                      indice: IndiceAtividade | None = None,
+                                      incluir_parciais: bool = False) -> pd.DataFrame:
+    """
+    Série mensal de fornecedores ativos na janela móvel dos últimos `janela_meses` meses
+    (ex.: 12 = trailing-12-month), sobre todo o histórico.
+    Varredura única: cada mês entra e sai da janela uma vez (contador por fornecedor).
+    Retorna df com colunas: MES | FORNECEDORES_ATIVOS
+    """
+    if indice is None:
+        if col_id not in df_erp.columns:
+            return pd.DataFrame(columns=["MES", "FORNECEDORES_ATIVOS"])
+        indice = indice_atividade(df_erp, col_id=col_id, col_data=col_data)
+
+    n = indice.n_meses
+    w = max(1, int(janela_meses))
+    if n == 0:
+        return pd.DataFrame(columns=["MES", "FORNECEDORES_ATIVOS"])
+
+    unicos = [np.unique(indice.codigos_mes(i)) for i in range(n)]
+    cont = np.zeros(indice.n_ids, dtype=np.int32)
+    ativos = 0
+    out = np.zeros(n, dtype=np.int64)
+    for i in range(n):
+        u = unicos[i]
+        ativos += int((cont[u] == 0).sum())
+        cont[u] += 1
+        if i >= w:
+            v = unicos[i - w]
+            cont[v] -= 1
+            ativos -= int((cont[v] == 0).sum())
+        out[i] = ativos
+
+    serie = pd.DataFrame({"MES": indice.meses(), "FORNECEDORES_ATIVOS": out})
+    if not incluir_parciais:
+        serie = serie.iloc[w - 1:]
+    return serie.reset_index(drop=True)
+
 def serie_fornecedores_cadastrados_por_ano(df_forn: pd.DataFrame,
                                            anos: int = 10,
                                            col_id: str | None = None,
@@ -115,17 +169,13 @@ def serie_fornecedores_cadastrados_por_ano(df_forn: pd.DataFrame,
 
     # Detecta ID do fornecedor
     try:
-        col_id = col_id or _col(df, ["FORNECEDOR_CDG", "FORNECEDOR_ID", "COD_FORNECEDOR", "FORN_CNPJ", "CNPJ"])
+        col_id = col_id or _col(df, CANDIDATOS_ID_CADASTRO)
     except KeyError:
         raise KeyError("Não encontrei coluna de ID do fornecedor.")
 
     # Detecta data de cadastro (vários aliases comuns)
     try:
-        col_data_cad = col_data_cad or _col(
-            df,
-            ["DATA_CADASTRO", "DT_CADASTRO", "DATA_INCLUSAO", "DT_INCLUSAO",
-             "CRIACAO", "DATA_CRIACAO", "CADASTRO_DATA", "INCLUSAO", "DT_CAD", "DATA", "FORN_DTCADASTRO"]
-        )
+        col_data_cad = col_data_cad or _col(df, CANDIDATOS_DATA_CADASTRO)
     except KeyError:
         raise KeyError("Não encontrei coluna de data de cadastro.")
 
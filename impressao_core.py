@@ -0,0 +1,80 @@
+# impressao_core.py
+"""
+Impressões digitais (hash de conteúdo) das bases e dos dados derivados.
+
+Arquivos: mtime + tamanho servem de pré-checagem barata; só quando mudam o conteúdo
+é relido em blocos (blake2b, streaming, sem carregar o arquivo inteiro na memória).
+Derivados: a impressão é a combinação da impressão das entradas com o nome e os
+parâmetros do derivado — muda exatamente quando alguma entrada muda.
+Os caches (st.cache_*, Parquet, SQLite) usam essas impressões como chave em vez de TTL.
+"""
+import hashlib
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+_BLOCO = 1 << 20          # 1 MiB por leitura
+_TAM_DIGEST = 16          # 128 bits -> 32 caracteres hex
+
+# (caminho absoluto) -> (mtime_ns, tamanho, hash)
+_memo: dict[str, tuple[int, int, str]] = {}
+_memo_lock = threading.Lock()
+
+def _novo_hash():
+    return hashlib.blake2b(digest_size=_TAM_DIGEST)
+
+def hash_arquivo(path: Path | str) -> str:
+    """
+    Hash do conteúdo do arquivo (hex). Reaproveita o último hash enquanto
+    mtime e tamanho não mudarem. Arquivo ausente -> "ausente".
+    """
+    p = Path(path).resolve()
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        return "ausente"
+    chave = str(p)
+    with _memo_lock:
+        m = _memo.get(chave)
+    if m is not None and m[0] == st.st_mtime_ns and m[1] == st.st_size:
+        return m[2]
+
+    h = _novo_hash()
+    with open(p, "rb") as f:
+        while bloco := f.read(_BLOCO):
+            h.update(bloco)
+    dig = h.hexdigest()
+    with _memo_lock:
+        _memo[chave] = (st.st_mtime_ns, st.st_size, dig)
+    return dig
+
+def impressao_arquivos(arquivos) -> str:
+    """Impressão combinada de vários arquivos (ordem e nomes fazem parte da chave)."""
+    return combinar(*[f"{Path(a).name}={hash_arquivo(a)}" for a in arquivos])
+
+def combinar(*partes, **params) -> str:
+    """Combina impressões/valores em uma nova impressão (parâmetros em ordem de nome)."""
+    h = _novo_hash()
+    for p in partes:
+        h.update(repr(p).encode("utf-8"))
+        h.update(b"\x1f")
+    for k in sorted(params):
+        h.update(f"{k}={params[k]!r}".encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+def impressao_derivada(base: str, nome: str, **params) -> str:
+    """Impressão de um dado derivado: entradas + nome do derivado + parâmetros."""
+    return combinar(base, nome, **params)
+
+def hash_dataframe(df: pd.DataFrame) -> str:
+    """
+    Hash do conteúdo de um DataFrame (valores + nomes/tipos das colunas), vetorizado
+    com pd.util.hash_pandas_object. Para quadros construídos fora dos arquivos.
+    """
+    h = _novo_hash()
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    if len(df):
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
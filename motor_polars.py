@@ -0,0 +1,428 @@
+# motor_polars.py
+"""
+Motor alternativo dos indicadores em Polars (lazy, multi-thread) sobre o cache Parquet.
+
+Mesmas assinaturas de Tratamento_Indicadores / fornecedores_core: o 1º argumento pode ser
+um pl.LazyFrame, um pl.DataFrame, um pandas.DataFrame ou o caminho de um .parquet
+(lido com scan_parquet: filtro de OF_DATA e projeção de colunas empurrados para a leitura).
+As saídas são convertidas de volta para os mesmos formatos pandas do motor padrão; onde o
+acabamento é mais simples em pandas, só as linhas/colunas necessárias são coletadas e a
+função original é aplicada.
+"""
+from pathlib import Path
+
+import pandas as pd
+
+import Tratamento_Indicadores as ti
+import fornecedores_core as fc
+
+try:
+    import polars as pl
+except ImportError:  # dependência opcional
+    pl = None
+
+# ---------- Cache Parquet ----------
+def _exigir_polars():
+    if pl is None:
+        raise ImportError("Motor 'polars' requer o pacote polars (pip install polars).")
+
+def caminho_cache_parquet() -> Path:
+    return Path(__file__).parent / "total_indicadores.parquet"
+
+_META_IMPRESSAO = b"impressao"
+
+def impressao_cache_parquet(path: Path | str | None = None) -> str | None:
+    """Impressão digital gravada nos metadados do Parquet (None se ausente)."""
+    import pyarrow.parquet as pq
+    destino = Path(path) if path else caminho_cache_parquet()
+    if not destino.exists():
+        return None
+    meta = pq.read_schema(destino).metadata or {}
+    v = meta.get(_META_IMPRESSAO)
+    return v.decode("utf-8") if v else None
+
+def salvar_cache_parquet(df_erp: pd.DataFrame, path: Path | str | None = None,
+                         impressao: str | None = None) -> Path:
+    """
+    Grava o ERP tipado (saída de carregar_bases) em Parquet; troca atômica do arquivo.
+    Com `impressao` (impressao_core), ela vai nos metadados e o arquivo não é regravado
+    se já corresponder à mesma impressão.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    destino = Path(path) if path else caminho_cache_parquet()
+    if impressao and impressao_cache_parquet(destino) == impressao:
+        return destino
+    tmp = destino.with_suffix(destino.suffix + ".tmp")
+    tab = pa.Table.from_pandas(df_erp, preserve_index=False)
+    if impressao:
+        meta = dict(tab.schema.metadata or {})
+        meta[_META_IMPRESSAO] = impressao.encode("utf-8")
+        tab = tab.replace_schema_metadata(meta)
+    pq.write_table(tab, tmp)
+    tmp.replace(destino)
+    return destino
+
+def _lazy(df) -> "pl.LazyFrame":
+    _exigir_polars()
+    if isinstance(df, pl.LazyFrame):
+        return df
+    if isinstance(df, pl.DataFrame):
+        return df.lazy()
+    if isinstance(df, (str, Path)):
+        return pl.scan_parquet(str(df))
+    return pl.from_pandas(df).lazy()
+
+def _cols(lf) -> list[str]:
+    return lf.collect_schema().names()
+
+def _limite(anos: int):
+    return (pd.Timestamp.today() - pd.DateOffset(years=anos)).to_pydatetime()
+
+def _para_pandas(lf, colunas=None, filtro=None) -> pd.DataFrame:
+    """Coleta só as colunas/linhas pedidas e devolve no formato do motor pandas."""
+    disp = _cols(lf)
+    if filtro is not None:
+        lf = lf.filter(filtro)
+    if colunas:
+        lf = lf.select([c for c in colunas if c in disp])
+    df = lf.collect().to_pandas()
+    for c in ("INSUMO_CDG", "FORNECEDOR_CDG"):
+        if c in df.columns:
+            df[c] = df[c].astype("string")
+    return df
+
+def _id_limpo(col: str):
+    s = pl.col(col).cast(pl.Utf8).str.strip_chars()
+    return pl.when(s.is_in(["", "nan", "None"])).then(None).otherwise(s)
+
+# ---------- Indicadores (ERP) ----------
+def fornecedor_top_por_uf(df, anos=10, ufs=("RJ", "SP")):
+    lf = _lazy(df)
+    g = (
+        lf.filter(
+            (pl.col("OF_DATA") >= _limite(anos))
+            & pl.col("FORNECEDOR_UF").is_in(list(ufs))
+            & pl.col("FORNECEDOR_CDG").is_not_null()
+            & pl.col("FORNECEDOR_DESC").is_not_null()
+        )
+        .group_by(["FORNECEDOR_UF", "FORNECEDOR_CDG", "FORNECEDOR_DESC"])
+        .agg(pl.col("PRCTTL_INSUMO").sum().alias("VALOR"))
+        .sort("VALOR", descending=True)
+        .group_by("FORNECEDOR_UF", maintain_order=True)
+        .first()
+        .collect()
+        .to_pandas()
+    )
+    out = []
+    for uf in ufs:
+        top = g[g["FORNECEDOR_UF"] == uf]
+        if not top.empty:
+            out.append({
+                "UF": uf,
+                "FORNECEDOR_CDG": top.iloc[0]["FORNECEDOR_CDG"],
+                "FORNECEDOR_DESC": top.iloc[0]["FORNECEDOR_DESC"],
+                "VALOR": float(top.iloc[0]["VALOR"]),
+            })
+    out = pd.DataFrame(out)
+    if not out.empty:
+        out["FORNECEDOR_CDG"] = out["FORNECEDOR_CDG"].astype("string")
+        w = int(out["FORNECEDOR_CDG"].dropna().astype(str).str.len().max())
+        if w > 0:
+            out["FORNECEDOR_CDG"] = out["FORNECEDOR_CDG"].str.zfill(w)
+        out["VALOR"] = pd.to_numeric(out["VALOR"], errors="coerce").round(2)
+    return out
+
+def _totais_of(lf):
+    return (
+        lf.filter(pl.col("OF_CDG").is_not_null())
+        .group_by("OF_CDG")
+        .agg(pl.col("PRCTTL_INSUMO").sum().alias("VALOR_TOTAL_OF"))
+    )
+
+def _of_extrema(lf, desc: bool):
+    top = (
+        _totais_of(lf)
+        .filter(pl.col("VALOR_TOTAL_OF") > 0)
+        .sort("VALOR_TOTAL_OF", descending=desc)
+        .head(1)
+        .collect()
+    )
+    return None if top.is_empty() else top["OF_CDG"][0]
+
+def maior_ordem_fornecimento(df):
+    lf = _lazy(df)
+    of = _of_extrema(lf, desc=True)
+    filtro = pl.col("OF_CDG") == of if of is not None else pl.lit(False)
+    return ti.maior_ordem_fornecimento(_para_pandas(lf, filtro=filtro))
+
+def menor_ordem_fornecimento(df):
+    lf = _lazy(df)
+    of = _of_extrema(lf, desc=False)
+    filtro = pl.col("OF_CDG") == of if of is not None else pl.lit(False)
+    return ti.menor_ordem_fornecimento(_para_pandas(lf, filtro=filtro))
+
+def valor_medio_por_of(df):
+    tot = _totais_of(_lazy(df)).sort("OF_CDG").collect().to_pandas()
+    tot["VALOR_TOTAL_OF"] = pd.to_numeric(tot["VALOR_TOTAL_OF"], errors="coerce").round(2)
+    media = float(tot["VALOR_TOTAL_OF"].mean()) if not tot.empty else 0.0
+    return media, tot
+
+def percentual_ofs_basicas_ultimo_ano(df):
+    grp = (
+        _lazy(df)
+        .filter((pl.col("OF_DATA") >= _limite(1)) & pl.col("OF_CDG").is_not_null())
+        .group_by("OF_CDG")
+        .agg((pl.col("TIPO_MATERIAL") == "BÁSICO").any().alias("_BAS_"))
+        .sort("OF_CDG")
+        .with_columns(
+            pl.when(pl.col("_BAS_")).then(pl.lit("BÁSICO")).otherwise(pl.lit("ESPECÍFICO")).alias("TIPO_OF")
+        )
+        .select(["OF_CDG", "TIPO_OF"])
+        .collect()
+        .to_pandas()
+    )
+    if grp.empty:
+        return 0.0, pd.DataFrame(columns=["OF_CDG", "TIPO_OF"])
+    total = len(grp)
+    bas = int((grp["TIPO_OF"] == "BÁSICO").sum())
+    pct = (bas / total * 100.0) if total else 0.0
+    return pct, grp
+
+def mes_maior_volume_ultimo_ano(df, top_n=3):
+    res = (
+        _lazy(df)
+        .filter(pl.col("OF_DATA") >= _limite(1))
+        .group_by(pl.col("OF_DATA").dt.strftime("%Y-%m").alias("ANO_MES"))
+        .agg(pl.col("PRCTTL_INSUMO").sum().alias("VALOR_TOTAL"))
+        .collect()
+        .to_pandas()
+    )
+    if res.empty:
+        return pd.DataFrame(columns=["ANO_MES", "VALOR_TOTAL", "PART_%"])
+    res["ANO_MES"] = pd.PeriodIndex(res["ANO_MES"], freq="M")
+    res = res.sort_values("VALOR_TOTAL", ascending=False)
+    total = res["VALOR_TOTAL"].sum()
+    res["PART_%"] = (res["VALOR_TOTAL"] / total * 100).round(2) if total else 0.0
+    res["VALOR_TOTAL"] = pd.to_numeric(res["VALOR_TOTAL"], errors="coerce").round(2)
+    return res.head(int(top_n))
+
+def quantidade_empresas_que_venderam_ultimos_3_anos(df, indice=None, aproximado: bool = False):
+    lf = _lazy(df)
+    disp = _cols(lf)
+    col = next((c for c in ti.CANDIDATOS_FORNECEDOR if c in disp), None)
+    if not col:
+        raise KeyError(f"Não encontrei coluna de fornecedor. Tente uma destas: {ti.CANDIDATOS_FORNECEDOR}. "
+                       f"Disponíveis: {disp}")
+    q = (
+        lf.filter((pl.col("OF_DATA") >= _limite(3)) & (pl.col("PRCTTL_INSUMO") > 0))
+        .select(_id_limpo(col).drop_nulls().n_unique())
+        .collect()
+        .item()
+    )
+    return int(q or 0)
+
+def meses_top3_volume_geral(df, top_n=3):
+    agg = (
+        _lazy(df)
+        .filter(pl.col("OF_DATA").is_not_null())
+        .group_by(pl.col("OF_DATA").dt.month().cast(pl.Int64).alias("MES"))
+        .agg(pl.col("PRCTTL_INSUMO").sum().alias("VALOR_TOTAL"))
+        .sort("MES")
+        .collect()
+        .to_pandas()
+    )
+    if agg.empty:
+        return pd.DataFrame(columns=["MES_ROTULO", "VALOR_TOTAL", "PART_%"])
+    _MES_LABEL = {1:"Jan",2:"Fev",3:"Mar",4:"Abr",5:"Mai",6:"Jun",7:"Jul",8:"Ago",9:"Set",10:"Out",11:"Nov",12:"Dez"}
+    total = agg["VALOR_TOTAL"].sum()
+    agg["PART_%"] = (agg["VALOR_TOTAL"]/total*100).round(2) if total else 0.0
+    agg["MES_ROTULO"] = agg["MES"].map(_MES_LABEL)
+    agg["VALOR_TOTAL"] = pd.to_numeric(agg["VALOR_TOTAL"], errors="coerce").round(2)
+    out = agg.sort_values("VALOR_TOTAL", ascending=False).head(int(top_n))
+    return out[["MES_ROTULO", "VALOR_TOTAL", "PART_%"]]
+
+def _linha_extrema(lf, maior: bool) -> pd.DataFrame:
+    base = lf.filter(pl.col("PRCTTL_INSUMO").is_not_null())
+    if not maior:
+        pos = base.filter(pl.col("PRCTTL_INSUMO") > 0)
+        if pos.select(pl.len()).collect().item():
+            base = pos
+    top = base.sort("PRCTTL_INSUMO", descending=maior).head(1).collect().to_pandas()
+    for c in ("INSUMO_CDG", "FORNECEDOR_CDG"):
+        if c in top.columns:
+            top[c] = top[c].astype("string")
+    return top
+
+def maior_compra_item_unico(df):
+    return ti.maior_compra_item_unico(_linha_extrema(_lazy(df), maior=True))
+
+def menor_compra_item_unico(df):
+    return ti.menor_compra_item_unico(_linha_extrema(_lazy(df), maior=False))
+
+def valor_medio_por_item(df):
+    lf = _lazy(df)
+    return ti.valor_medio_por_item(_para_pandas(lf, ["PRCTTL_INSUMO"], pl.col("PRCTTL_INSUMO") > 0))
+
+def categorias_mais_compradas_ultimos_anos(df, anos=5, col_cat="INSUMO_CATEGORIA"):
+    lf = _lazy(df)
+    if col_cat not in _cols(lf):
+        return pd.DataFrame(columns=["CATEGORIA", "VALOR_TOTAL", "PART_%"])
+    grp = (
+        lf.filter((pl.col("OF_DATA") >= _limite(anos)) & pl.col(col_cat).is_not_null())
+        .group_by(pl.col(col_cat).alias("CATEGORIA"))
+        .agg(pl.col("PRCTTL_INSUMO").sum().alias("VALOR_TOTAL"))
+        .collect()
+        .to_pandas()
+    )
+    if grp.empty:
+        return pd.DataFrame(columns=["CATEGORIA", "VALOR_TOTAL", "PART_%"])
+    tot = float(grp["VALOR_TOTAL"].sum())
+    grp["PART_%"] = (grp["VALOR_TOTAL"] / tot * 100).round(2) if tot else 0.0
+    grp["VALOR_TOTAL"] = grp["VALOR_TOTAL"].round(2)
+    return grp.sort_values("VALOR_TOTAL", ascending=False)
+
+def categorias_basicos_distintos(df, col_cat: str = "INSUMO_CATEGORIA") -> pd.DataFrame:
+    lf = _lazy(df)
+    if "TIPO_MATERIAL" not in _cols(lf):
+        return pd.DataFrame(columns=["CATEGORIA"])
+    base = _para_pandas(lf, ["TIPO_MATERIAL", col_cat], pl.col("TIPO_MATERIAL") == "BÁSICO")
+    return ti.categorias_basicos_distintos(base, col_cat=col_cat)
+
+def fornecedores_basicos_por_local_cadastro(df_forn, df_erp, locais=("RJ", "SP", "SC")) -> pd.DataFrame:
+    lf = _lazy(df_erp)
+    erp_bas = _para_pandas(lf, ["TIPO_MATERIAL", "INSUMO_CATEGORIA"], pl.col("TIPO_MATERIAL") == "BÁSICO")
+    forn = df_forn if isinstance(df_forn, pd.DataFrame) else _lazy(df_forn).collect().to_pandas()
+    return ti.fornecedores_basicos_por_local_cadastro(forn, erp_bas, locais=locais)
+
+def itens_da_of(df, of_cdg, top_n: int | None = 5):
+    lf = _lazy(df)
+    return ti.itens_da_of(_para_pandas(lf, filtro=pl.col("OF_CDG") == of_cdg), of_cdg=of_cdg, top_n=top_n)
+
+def _anuais(lf, col_cat, col_data, col_val) -> pd.DataFrame:
+    return _para_pandas(
+        lf, [col_cat, col_data, col_val],
+        pl.col(col_data).is_not_null() & pl.col(col_val).is_not_null(),
+    )
+
+def categorias_com_venda_continua_ultimos_anos(df, anos: int = 5, col_cat: str = "INSUMO_CATEGORIA",
+                                               col_data: str = "OF_DATA", col_val: str = "PRCTTL_INSUMO"):
+    lf = _lazy(df)
+    if col_cat not in _cols(lf):
+        return set()
+    base = lf.filter(pl.col(col_data).is_not_null() & pl.col(col_val).is_not_null())
+    ultimo = base.select(pl.col(col_data).dt.year().max()).collect().item()
+    if ultimo is None:
+        return set()
+    janela = list(range(int(ultimo) - anos + 1, int(ultimo) + 1))
+    ok = (
+        base.with_columns(pl.col(col_data).dt.year().alias("ANO"))
+        .filter(pl.col("ANO").is_in(janela) & pl.col(col_cat).is_not_null())
+        .group_by([col_cat, "ANO"])
+        .agg(pl.col(col_val).sum().alias("VALOR_ANO"))
+        .filter(pl.col("VALOR_ANO") > 0)
+        .group_by(col_cat)
+        .agg(pl.col("ANO").n_unique().alias("N"))
+        .filter(pl.col("N") == len(janela))
+        .collect()
+    )
+    return set(ok[col_cat].to_list())
+
+def categorias_crescimento_desde_2015(df, start_year: int = 2015, col_cat: str = "INSUMO_CATEGORIA",
+                                      col_data: str = "OF_DATA", col_val: str = "PRCTTL_INSUMO",
+                                      min_anos_validos: int = 3, clip_pct: float | None = 500.0,
+                                      require_continuous_last_n: int | None = None) -> pd.DataFrame:
+    lf = _lazy(df)
+    if col_cat not in _cols(lf):
+        return ti.categorias_crescimento_desde_2015(pd.DataFrame(), col_cat=col_cat)
+    return ti.categorias_crescimento_desde_2015(
+        _anuais(lf, col_cat, col_data, col_val), start_year=start_year, col_cat=col_cat,
+        col_data=col_data, col_val=col_val, min_anos_validos=min_anos_validos, clip_pct=clip_pct,
+        require_continuous_last_n=require_continuous_last_n,
+    )
+
+def concentracao_fornecedores(df, por="INSUMO_CATEGORIA", anos: int | None = None,
+                              col_forn="FORNECEDOR_CDG", col_val="PRCTTL_INSUMO",
+                              corte_pct: float = 80.0):
+    lf = _lazy(df)
+    filtro = pl.col(col_val) > 0
+    if anos:
+        filtro = filtro & (pl.col("OF_DATA") >= _limite(anos))
+    base = _para_pandas(lf, [por, col_forn, col_val, "FORNECEDOR_DESC", "OF_DATA"], filtro)
+    return ti.concentracao_fornecedores(base, por=por, anos=None, col_forn=col_forn,
+                                        col_val=col_val, corte_pct=corte_pct)
+
+def lead_time_requisicao(df, por: str | None = "INSUMO_CATEGORIA", anos: int | None = None,
+                         col_req="REQ_DATA", col_of="OF_DATA"):
+    lf = _lazy(df)
+    disp = _cols(lf)
+    if col_req not in disp or col_of not in disp or (por and por != "MES" and por not in disp):
+        return ti.lead_time_requisicao(pd.DataFrame(), por=por)
+    rotulo = {"INSUMO_CATEGORIA": "CATEGORIA", "FORNECEDOR_UF": "UF",
+              "FORNECEDOR_DESC": "FORNECEDOR"}.get(por, por)
+
+    dias = (pl.col(col_of).dt.truncate("1d") - pl.col(col_req).dt.truncate("1d")).dt.total_days()
+    q = lf.with_columns(dias.cast(pl.Float64).alias("_D_")).filter(pl.col("_D_") >= 0)
+    if anos:
+        q = q.filter(pl.col(col_of) >= _limite(anos))
+    aggs = [
+        pl.len().alias("N_LINHAS"),
+        pl.col("_D_").mean().alias("MEDIA_DIAS"),
+        pl.col("_D_").quantile(0.5, "linear").alias("P50_DIAS"),
+        pl.col("_D_").quantile(0.9, "linear").alias("P90_DIAS"),
+    ]
+    if not por:
+        out = q.select(aggs).collect().to_pandas()
+        if out.empty or int(out.loc[0, "N_LINHAS"]) == 0:
+            return ti.lead_time_requisicao(pd.DataFrame(), por=por)
+    elif por == "MES":
+        out = (q.group_by(pl.col(col_of).dt.truncate("1mo").alias("MES")).agg(aggs)
+               .sort("MES").collect().to_pandas())
+        out["MES"] = pd.PeriodIndex(out["MES"], freq="M")
+    else:
+        out = (q.filter(pl.col(por).is_not_null()).group_by(pl.col(por).alias(rotulo)).agg(aggs)
+               .sort(["N_LINHAS", rotulo], descending=[True, False]).collect().to_pandas())
+    for c in ("MEDIA_DIAS", "P50_DIAS", "P90_DIAS"):
+        out[c] = out[c].astype(float).round(1)
+    out["N_LINHAS"] = out["N_LINHAS"].astype(int)
+    return out.reset_index(drop=True)
+
+# ---------- Indicadores (fornecedores) ----------
+def total_empresas_cadastradas(df_forn, col_id: str | None = None) -> int:
+    forn = df_forn if isinstance(df_forn, pd.DataFrame) else _lazy(df_forn).collect().to_pandas()
+    return fc.total_empresas_cadastradas(forn, col_id=col_id)
+
+def serie_fornecedores_ativos_ultimos_anos(df_erp, anos: int = 10, col_id: str = "FORNECEDOR_CDG",
+                                           col_data: str = "OF_DATA", indice=None,
+                                           aproximado: bool = False) -> tuple[pd.DataFrame, dict]:
+    vazio = pd.DataFrame(columns=["ANO", "FORNECEDORES_ATIVOS"]), {
+        "primeiro_ano": None, "ultimo_ano": None, "var_abs": 0, "var_pct": 0.0
+    }
+    lf = _lazy(df_erp)
+    if col_id not in _cols(lf):
+        return vazio
+    serie = (
+        lf.filter(pl.col(col_data) >= _limite(anos))
+        .group_by(pl.col(col_data).dt.year().cast(pl.Int64).alias("ANO"))
+        .agg(_id_limpo(col_id).drop_nulls().n_unique().alias("FORNECEDORES_ATIVOS"))
+        .filter(pl.col("FORNECEDORES_ATIVOS") > 0)
+        .sort("ANO")
+        .collect()
+        .to_pandas()
+    )
+    if serie.empty:
+        return vazio
+    prim = serie.iloc[0]["FORNECEDORES_ATIVOS"]
+    ult  = serie.iloc[-1]["FORNECEDORES_ATIVOS"]
+    resumo = {
+        "primeiro_ano": int(serie.iloc[0]["ANO"]),
+        "ultimo_ano":   int(serie.iloc[-1]["ANO"]),
+        "var_abs":      int(ult - prim),
+        "var_pct":      float((ult - prim) / prim * 100) if prim else 0.0,
+    }
+    return serie, resumo
+
+def serie_fornecedores_cadastrados_por_ano(df_forn, anos: int = 10, col_id: str | None = None,
+                                           col_data_cad: str | None = None) -> pd.DataFrame:
+    forn = df_forn if isinstance(df_forn, pd.DataFrame) else _lazy(df_forn).collect().to_pandas()
+    return fc.serie_fornecedores_cadastrados_por_ano(forn, anos=anos, col_id=col_id, col_data_cad=col_data_cad)
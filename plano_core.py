@@ -0,0 +1,280 @@
+# plano_core.py
+"""
+Plano de consultas: o chamador declara os indicadores de que precisa; o plano detecta
+janelas ("últimos N anos") e chaves de agrupamento em comum e executa o mínimo de
+varreduras sobre o ERP, distribuindo os resultados.
+
+  - preparo (1 passada): datas, valores numéricos, mês e a faixa de janela de cada linha
+    (a menor janela pedida que contém a linha);
+  - 1 groupby por conjunto de chaves (OF, mês, categoria, UF×fornecedor...), já quebrado
+    por faixa: qualquer janela pedida vira um filtro + soma sobre o resultado agregado;
+  - contagens distintas de fornecedores via índice de atividade (distintos_core).
+
+As saídas têm o mesmo formato das funções de Tratamento_Indicadores / fornecedores_core.
+"""
+import numpy as np
+import pandas as pd
+
+import Tratamento_Indicadores as ti
+import fornecedores_core as fc
+from distintos_core import indice_atividade, IndiceAtividade
+
+_MES_LABEL = {1:"Jan",2:"Fev",3:"Mar",4:"Abr",5:"Mai",6:"Jun",7:"Jul",8:"Ago",9:"Set",10:"Out",11:"Nov",12:"Dez"}
+
+# nome -> (chaves do groupby, janela em anos a partir dos parâmetros)
+_CHAVES_UF = ("FORNECEDOR_UF", "FORNECEDOR_CDG", "FORNECEDOR_DESC")
+_REQUISITOS = {
+    "valor_medio_por_of":                (("OF_CDG",), lambda p: None),
+    "maior_ordem_fornecimento":          (("OF_CDG",), lambda p: None),
+    "menor_ordem_fornecimento":          (("OF_CDG",), lambda p: None),
+    "percentual_ofs_basicas_ultimo_ano": (("OF_CDG",), lambda p: 1),
+    "mes_maior_volume_ultimo_ano":       (("_MES_",), lambda p: 1),
+    "meses_top3_volume_geral":           (("_MES_",), lambda p: None),
+    "categorias_mais_compradas_ultimos_anos":
+        (lambda p: (p.get("col_cat", "INSUMO_CATEGORIA"),), lambda p: p.get("anos", 5)),
+    "fornecedor_top_por_uf":             (_CHAVES_UF, lambda p: p.get("anos", 10)),
+    "valor_medio_por_item":              (None, lambda p: None),
+    "maior_compra_item_unico":           (None, lambda p: None),
+    "menor_compra_item_unico":           (None, lambda p: None),
+    "quantidade_empresas_que_venderam_ultimos_3_anos": (None, lambda p: 3),
+    "serie_fornecedores_ativos_ultimos_anos":          (None, lambda p: p.get("anos", 10)),
+}
+
+class PlanoIndicadores:
+    """
+    Uso:
+        plano = PlanoIndicadores(df_erp)
+        plano.pedir("fornecedor_top_por_uf", como="top_10", anos=10)
+        plano.pedir("valor_medio_por_of")
+        res = plano.executar()      # {"top_10": DataFrame, "valor_medio_por_of": (media, tot), ...}
+    Um indicador que falhar devolve a exceção no lugar do resultado.
+    """
+
+    def __init__(self, df_erp: pd.DataFrame,
+                 indice_ativos: IndiceAtividade | None = None,
+                 indice_vendas: IndiceAtividade | None = None):
+        self.df = df_erp
+        self.indice_ativos = indice_ativos
+        self.indice_vendas = indice_vendas
+        self.pedidos: dict[str, tuple[str, dict]] = {}
+        self.varreduras = 0   # nº de passadas (preparo + groupbys + índices) da última execução
+
+    def pedir(self, nome: str, como: str | None = None, **params) -> str:
+        if nome not in _REQUISITOS:
+            raise KeyError(f"Indicador não suportado pelo plano: {nome}. Suportados: {sorted(_REQUISITOS)}")
+        chave = como or nome
+        self.pedidos[chave] = (nome, params)
+        return chave
+
+    # ---------- Planejamento ----------
+    def _chaves(self, nome, params):
+        ch = _REQUISITOS[nome][0]
+        return ch(params) if callable(ch) else ch
+
+    def _janelas(self) -> list[int]:
+        return sorted({
+            int(_REQUISITOS[n][1](p)) for n, p in self.pedidos.values()
+            if _REQUISITOS[n][1](p) is not None
+        })
+
+    # ---------- Execução ----------
+    def _preparar(self, janelas: list[int]) -> pd.DataFrame:
+        df = self.df
+        dt = pd.to_datetime(df["OF_DATA"], errors="coerce")
+        # faixa = nº de janelas (das mais longas p/ as mais curtas) que contêm a linha; NaT -> -1
+        hoje = pd.Timestamp.today()
+        limites = [hoje - pd.DateOffset(years=a) for a in sorted(janelas, reverse=True)]
+        faixa = np.zeros(len(df), dtype=np.int64)
+        for lim in limites:
+            faixa += (dt >= lim).to_numpy()
+        faixa[dt.isna().to_numpy()] = -1
+
+        prep = pd.DataFrame({
+            "_V_": pd.to_numeric(df["PRCTTL_INSUMO"], errors="coerce"),
+            "_FX_": faixa,
+            "_MES_": (dt.dt.year * 12 + dt.dt.month - 1),
+        }, index=df.index)
+        if "TIPO_MATERIAL" in df.columns:
+            prep["_BAS_"] = (df["TIPO_MATERIAL"] == "BÁSICO").to_numpy()
+        self.varreduras += 1
+        return prep
+
+    def _faixa_min(self, janelas: list[int], anos) -> int:
+        """Menor código de faixa incluído na janela `anos` (None = todas com data)."""
+        if anos is None:
+            return 0
+        ordem = sorted(janelas, reverse=True)
+        return ordem.index(int(anos)) + 1
+
+    def _agregar(self, prep: pd.DataFrame, chaves: tuple) -> pd.DataFrame:
+        cols = {}
+        for c in chaves:
+            cols[c] = prep[c] if c in prep.columns else self.df[c]
+        base = pd.DataFrame(cols)
+        base["_FX_"] = prep["_FX_"]
+        aggs = {"_V_": ("_V_", "sum")}
+        base["_V_"] = prep["_V_"]
+        if chaves == ("OF_CDG",) and "_BAS_" in prep.columns:
+            base["_BAS_"] = prep["_BAS_"]
+            aggs["_BAS_"] = ("_BAS_", "max")
+        self.varreduras += 1
+        return base.groupby(list(chaves) + ["_FX_"], as_index=False, sort=False).agg(**aggs)
+
+    def _janela(self, cubo: pd.DataFrame, chaves: tuple, fx_min, incluir_sem_data=False) -> pd.DataFrame:
+        m = cubo["_FX_"] >= fx_min
+        if incluir_sem_data:
+            m |= cubo["_FX_"] == -1
+        aggs = {"_V_": ("_V_", "sum")}
+        if "_BAS_" in cubo.columns:
+            aggs["_BAS_"] = ("_BAS_", "max")
+        return cubo[m].groupby(list(chaves), as_index=False).agg(**aggs)
+
+    def executar(self) -> dict:
+        self.varreduras = 0
+        janelas = self._janelas()
+        prep = self._preparar(janelas)
+
+        cubos = {}
+        for nome, params in self.pedidos.values():
+            ch = self._chaves(nome, params)
+            if ch is not None and ch not in cubos:
+                cubos[ch] = self._agregar(prep, ch)
+
+        out = {}
+        for chave, (nome, params) in self.pedidos.items():
+            try:
+                ch = self._chaves(nome, params)
+                anos = _REQUISITOS[nome][1](params)
+                fx = self._faixa_min(janelas, anos)
+                out[chave] = getattr(self, "_f_" + nome)(cubos.get(ch), ch, fx, prep, **params)
+            except Exception as e:
+                out[chave] = e
+        return out
+
+    # ---------- Finalizadores (mesmo formato das funções originais) ----------
+    def _totais_of(self, cubo, ch):
+        tot = self._janela(cubo, ch, 0, incluir_sem_data=True)
+        return tot.rename(columns={"_V_": "VALOR_TOTAL"})
+
+    def _f_valor_medio_por_of(self, cubo, ch, fx, prep):
+        tot = self._totais_of(cubo, ch).sort_values("OF_CDG")
+        tot = tot[["OF_CDG", "VALOR_TOTAL"]].rename(columns={"VALOR_TOTAL": "VALOR_TOTAL_OF"}).reset_index(drop=True)
+        tot["VALOR_TOTAL_OF"] = pd.to_numeric(tot["VALOR_TOTAL_OF"], errors="coerce").round(2)
+        media = float(tot["VALOR_TOTAL_OF"].mean()) if not tot.empty else 0.0
+        return media, tot
+
+    def _of_extrema(self, cubo, ch, desc: bool, fn):
+        tot = self._totais_of(cubo, ch)
+        tot = tot[tot["VALOR_TOTAL"] > 0]
+        if tot.empty:
+            return fn(self.df.iloc[0:0])
+        of = tot.sort_values("VALOR_TOTAL", ascending=not desc).iloc[0]["OF_CDG"]
+        return fn(self.df[self.df["OF_CDG"] == of])
+
+    def _f_maior_ordem_fornecimento(self, cubo, ch, fx, prep):
+        return self._of_extrema(cubo, ch, True, ti.maior_ordem_fornecimento)
+
+    def _f_menor_ordem_fornecimento(self, cubo, ch, fx, prep):
+        return self._of_extrema(cubo, ch, False, ti.menor_ordem_fornecimento)
+
+    def _f_percentual_ofs_basicas_ultimo_ano(self, cubo, ch, fx, prep):
+        grp = self._janela(cubo, ch, fx)
+        if grp.empty:
+            return 0.0, pd.DataFrame(columns=["OF_CDG", "TIPO_OF"])
+        grp = grp.sort_values("OF_CDG").reset_index(drop=True)
+        bas = grp["_BAS_"].astype(bool) if "_BAS_" in grp.columns else pd.Series(False, index=grp.index)
+        grp["TIPO_OF"] = np.where(bas, "BÁSICO", "ESPECÍFICO")
+        grp = grp[["OF_CDG", "TIPO_OF"]]
+        total = len(grp)
+        n_bas = int((grp["TIPO_OF"] == "BÁSICO").sum())
+        return (n_bas / total * 100.0) if total else 0.0, grp
+
+    def _f_mes_maior_volume_ultimo_ano(self, cubo, ch, fx, prep, top_n=3):
+        res = self._janela(cubo, ch, fx)
+        if res.empty:
+            return pd.DataFrame(columns=["ANO_MES", "VALOR_TOTAL", "PART_%"])
+        mes = res["_MES_"].astype(np.int64)
+        res = pd.DataFrame({
+            "ANO_MES": pd.to_datetime(pd.DataFrame({"year": mes // 12, "month": mes % 12 + 1, "day": 1}))
+                          .dt.to_period("M"),
+            "VALOR_TOTAL": res["_V_"],
+        }).sort_values("VALOR_TOTAL", ascending=False)
+        total = res["VALOR_TOTAL"].sum()
+        res["PART_%"] = (res["VALOR_TOTAL"] / total * 100).round(2) if total else 0.0
+        res["VALOR_TOTAL"] = pd.to_numeric(res["VALOR_TOTAL"], errors="coerce").round(2)
+        return res.head(int(top_n))
+
+    def _f_meses_top3_volume_geral(self, cubo, ch, fx, prep, top_n=3):
+        res = self._janela(cubo, ch, 0)
+        if res.empty:
+            return pd.DataFrame(columns=["MES_ROTULO", "VALOR_TOTAL", "PART_%"])
+        res["MES"] = (res["_MES_"].astype(np.int64) % 12 + 1)
+        agg = res.groupby("MES")["_V_"].sum().reset_index(name="VALOR_TOTAL")
+        total = agg["VALOR_TOTAL"].sum()
+        agg["PART_%"] = (agg["VALOR_TOTAL"]/total*100).round(2) if total else 0.0
+        agg["MES_ROTULO"] = agg["MES"].map(_MES_LABEL)
+        agg["VALOR_TOTAL"] = pd.to_numeric(agg["VALOR_TOTAL"], errors="coerce").round(2)
+        out = agg.sort_values("VALOR_TOTAL", ascending=False).head(int(top_n))
+        return out[["MES_ROTULO", "VALOR_TOTAL", "PART_%"]]
+
+    def _f_categorias_mais_compradas_ultimos_anos(self, cubo, ch, fx, prep, anos=5, col_cat="INSUMO_CATEGORIA"):
+        grp = self._janela(cubo, ch, fx)
+        if grp.empty:
+            return pd.DataFrame(columns=["CATEGORIA", "VALOR_TOTAL", "PART_%"])
+        grp = grp.rename(columns={col_cat: "CATEGORIA", "_V_": "VALOR_TOTAL"})
+        tot = float(grp["VALOR_TOTAL"].sum())
+        grp["PART_%"] = (grp["VALOR_TOTAL"] / tot * 100).round(2) if tot else 0.0
+        grp["VALOR_TOTAL"] = grp["VALOR_TOTAL"].round(2)
+        return grp.sort_values("VALOR_TOTAL", ascending=False)
+
+    def _f_fornecedor_top_por_uf(self, cubo, ch, fx, prep, anos=10, ufs=("RJ", "SP")):
+        g = self._janela(cubo, ch, fx)
+        out = []
+        for uf in ufs:
+            top = g[g["FORNECEDOR_UF"] == uf].sort_values("_V_", ascending=False).head(1)
+            if not top.empty:
+                out.append({
+                    "UF": uf,
+                    "FORNECEDOR_CDG": top.iloc[0]["FORNECEDOR_CDG"],
+                    "FORNECEDOR_DESC": top.iloc[0]["FORNECEDOR_DESC"],
+                    "VALOR": float(top.iloc[0]["_V_"]),
+                })
+        out = pd.DataFrame(out)
+        if not out.empty:
+            out["FORNECEDOR_CDG"] = out["FORNECEDOR_CDG"].astype("string")
+            w = int(out["FORNECEDOR_CDG"].dropna().astype(str).str.len().max())
+            if w > 0:
+                out["FORNECEDOR_CDG"] = out["FORNECEDOR_CDG"].str.zfill(w)
+            out["VALOR"] = pd.to_numeric(out["VALOR"], errors="coerce").round(2)
+        return out
+
+    def _f_valor_medio_por_item(self, cubo, ch, fx, prep):
+        s = prep["_V_"].dropna()
+        s = s[s > 0]
+        if s.empty:
+            return 0.0, pd.DataFrame(columns=["PRECO_TOTAL_ITEM"])
+        return round(float(s.mean()), 2), pd.DataFrame({"PRECO_TOTAL_ITEM": s.round(2)})
+
+    def _f_maior_compra_item_unico(self, cubo, ch, fx, prep):
+        v = prep["_V_"].dropna()
+        linhas = self.df.loc[[v.idxmax()]] if not v.empty else self.df.iloc[0:0]
+        return ti.maior_compra_item_unico(linhas)
+
+    def _f_menor_compra_item_unico(self, cubo, ch, fx, prep):
+        v = prep["_V_"].dropna()
+        pos = v[v > 0]
+        cand = pos if not pos.empty else v
+        linhas = self.df.loc[[cand.idxmin()]] if not cand.empty else self.df.iloc[0:0]
+        return ti.menor_compra_item_unico(linhas)
+
+    def _f_quantidade_empresas_que_venderam_ultimos_3_anos(self, cubo, ch, fx, prep):
+        if self.indice_vendas is None:
+            self.indice_vendas = indice_atividade(self.df, col_valor="PRCTTL_INSUMO")
+            self.varreduras += 1
+        return ti.quantidade_empresas_que_venderam_ultimos_3_anos(self.df, indice=self.indice_vendas)
+
+    def _f_serie_fornecedores_ativos_ultimos_anos(self, cubo, ch, fx, prep, anos=10):
+        if self.indice_ativos is None:
+            self.indice_ativos = indice_atividade(self.df)
+            self.varreduras += 1
+        return fc.serie_fornecedores_ativos_ultimos_anos(self.df, anos=anos, indice=self.indice_ativos)
@@ -0,0 +1,204 @@
+# previsao_core.py
+"""
+Previsão do gasto mensal por categoria (próximos 12 meses, com intervalo).
+
+O histórico vira uma matriz categoria × mês (uma passada: factorize + bincount) e cada
+modelo é ajustado para todas as categorias de uma vez, em operações sobre as linhas da
+matriz:
+  - sazonal ingênuo: repete o mesmo mês do ano anterior;
+  - suavização exponencial simples: alfa escolhido por categoria numa grade (SSE mínimo);
+  - tendência log-linear: mínimos quadrados de log(1 + valor) contra o tempo.
+No modo "auto" os três são avaliados nos últimos 12 meses do histórico (ajuste sem eles) e
+cada categoria fica com o de menor erro absoluto médio.
+"""
+import numpy as np
+import pandas as pd
+
+MODELOS = {
+    "auto": "Automático (melhor no teste dos últimos 12 meses)",
+    "sazonal": "Sazonal ingênuo",
+    "ses": "Suavização exponencial simples",
+    "loglinear": "Tendência log-linear",
+}
+
+MODELOS_BASE = ["sazonal", "ses", "loglinear"]
+
+_ALFAS = np.linspace(0.05, 0.95, 19)
+_Z = {0.8: 1.2816, 0.9: 1.6449, 0.95: 1.96, 0.99: 2.5758}
+
+def matriz_mensal(df: pd.DataFrame,
+                  col_cat: str = "INSUMO_CATEGORIA",
+                  col_data: str = "OF_DATA",
+                  col_val: str = "PRCTTL_INSUMO",
+                  meses: int | None = 60,
+                  hoje=None) -> tuple[pd.Index, pd.PeriodIndex, np.ndarray]:
+    """
+    (categorias, meses, Y) com Y[categoria, mês] = soma do valor. O histórico termina no
+    último mês completo antes de `hoje` e tem `meses` meses (None = desde o início da base).
+    """
+    hoje = pd.Timestamp(hoje) if hoje is not None else pd.Timestamp.today()
+    fim = int(np.datetime64(hoje.to_datetime64(), "M").astype(np.int64)) - 1
+
+    dt = pd.to_datetime(df[col_data], errors="coerce")
+    m = dt.to_numpy(dtype="datetime64[M]").astype(np.int64)
+    val = pd.to_numeric(df[col_val], errors="coerce").to_numpy(dtype=float)
+    cat = df[col_cat].astype("string").str.strip().replace({"": pd.NA})
+    ok = dt.notna().to_numpy() & ~np.isnan(val) & cat.notna().to_numpy() & (m <= fim)
+    if not ok.any():
+        return pd.Index([]), pd.PeriodIndex([], freq="M"), np.zeros((0, 0))
+
+    ini = int(m[ok].min()) if meses is None else fim - int(meses) + 1
+    ok &= m >= ini
+    cod, cats = pd.factorize(cat[ok], sort=True)
+    n_m = fim - ini + 1
+    Y = np.bincount(cod * n_m + (m[ok] - ini), weights=val[ok], minlength=len(cats) * n_m)
+    periodos = pd.period_range(pd.Period(np.datetime64(ini, "M"), freq="M"), periods=n_m, freq="M")
+    return pd.Index(cats), periodos, Y.reshape(len(cats), n_m)
+
+# ---------- Modelos (linhas = categorias) ----------
+def _sazonal(Y: np.ndarray, h: int) -> tuple[np.ndarray, np.ndarray]:
+    """Previsão e desvio do erro (n, h), a partir dos resíduos sazonais (y_t - y_t-12)."""
+    T = Y.shape[1]
+    if T < 12:
+        sigma = np.diff(Y, axis=1).std(axis=1) if T > 1 else np.zeros(len(Y))
+        return np.repeat(Y[:, -1:], h, axis=1), sigma[:, None] * np.sqrt(np.arange(1, h + 1))
+    idx = T - 12 + (np.arange(h) % 12)
+    prev = Y[:, idx]
+    res = Y[:, 12:] - Y[:, :-12]
+    sigma = np.sqrt((res ** 2).mean(axis=1)) if res.shape[1] else np.zeros(len(Y))
+    # erro cresce a cada ciclo completo repetido
+    escala = np.sqrt(np.arange(h) // 12 + 1)
+    return prev, sigma[:, None] * escala
+
+def _ses(Y: np.ndarray, h: int) -> tuple[np.ndarray, np.ndarray]:
+    """Nível por (categoria, alfa) na mesma recursão; alfa de menor SSE por categoria."""
+    n, T = Y.shape
+    nivel = np.repeat(Y[:, :1], len(_ALFAS), axis=1)     # (n, k)
+    sse = np.zeros_like(nivel)
+    for t in range(1, T):
+        erro = Y[:, t:t + 1] - nivel
+        sse += erro ** 2
+        nivel += _ALFAS * erro
+    melhor = sse.argmin(axis=1)
+    linha = np.arange(n)
+    lv, a = nivel[linha, melhor], _ALFAS[melhor]
+    sigma = np.sqrt(sse[linha, melhor] / max(T - 1, 1))
+    passos = np.arange(h)
+    desvio = sigma[:, None] * np.sqrt(1 + passos[None, :] * a[:, None] ** 2)
+    return np.repeat(lv[:, None], h, axis=1), desvio
+
+def _loglinear(Y: np.ndarray, h: int, z: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Previsto, inferior e superior; o intervalo é simétrico no espaço log."""
+    n, T = Y.shape
+    t = np.arange(T, dtype=float)
+    L = np.log1p(np.clip(Y, 0, None))
+    tm, Lm = t.mean(), L.mean(axis=1, keepdims=True)
+    sxx = ((t - tm) ** 2).sum()
+    b = ((L - Lm) * (t - tm)).sum(axis=1, keepdims=True) / sxx if sxx else np.zeros((n, 1))
+    a = Lm - b * tm
+    res = L - (a + b * t)
+    s = np.sqrt((res ** 2).sum(axis=1, keepdims=True) / max(T - 2, 1))
+    tf = np.arange(T, T + h, dtype=float)
+    centro = a + b * tf
+    se = s * np.sqrt(1 + 1 / T + ((tf - tm) ** 2) / (sxx if sxx else 1.0))
+    return np.expm1(centro), np.expm1(centro - z * se), np.expm1(centro + z * se)
+
+def _ajustar(Y: np.ndarray, modelo: str, h: int, z: float):
+    """(previsto, inferior, superior), cada um (n, h)."""
+    if modelo == "sazonal":
+        p, d = _sazonal(Y, h)
+        return p, p - z * d, p + z * d
+    if modelo == "ses":
+        p, d = _ses(Y, h)
+        return p, p - z * d, p + z * d
+    if modelo == "loglinear":
+        return _loglinear(Y, h, z)
+    raise ValueError(f"Modelo desconhecido: {modelo!r} (use {', '.join(MODELOS)}).")
+
+def escolher_modelos(Y: np.ndarray, teste: int = 12) -> tuple[np.ndarray, pd.DataFrame]:
+    """
+    Índice do melhor modelo por categoria (em MODELOS_BASE) pelo MAE nos últimos `teste`
+    meses, e a tabela de MAE (categoria × modelo).
+    """
+    treino, alvo = Y[:, :-teste], Y[:, -teste:]
+    mae = np.column_stack([
+        np.abs(_ajustar(treino, m, teste, 0.0)[0] - alvo).mean(axis=1) for m in MODELOS_BASE
+    ])
+    return mae.argmin(axis=1), pd.DataFrame(mae, columns=MODELOS_BASE)
+
+class PrevisaoCategorias:
+    """Previsões de todas as categorias: tabela longa + histórico para os gráficos."""
+
+    def __init__(self, df: pd.DataFrame, modelo: str = "auto", horizonte: int = 12,
+                 nivel: float = 0.95, meses_historico: int | None = 60, hoje=None, **cols):
+        self.categorias, self.meses, self.Y = matriz_mensal(df, meses=meses_historico, hoje=hoje, **cols)
+        n, T = self.Y.shape
+        z = _Z.get(nivel, 1.96)
+        h = int(horizonte)
+        if modelo == "auto" and T < 24:
+            modelo = "ses"   # sem histórico para separar 12 meses de teste com sazonalidade
+        self.modelo = modelo
+
+        if n == 0:
+            self.previsao = pd.DataFrame(columns=["CATEGORIA", "MES", "PREVISTO", "INFERIOR", "SUPERIOR", "MODELO"])
+            self.mae = pd.DataFrame(columns=MODELOS_BASE)
+            return
+
+        if modelo == "auto":
+            escolha, self.mae = escolher_modelos(self.Y)
+            p = np.empty((n, h)); lo = np.empty((n, h)); hi = np.empty((n, h))
+            for i, m in enumerate(MODELOS_BASE):
+                sel = escolha == i
+                if sel.any():
+                    p[sel], lo[sel], hi[sel] = _ajustar(self.Y[sel], m, h, z)
+            nomes = np.array(MODELOS_BASE)[escolha]
+        else:
+            p, lo, hi = _ajustar(self.Y, modelo, h, z)
+            self.mae = pd.DataFrame(columns=MODELOS_BASE)
+            nomes = np.full(n, modelo)
+
+        futuros = pd.period_range(self.meses[-1] + 1, periods=h, freq="M") if T else \
+            pd.period_range(pd.Period(pd.Timestamp.today(), freq="M"), periods=h, freq="M")
+        self.previsao = pd.DataFrame({
+            "CATEGORIA": np.repeat(self.categorias.to_numpy(), h),
+            "MES": np.tile(futuros.to_numpy(), n),
+            "PREVISTO": np.clip(p, 0, None).ravel(),
+            "INFERIOR": np.clip(lo, 0, None).ravel(),
+            "SUPERIOR": np.clip(hi, 0, None).ravel(),
+            "MODELO": np.repeat(nomes, h),
+        })
+
+    def resumo(self) -> pd.DataFrame:
+        """
+        CATEGORIA | ULTIMOS_12M | PREVISTO_12M | INFERIOR_12M | SUPERIOR_12M | VAR_% | MODELO,
+        do maior para o menor previsto.
+        """
+        if self.previsao.empty:
+            return pd.DataFrame(columns=["CATEGORIA", "ULTIMOS_12M", "PREVISTO_12M",
+                                         "INFERIOR_12M", "SUPERIOR_12M", "VAR_%", "MODELO"])
+        g = self.previsao.groupby("CATEGORIA", sort=False).agg(
+            PREVISTO_12M=("PREVISTO", "sum"), INFERIOR_12M=("INFERIOR", "sum"),
+            SUPERIOR_12M=("SUPERIOR", "sum"), MODELO=("MODELO", "first"),
+        )
+        ult = pd.Series(self.Y[:, -12:].sum(axis=1), index=self.categorias)
+        g.insert(0, "ULTIMOS_12M", ult.reindex(g.index).to_numpy())
+        g["VAR_%"] = np.where(g["ULTIMOS_12M"] > 0,
+                              (g["PREVISTO_12M"] / g["ULTIMOS_12M"].where(g["ULTIMOS_12M"] > 0) - 1) * 100.0, np.nan)
+        g = g[["ULTIMOS_12M", "PREVISTO_12M", "INFERIOR_12M", "SUPERIOR_12M", "VAR_%", "MODELO"]]
+        return g.sort_values("PREVISTO_12M", ascending=False).rename_axis("CATEGORIA").reset_index()
+
+    def historico(self, categoria: str) -> pd.DataFrame:
+        """MES | VALOR de uma categoria."""
+        i = self.categorias.get_indexer([categoria])[0]
+        if i < 0:
+            return pd.DataFrame(columns=["MES", "VALOR"])
+        return pd.DataFrame({"MES": self.meses, "VALOR": self.Y[i]})
+
+    def serie(self, categoria: str) -> pd.DataFrame:
+        """MES | PREVISTO | INFERIOR | SUPERIOR de uma categoria."""
+        return self.previsao[self.previsao["CATEGORIA"] == categoria].drop(columns="CATEGORIA").reset_index(drop=True)
+
+def prever_categorias(df: pd.DataFrame, modelo: str = "auto", horizonte: int = 12,
+                      nivel: float = 0.95, meses_historico: int | None = 60, hoje=None, **cols) -> PrevisaoCategorias:
+    return PrevisaoCategorias(df, modelo=modelo, horizonte=horizonte, nivel=nivel,
+                              meses_historico=meses_historico, hoje=hoje, **cols)
@@ -0,0 +1,155 @@
+# projetos_core.py
+"""
+Gastos por empreendimento (EMPRD_DESC) a partir de um cubo pré-agregado.
+
+Uma única passada sobre o ERP agrega PRCTTL_INSUMO por empreendimento × mês × categoria ×
+fornecedor × tipo de material (tudo em códigos inteiros). O cubo fica ordenado por
+empreendimento e guarda onde cada um começa: trocar de empreendimento é fatiar um intervalo
+de linhas do cubo, sem refiltrar a base.
+"""
+import numpy as np
+import pandas as pd
+
+def _codificar(s: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    limpo = s.astype("string").str.strip().replace({"": pd.NA, "nan": pd.NA, "None": pd.NA})
+    cod, cats = pd.factorize(limpo, use_na_sentinel=True)
+    return cod.astype(np.int64), pd.Index(cats)
+
+def _meses(datas: pd.Series) -> np.ndarray:
+    """Meses desde 1970-01 (int); NaT -> -1."""
+    dt = pd.to_datetime(datas, errors="coerce")
+    m = dt.to_numpy(dtype="datetime64[M]").astype(np.int64)
+    m[dt.isna().to_numpy()] = -1
+    return m
+
+class CuboProjetos:
+    """
+    Cubo empreendimento × mês × categoria × fornecedor × básico (valor e nº de linhas),
+    mais o resumo por empreendimento calculado na construção.
+    """
+
+    def __init__(self, df: pd.DataFrame,
+                 col_proj: str = "EMPRD_DESC",
+                 col_data: str = "OF_DATA",
+                 col_val: str = "PRCTTL_INSUMO",
+                 col_cat: str = "INSUMO_CATEGORIA",
+                 col_forn: str = "FORNECEDOR_CDG",
+                 col_forn_nome: str = "FORNECEDOR_DESC",
+                 col_of: str = "OF_CDG"):
+        p, self.projetos = _codificar(df[col_proj])
+        c, self.categorias = _codificar(df[col_cat]) if col_cat in df.columns else (np.full(len(df), -1), pd.Index([]))
+        f, self.fornecedores = _codificar(df[col_forn])
+        val = pd.to_numeric(df[col_val], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+        bas = (df["TIPO_MATERIAL"] == "BÁSICO").fillna(False).to_numpy(dtype=bool) \
+            if "TIPO_MATERIAL" in df.columns else np.zeros(len(df), dtype=bool)
+        mes = _meses(df[col_data])
+
+        # nome de exibição de cada fornecedor (primeira descrição vista)
+        nomes = pd.Series(df[col_forn_nome].to_numpy(), index=f) if col_forn_nome in df.columns else pd.Series(dtype=object)
+        nomes = nomes[nomes.index >= 0]
+        self.nomes_fornecedores = nomes[~nomes.index.duplicated()].reindex(range(len(self.fornecedores))).to_numpy()
+
+        ok = p >= 0
+        base = pd.DataFrame({"P": p[ok], "MES": mes[ok], "C": c[ok], "F": f[ok], "B": bas[ok], "VALOR": val[ok]})
+        fato = (
+            base.groupby(["P", "MES", "C", "F", "B"], sort=True)
+            .agg(VALOR=("VALOR", "sum"), LINHAS=("VALOR", "size"))
+            .reset_index()
+        )
+        self.fato = fato
+        n = len(self.projetos)
+        self.inicio = np.searchsorted(fato["P"].to_numpy(), np.arange(n + 1))
+        self._cod = {nome: i for i, nome in enumerate(self.projetos)}
+
+        # resumo por empreendimento (nº de OFs distintas sai de uma contagem à parte)
+        ofs = pd.Series(df[col_of].to_numpy()[ok]).groupby(p[ok]).nunique() if col_of in df.columns else None
+        g = fato.assign(VB=np.where(fato["B"], fato["VALOR"], 0.0), MV=fato["MES"].where(fato["MES"] >= 0))
+        r = g.groupby("P").agg(
+            VALOR_TOTAL=("VALOR", "sum"),
+            VALOR_BASICO=("VB", "sum"),
+            N_FORNECEDORES=("F", lambda s: int((s.unique() >= 0).sum())),
+            PRIMEIRO_MES=("MV", "min"),
+            ULTIMO_MES=("MV", "max"),
+        )
+        r = r.reindex(range(n))
+        resumo = pd.DataFrame({
+            "EMPREENDIMENTO": self.projetos,
+            "VALOR_TOTAL": r["VALOR_TOTAL"].fillna(0.0).to_numpy(),
+            "N_OFS": (ofs.reindex(range(n)).fillna(0).astype(int).to_numpy() if ofs is not None else 0),
+            "N_FORNECEDORES": r["N_FORNECEDORES"].fillna(0).astype(int).to_numpy(),
+            "PART_BASICO_%": np.where(r["VALOR_TOTAL"] > 0, r["VALOR_BASICO"] / r["VALOR_TOTAL"] * 100.0, 0.0),
+            "PRIMEIRO_MES": self._periodos(r["PRIMEIRO_MES"]),
+            "ULTIMO_MES": self._periodos(r["ULTIMO_MES"]),
+        })
+        self.resumo = resumo.sort_values("VALOR_TOTAL", ascending=False, kind="stable").reset_index(drop=True)
+
+    @staticmethod
+    def _periodos(meses) -> pd.PeriodIndex:
+        m = pd.Series(meses, dtype="float64")
+        dt = pd.to_datetime(m.fillna(0).astype(np.int64).to_numpy().astype("datetime64[M]"))
+        return pd.PeriodIndex(dt, freq="M").where(m.notna().to_numpy())
+
+    def nomes(self) -> list[str]:
+        """Empreendimentos do maior para o menor gasto."""
+        return self.resumo["EMPREENDIMENTO"].tolist()
+
+    def fatia(self, projeto: str) -> pd.DataFrame:
+        """Linhas do cubo de um empreendimento (intervalo contíguo, sem máscara)."""
+        i = self._cod.get(projeto)
+        if i is None:
+            return self.fato.iloc[0:0]
+        return self.fato.iloc[self.inicio[i]:self.inicio[i + 1]]
+
+    def por_mes(self, projeto: str) -> pd.DataFrame:
+        """MES (período) | VALOR_TOTAL | VALOR_BASICO."""
+        s = self.fatia(projeto)
+        s = s[s["MES"] >= 0]
+        if s.empty:
+            return pd.DataFrame(columns=["MES", "VALOR_TOTAL", "VALOR_BASICO"])
+        g = (
+            s.assign(VB=np.where(s["B"], s["VALOR"], 0.0))
+            .groupby("MES", sort=True)
+            .agg(VALOR_TOTAL=("VALOR", "sum"), VALOR_BASICO=("VB", "sum"))
+            .reset_index()
+        )
+        g["MES"] = self._periodos(g["MES"])
+        return g
+
+    def por_categoria(self, projeto: str, top_n: int | None = None) -> pd.DataFrame:
+        """CATEGORIA | VALOR_TOTAL | PART_%."""
+        s = self.fatia(projeto)
+        s = s[s["C"] >= 0]
+        g = s.groupby("C")["VALOR"].sum().sort_values(ascending=False)
+        total = g.sum()
+        out = pd.DataFrame({
+            "CATEGORIA": self.categorias[g.index.to_numpy()],
+            "VALOR_TOTAL": g.to_numpy(),
+            "PART_%": (g.to_numpy() / total * 100.0) if total > 0 else 0.0,
+        })
+        return out.head(top_n) if top_n else out
+
+    def por_fornecedor(self, projeto: str, top_n: int | None = 10) -> pd.DataFrame:
+        """FORNECEDOR_CDG | FORNECEDOR_DESC | VALOR_TOTAL | PART_%."""
+        s = self.fatia(projeto)
+        s = s[s["F"] >= 0]
+        g = s.groupby("F")["VALOR"].sum().sort_values(ascending=False)
+        total = g.sum()
+        idx = g.index.to_numpy()
+        out = pd.DataFrame({
+            "FORNECEDOR_CDG": self.fornecedores[idx],
+            "FORNECEDOR_DESC": self.nomes_fornecedores[idx],
+            "VALOR_TOTAL": g.to_numpy(),
+            "PART_%": (g.to_numpy() / total * 100.0) if total > 0 else 0.0,
+        })
+        return out.head(top_n) if top_n else out
+
+    def participacao_basicos(self, projeto: str) -> tuple[float, float, float]:
+        """(valor básico, valor total, % básico) do empreendimento."""
+        s = self.fatia(projeto)
+        total = float(s["VALOR"].sum())
+        basico = float(s.loc[s["B"], "VALOR"].sum())
+        return basico, total, (basico / total * 100.0) if total > 0 else 0.0
+
+def cubo_projetos(df: pd.DataFrame, **cols) -> CuboProjetos:
+    """Constrói o cubo de empreendimentos a partir do ERP (uma passada)."""
+    return CuboProjetos(df, **cols)
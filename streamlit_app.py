@@ -1,6 +1,8 @@
+import os
+import time
+_T0 = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-import altair as alt
 from pathlib import Path
 from datetime import datetime
 try:
@@ -9,39 +11,65 @@ try:
 except Exception:
     _TZ = None
 
+# ---------- Marcas de tempo da inicialização (benchmarks/bench_inicializacao.py) ----------
+_MARCAS: dict[str, float] = {}
+
+def _marcar(nome: str):
+    _MARCAS[nome] = time.perf_counter() - _T0
+
+# Esqueleto primeiro: título e aviso saem antes dos imports pesados e da carga das bases
+st.set_page_config(page_title="Suprimentos • Indicadores & Fornecedores", layout="wide")
+st.title("Suprimentos • Indicadores e Fornecedores")
+_aviso_carga = st.empty()
+_aviso_carga.info("Carregando bases e indicadores…")
+_marcar("primeira_pintura")
+
+import pandas as pd
+
 from Tratamento_Indicadores import (
     carregar_bases,
-    fornecedor_top_por_uf,
-    maior_ordem_fornecimento,
-    menor_ordem_fornecimento,
-    valor_medio_por_of,
-    percentual_ofs_basicas_ultimo_ano,
-    mes_maior_volume_ultimo_ano,
     _format_brl,
-    quantidade_empresas_que_venderam_ultimos_3_anos,
-    meses_top3_volume_geral,
-    maior_compra_item_unico,
-    menor_compra_item_unico,
-    valor_medio_por_item,
-    categorias_mais_compradas_ultimos_anos,
     categorias_basicos_distintos,
     fornecedores_basicos_por_local_cadastro,
+    matriz_basicos_uf,
+    cobertura_basicos_por_uf,
     itens_da_of,
     categorias_com_venda_continua_ultimos_anos,
     categorias_crescimento_desde_2015,
+    indice_precos_item,
+    itens_preco_fora_do_mercado,
+    concentracao_fornecedores,
+    lead_time_requisicao,
 )
 
 from fornecedores_core import (
     carregar_fornecedores,
     total_empresas_cadastradas,
-    serie_fornecedores_ativos_ultimos_anos,
     serie_fornecedores_cadastrados_por_ano,
+    serie_fornecedores_ativos_rolante,
 )
-
-st.set_page_config(page_title="Suprimentos • Indicadores & Fornecedores", layout="wide")
-st.title("Suprimentos • Indicadores e Fornecedores")
+from distintos_core import indice_atividade
+from plano_core import PlanoIndicadores
+from projetos_core import cubo_projetos
+from previsao_core import prever_categorias, MODELOS as MODELOS_PREVISAO
+from anomalias_core import detectar_anomalias
+from validacao_core import validar_bases, UFS_BR
+from coortes_core import coortes_fornecedores, COORTES
+from comparativo_core import agregados_mensais, MODOS as MODOS_COMPARACAO
+from atualizador_core import AtualizadorBases, Adiado
+from impressao_core import hash_arquivo, impressao_arquivos, impressao_derivada
+from filtros_core import indice_filtros
+from ultimo_fornecedor_core import carregar_ult_forn, tabela_ultimo_fornecedor, UltimoFornecedor
+from compartilhado_core import base_compartilhada
+from exportacao_core import ArquivoMapeado, download_sob_demanda, FORMATOS, filtrar_erp, mascara_erp, exportar_bytes
+_marcar("imports")
 
 # ---------- Helpers ----------
+def _alt():
+    """altair só é importado quando o 1º gráfico é montado."""
+    import altair as alt
+    return alt
+
 def _safe(fn, *a, **k):
     try:
         return fn(*a, **k)
@@ -113,8 +141,8 @@ def _fmt_dt_br(ts: float) -> str:
     except Exception:
         return "—"
 
-@st.cache_data(ttl=300, show_spinner=False)
-def _repo_files_info():
+@st.cache_data(show_spinner=False, max_entries=4)
+def _repo_files_info(impressao: str):
     base_dir = Path(__file__).parent
     files = [
         {"name": "total_indicadores.xlsx",  "path": base_dir / "total_indicadores.xlsx"},
@@ -141,99 +169,365 @@ def _repo_files_info():
             })
     return {"files": out, "max_ts": mx, "max_str": _fmt_dt_br(mx) if mx else "—"}
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def _read_file_bytes(path: str):
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _arquivo_mapeado(path: str, impressao: str):
+    # cache_resource: um único mapa por conteúdo, compartilhado entre sessões (sem cópia)
     try:
-        return Path(path).read_bytes()
+        return ArquivoMapeado(path)
     except Exception:
         return None
 
-@st.cache_data(ttl=3600, show_spinner=False)
+# ---------- Bases: versão atual (recarga em segundo plano + troca atômica) ----------
+def _executar_painel(df_erp, indice_ativos, indice_vendas):
+    """Indicadores do painel num único plano (janelas e agrupamentos compartilhados)."""
+    plano = PlanoIndicadores(df_erp, indice_ativos=indice_ativos, indice_vendas=indice_vendas)
+    plano.pedir("valor_medio_por_of")
+    plano.pedir("percentual_ofs_basicas_ultimo_ano")
+    plano.pedir("quantidade_empresas_que_venderam_ultimos_3_anos")
+    plano.pedir("valor_medio_por_item")
+    plano.pedir("fornecedor_top_por_uf", como="top_uf_10", anos=10)
+    plano.pedir("fornecedor_top_por_uf", como="top_uf_2", anos=2)
+    plano.pedir("maior_ordem_fornecimento")
+    plano.pedir("menor_ordem_fornecimento")
+    plano.pedir("maior_compra_item_unico")
+    plano.pedir("menor_compra_item_unico")
+    plano.pedir("mes_maior_volume_ultimo_ano", top_n=3)
+    plano.pedir("meses_top3_volume_geral", top_n=3)
+    plano.pedir("serie_fornecedores_ativos_ultimos_anos", anos=10)
+    plano.pedir("categorias_mais_compradas_ultimos_anos", como="categorias_5", anos=5)
+    return plano.executar()
+
+def _construir_versao() -> dict:
+    # base tipada publicada uma vez em memória compartilhada; outros processos só mapeiam
+    base_dir = Path(__file__).parent
+    imp_erp = impressao_arquivos([base_dir / "total_indicadores.xlsx", base_dir / "MateriaisBasicos.xlsx"])
+    imp_forn = impressao_arquivos([base_dir / "FornecedoresAtivos.xlsx"])
+    df_erp = base_compartilhada("erp", imp_erp, carregar_bases)
+    df_forn = base_compartilhada("fornecedores", imp_forn, carregar_fornecedores)
+    dados = _derivados(df_erp, df_forn)
+    dados["indice_filtros"] = Adiado(lambda: indice_filtros(df_erp))
+    # validação pós-carga: uma vez por versão (mesma impressão digital das bases)
+    dados["validacao"] = Adiado(lambda: validar_bases(df_erp, df_forn))
+    # escores de anomalia sempre sobre a base completa (o limiar é aplicado na consulta)
+    dados["anomalias"] = Adiado(lambda: detectar_anomalias(df_erp))
+    # último fornecedor/preço por item: tabela publicada em memória compartilhada, índice hash por processo
+    imp_ult = impressao_derivada(imp_erp, "ultimo_fornecedor", ult=hash_arquivo(base_dir / "UltForn.xlsx"))
+    dados["ultimo_fornecedor"] = Adiado(lambda: UltimoFornecedor(base_compartilhada(
+        "ultimo_fornecedor", imp_ult, lambda: tabela_ultimo_fornecedor(df_erp, carregar_ult_forn()))))
+    return dados
+
+def _derivados(df_erp, df_forn) -> dict:
+    """Dados do painel sobre uma base ERP (completa ou recortada pelos filtros globais)."""
+    # Índices de fornecedores ativos por mês (contagens distintas por janela = união de bitmaps)
+    # Derivados adiados: na 1ª carga saem quando a seção que os usa é desenhada
+    ind_ativos = Adiado(lambda: indice_atividade(df_erp, col_id="FORNECEDOR_CDG", col_data="OF_DATA"))
+    ind_vendas = Adiado(lambda: indice_atividade(df_erp, col_id="FORNECEDOR_CDG", col_data="OF_DATA",
+                                                 col_valor="PRCTTL_INSUMO"))
+    return {
+        "df_erp": df_erp,
+        "df_forn": df_forn,
+        "indice_ativos": ind_ativos,
+        "indice_vendas": ind_vendas,
+        "indice_precos": Adiado(lambda: indice_precos_item(df_erp)),
+        "painel": Adiado(lambda: _executar_painel(df_erp, ind_ativos.valor(), ind_vendas.valor())),
+        "cubo_projetos": Adiado(lambda: cubo_projetos(df_erp)),
+        "coortes": Adiado(lambda: coortes_fornecedores(df_erp, df_forn)),
+        # Matriz UF × categoria básica do cadastro: contadores por local e mapa nacional são fatias dela
+        "basicos_uf": Adiado(lambda: matriz_basicos_uf(df_forn, df_erp)),
+        # Agregados mensais acumulados: KPIs de qualquer par de períodos por diferença
+        "agregados_mensais": Adiado(lambda: agregados_mensais(df_erp, df_forn, indice_vendas=ind_vendas.valor())),
+    }
+
+@st.cache_resource(show_spinner="Carregando bases…")
+def _atualizador():
+    base_dir = Path(__file__).parent
+    arquivos = [base_dir / n for n in ("total_indicadores.xlsx", "FornecedoresAtivos.xlsx", "MateriaisBasicos.xlsx",
+                                          "UltForn.xlsx")]
+    return AtualizadorBases(arquivos, construir=_construir_versao, intervalo=30).iniciar()
+
+_versao = _atualizador().atual()
+
+# ---------- Filtros globais (barra lateral) ----------
+def _filtros_barra_lateral(idx) -> dict:
+    with st.sidebar:
+        st.header("Filtros")
+        meses = [str(p) for p in idx.opcoes("mes")]   # "AAAA-MM"
+        filtros = {}
+        if meses:
+            ini, fim = st.select_slider(
+                "Período (mês da OF)", options=meses, value=(meses[0], meses[-1]),
+                format_func=lambda m: f"{m[5:]}/{m[:4]}", key="f_periodo",
+            )
+            if (ini, fim) != (meses[0], meses[-1]):
+                filtros.update(inicio=ini, fim=fim)
+        for dim, rotulo in (("uf", "UF"), ("categoria", "Categoria"),
+                            ("tipo", "Tipo de material"), ("fornecedor", "Fornecedor")):
+            sel = st.multiselect(rotulo, idx.opcoes(dim), key=f"f_{dim}")
+            if sel:
+                filtros[dim] = sorted(sel)
+        if sum(1 for d in ("uf", "categoria", "tipo", "fornecedor") if d in filtros) > 1:
+            modo = st.radio("Combinar UF/categoria/tipo/fornecedor", ["E", "OU"], horizontal=True, key="f_modo")
+            if modo != "E":
+                filtros["modo"] = modo
+        st.divider()
+        limiar = st.slider("Limiar de anomalia (|z| robusto)", 2.5, 8.0, 3.5, 0.5, key="f_limiar_anomalia")
+        if st.checkbox("Excluir anomalias dos indicadores", key="f_sem_anomalias",
+                       help="Remove linhas com total/preço unitário fora do padrão e OFs com total fora do padrão."):
+            filtros["sem_anomalias"] = limiar
+        m = _mascara_global(idx, filtros)
+        n = idx.n if m is None else int(m.sum())
+        st.caption(f"{_format_int_br(n)} de {_format_int_br(idx.n)} linhas do ERP. "
+                   "Os filtros valem para as seções calculadas sobre o ERP; as janelas "
+                   "de cada seção (último ano, últimos 5 anos...) se aplicam dentro do recorte.")
+    return filtros
+
+def _mascara_global(idx, filtros: dict):
+    """Máscara dos filtros da barra lateral (None = base inteira), incluindo a exclusão de anomalias."""
+    f = {k: v for k, v in filtros.items() if k != "sem_anomalias"}
+    m = idx.mascara(**f)
+    if "sem_anomalias" in filtros:
+        ok = ~_versao.dados["anomalias"].valor().mascara_linhas(filtros["sem_anomalias"])
+        m = ok if m is None else (m & ok)
+    return m
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _dados_filtrados(chave: str, _idx, _df_forn, _filtros: dict) -> dict:
+    # chave = impressão da versão + filtros; os demais argumentos não entram no hash
+    m = _mascara_global(_idx, _filtros)
+    dados = _derivados(_idx.df if m is None else _idx.df[m], _df_forn)
+    return dados
+
+_filtros = _filtros_barra_lateral(_versao.dados["indice_filtros"].valor())
+if _filtros:
+    _chave = impressao_derivada(_versao.impressao, "filtros", **_filtros)
+    _dados = _dados_filtrados(_chave, _versao.dados["indice_filtros"].valor(), _versao.dados["df_forn"], _filtros)
+else:
+    _chave, _dados = _versao.impressao, _versao.dados
+
 def _load_df_erp():
-    return carregar_bases()
+    return _dados["df_erp"]
 
-@st.cache_data(ttl=3600, show_spinner=False)
 def _load_df_forn():
-    return carregar_fornecedores()
+    return _dados["df_forn"]
+
+def _indice_ativos():
+    return _dados["indice_ativos"].valor()
+
+def _indice_vendas():
+    return _dados["indice_vendas"].valor()
+
+def _indice_precos():
+    return _dados["indice_precos"].valor()
+
+def _painel():
+    return _dados["painel"].valor()
+
+def _cubo_projetos():
+    return _dados["cubo_projetos"].valor()
+
+def _coortes():
+    return _dados["coortes"].valor()
+
+def _matriz_basicos_uf():
+    return _dados["basicos_uf"].valor()
+
+def _agregados_mensais():
+    return _dados["agregados_mensais"].valor()
+
+def _com_ultimo_fornecedor(df_itens: pd.DataFrame) -> pd.DataFrame:
+    # sempre sobre a base completa: a última compra do item não depende dos filtros
+    idx = _safe(_versao.dados["ultimo_fornecedor"].valor)
+    return idx.anexar(df_itens) if idx is not None else df_itens
+
+_COLS_ULTIMO = {
+    "ULT_FORNECEDOR": st.column_config.TextColumn("ÚLT. FORNECEDOR"),
+    "ULT_DATA":       st.column_config.DateColumn("ÚLT. COMPRA", format="DD/MM/YYYY"),
+    "ULT_PRECO_UNIT": st.column_config.NumberColumn("ÚLT. PREÇO UNIT.", format="%.2f"),
+}
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _serie_ativos_rolante(janela_meses: int, impressao: str):
+    return serie_fornecedores_ativos_rolante(None, janela_meses=janela_meses, indice=_indice_ativos())
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _previsao(modelo: str, impressao: str):
+    # todas as categorias de uma vez (modelos vetorizados sobre a matriz categoria × mês)
+    return prever_categorias(_load_df_erp(), modelo=modelo)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _lead_time(por: str | None, anos: int | None, impressao: str):
+    return lead_time_requisicao(_load_df_erp(), por=por, anos=anos)
+
+def _res(chave: str):
+    r = _painel().get(chave)
+    if isinstance(r, Exception):
+        st.warning(f"Não consegui calcular **{chave}**: {r}")
+        return None
+    return r
 
 df_erp = _load_df_erp()
 df_forn = _load_df_forn()
-df = df_erp.copy()
+df = df_erp  # as funções do Tratamento copiam o que alteram
+_aviso_carga.empty()
+_marcar("bases_prontas")
 
 # ——— Bases (carimbo + downloads em um único container) ———
-info = _repo_files_info()
+info = _repo_files_info(_versao.impressao)
 
 with st.container(border=True):
     st.subheader("🗓️ Atualização das bases (repositório)")
-    st.markdown(f"**Atualizado em:** {info['max_str']}")
+    st.markdown(f"**Atualizado em:** {_fmt_dt_br(_versao.max_mtime) if _versao.max_mtime else '—'}")
+    if _atualizador().ultimo_erro:
+        st.caption(f"Última tentativa de recarga falhou (mantida a versão anterior): {_atualizador().ultimo_erro}")
 
     # arquivos esperados (na ordem definida no helper)
     f1, f2 = info["files"][0], info["files"][1]
     c1, c2 = st.columns(2)
 
     with c1:
-        data1 = _read_file_bytes(f1["path"]) if f1["found"] else None
+        m1 = _arquivo_mapeado(f1["path"], hash_arquivo(f1["path"])) if f1["found"] else None
         st.download_button(
             "Baixar total_indicadores.xlsx",
-            data=data1 if data1 is not None else b"",
+            data=download_sob_demanda(f1["path"], m1) if m1 is not None else b"",
             file_name="total_indicadores.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            disabled=(data1 is None),
+            disabled=(m1 is None),
         )
 
     with c2:
-        data2 = _read_file_bytes(f2["path"]) if f2["found"] else None
+        m2 = _arquivo_mapeado(f2["path"], hash_arquivo(f2["path"])) if f2["found"] else None
         st.download_button(
             "Baixar FornecedoresAtivos.xlsx",
-            data=data2 if data2 is not None else b"",
+            data=download_sob_demanda(f2["path"], m2) if m2 is not None else b"",
             file_name="FornecedoresAtivos.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            disabled=(data2 is None),
+            disabled=(m2 is None),
         )
 
+# ---------- Qualidade dos dados ----------
+with st.container(border=True):
+    st.subheader("🩺 Qualidade dos dados")
+    rel = _safe(_versao.dados["validacao"].valor)
+    if rel is not None:
+        q1, q2, q3 = st.columns(3)
+        n_erp = rel.linhas_por_base.get("erp", 0)
+        n_err = rel.linhas_com_erro.get("erp", 0)
+        q1.metric("Linhas do ERP avaliadas", _format_int_br(n_erp))
+        q2.metric("Linhas do ERP com erro", _format_int_br(n_err),
+                  help="Linhas com ao menos uma violação de severidade \"erro\".")
+        q3.metric("% do ERP com erro", _format_pct_br((n_err / n_erp * 100.0) if n_erp else 0.0))
+
+        viol = rel.violadas()
+        if not viol.empty:
+            st.dataframe(
+                _fmt_df_brl(viol, ints=["VIOLACOES"], pcts=["PCT_%"]),
+                use_container_width=True, hide_index=True,
+                column_config={
+                    "BASE":       st.column_config.TextColumn("BASE"),
+                    "REGRA":      st.column_config.TextColumn("REGRA"),
+                    "DESCRICAO":  st.column_config.TextColumn("DESCRIÇÃO"),
+                    "SEVERIDADE": st.column_config.TextColumn("SEVERIDADE"),
+                    "VIOLACOES":  st.column_config.TextColumn("VIOLAÇÕES"),
+                    "PCT_%":      st.column_config.TextColumn("% DA BASE"),
+                },
+            )
+            with st.expander("Linhas de exemplo"):
+                opcoes = list(zip(viol["BASE"], viol["REGRA"]))
+                base_regra = st.selectbox("Regra", opcoes, key="qualidade_regra",
+                                          format_func=lambda br: f"{br[0]} — {br[1]}")
+                st.dataframe(rel.amostra(*base_regra), use_container_width=True, hide_index=True)
+        else:
+            st.success("Nenhuma violação encontrada nas regras de validação.")
+        st.caption(f"{len(rel.resumo)} regras avaliadas sobre a versão carregada das bases.")
+    else:
+        st.info("Sem dados para exibir.")
+
 # ---------- KPIs ----------
 with st.container(border=True):
     st.subheader("📊 Resumo")
+    _opcoes_cmp = ["Sem comparação", *MODOS_COMPARACAO]
+    modo_cmp = st.selectbox(
+        "Comparar períodos", _opcoes_cmp, key="resumo_comparacao",
+        format_func=lambda m: MODOS_COMPARACAO.get(m, m),
+    )
     k1, k2, k3, k4, k5, k6 = st.columns(6)
+    if modo_cmp != "Sem comparação":
+        cmp = _agregados_mensais().comparar(modo_cmp).set_index("KPI")
 
-    # Valor médio por OF
-    vm = _safe(valor_medio_por_of, df)
-    media = vm[0] if vm and isinstance(vm, tuple) else 0
-    k1.metric("Valor médio por OF", _format_brl(round(media, 2)))
+        def _delta(kpi: str, pp: bool = False):
+            if kpi not in cmp.index:
+                return None
+            r = cmp.loc[kpi]
+            if pp:
+                return f"{r['VAR_ABS']:+.1f}".replace(".", ",") + " p.p."
+            return None if pd.isna(r["VAR_%"]) else f"{r['VAR_%']:+.1f}%".replace(".", ",")
 
-    # % OFs básicas (último ano)
-    pct_grp = _safe(percentual_ofs_basicas_ultimo_ano, df)
-    pct = pct_grp[0] if pct_grp and isinstance(pct_grp, tuple) else 0.0
-    k2.metric("% de OFs BÁSICAS (último ano)", _format_pct_br(pct))
+        def _atual(kpi: str, padrao=0):
+            return cmp.loc[kpi, "ATUAL"] if kpi in cmp.index else padrao
 
-    # Fornecedores cadastrados (base de cadastro)
-    try:
-        total_cad = total_empresas_cadastradas(df_forn)
-        k3.metric("Fornecedores cadastrados", f"{total_cad}")
-    except Exception as e:
-        k3.metric("Fornecedores cadastrados", "—")
-        st.caption(f"Diagnóstico: {e}")
+        k1.metric("Valor médio por OF", _format_brl(round(_atual("valor_medio_por_of"), 2)),
+                  delta=_delta("valor_medio_por_of"))
+        k2.metric("% de OFs BÁSICAS", _format_pct_br(_atual("pct_ofs_basicas")),
+                  delta=_delta("pct_ofs_basicas", pp=True))
+        try:
+            k3.metric("Fornecedores cadastrados", f"{total_empresas_cadastradas(df_forn)}")
+        except Exception:
+            k3.metric("Fornecedores cadastrados", "—")
+        k4.metric("Empresas que venderam", _format_int_br(_atual("empresas_que_venderam")),
+                  delta=_delta("empresas_que_venderam"))
+        if "cadastrados" in cmp.index:
+            k5.metric("Cadastrados no período", _format_int_br(_atual("cadastrados")),
+                      delta=_delta("cadastrados"))
+        k6.metric("Ticket médio por ITEM", _format_brl(round(_atual("ticket_medio_item"), 2)),
+                  delta=_delta("ticket_medio_item"))
+        st.caption(f"Período atual: {cmp.attrs['periodo_atual']} · anterior: {cmp.attrs['periodo_anterior']} "
+                   "(pela data da OF; o período anterior termina no mesmo dia, um ano antes). "
+                   "Variação em % do período anterior; % de OFs básicas em p.p.")
+    else:
+        if not _dados["painel"].pronto:
+            with st.spinner("Calculando indicadores…"):
+                _painel()
 
-    # NOVO KPI: Empresas que venderam (últimos 3 anos)
-    qtd_vend = _safe(quantidade_empresas_que_venderam_ultimos_3_anos, df)
-    qtd_vend = qtd_vend if isinstance(qtd_vend, (int, float)) else 0
-    k4.metric("Empresas que venderam (últimos 3 anos)", _format_int_br(qtd_vend))
+        # Valor médio por OF
+        vm = _res("valor_medio_por_of")
+        media = vm[0] if vm and isinstance(vm, tuple) else 0
+        k1.metric("Valor médio por OF", _format_brl(round(media, 2)))
 
-    # Cadastrados no último ano
-    try:
-        cad_serie = serie_fornecedores_cadastrados_por_ano(df_forn, anos=1)
-        cad_no_ano = int(cad_serie["FORNECEDORES_CADASTRADOS"].sum()) if not cad_serie.empty else 0
-        k5.metric("Cadastrados no último ano", f"{cad_no_ano}")
-    except Exception:
-        pass
+        # % OFs básicas (último ano)
+        pct_grp = _res("percentual_ofs_basicas_ultimo_ano")
+        pct = pct_grp[0] if pct_grp and isinstance(pct_grp, tuple) else 0.0
+        k2.metric("% de OFs BÁSICAS (último ano)", _format_pct_br(pct))
 
-    # Ticket médio por ITEM (linha)
-    try:
-        vm_item = _safe(valor_medio_por_item, df)
-        media_item = vm_item[0] if vm_item and isinstance(vm_item, tuple) else 0
-        k6.metric("Ticket médio por ITEM", _format_brl(round(media_item, 2)))
-    except Exception:
-        k6.metric("Ticket médio por ITEM", "—")
+        # Fornecedores cadastrados (base de cadastro)
+        try:
+            total_cad = total_empresas_cadastradas(df_forn)
+            k3.metric("Fornecedores cadastrados", f"{total_cad}")
+        except Exception as e:
+            k3.metric("Fornecedores cadastrados", "—")
+            st.caption(f"Diagnóstico: {e}")
+
+        # NOVO KPI: Empresas que venderam (últimos 3 anos)
+        qtd_vend = _res("quantidade_empresas_que_venderam_ultimos_3_anos")
+        qtd_vend = qtd_vend if isinstance(qtd_vend, (int, float)) else 0
+        k4.metric("Empresas que venderam (últimos 3 anos)", _format_int_br(qtd_vend))
+
+        # Cadastrados no último ano
+        try:
+            cad_serie = serie_fornecedores_cadastrados_por_ano(df_forn, anos=1)
+            cad_no_ano = int(cad_serie["FORNECEDORES_CADASTRADOS"].sum()) if not cad_serie.empty else 0
+            k5.metric("Cadastrados no último ano", f"{cad_no_ano}")
+        except Exception:
+            pass
+
+        # Ticket médio por ITEM (linha)
+        try:
+            vm_item = _res("valor_medio_por_item")
+            media_item = vm_item[0] if vm_item and isinstance(vm_item, tuple) else 0
+            k6.metric("Ticket médio por ITEM", _format_brl(round(media_item, 2)))
+        except Exception:
+            k6.metric("Ticket médio por ITEM", "—")
+
+_marcar("resumo")
 
 # ---------- TOP fornecedores ----------
 with st.container(border=True):
@@ -242,7 +536,7 @@ with st.container(border=True):
 
     with c1:
         st.caption("Últimos 10 anos")
-        df_top10 = _safe(fornecedor_top_por_uf, df, anos=10)
+        df_top10 = _res("top_uf_10")
         if isinstance(df_top10, pd.DataFrame) and not df_top10.empty:
             if "FORNECEDOR_CDG" in df_top10.columns:
                 df_top10["FORNECEDOR_CDG"] = df_top10["FORNECEDOR_CDG"].astype("string")
@@ -263,7 +557,7 @@ with st.container(border=True):
 
     with c2:
         st.caption("Últimos 2 anos")
-        df_top2 = _safe(fornecedor_top_por_uf, df, anos=2)
+        df_top2 = _res("top_uf_2")
         if isinstance(df_top2, pd.DataFrame) and not df_top2.empty:
             if "FORNECEDOR_CDG" in df_top2.columns:
                 df_top2["FORNECEDOR_CDG"] = df_top2["FORNECEDOR_CDG"].astype("string")
@@ -289,7 +583,7 @@ with st.container(border=True):
 
     with c1:
         st.markdown("**🏆 Maior OF**")
-        df_max = _safe(maior_ordem_fornecimento, df)
+        df_max = _res("maior_ordem_fornecimento")
         if isinstance(df_max, pd.DataFrame) and not df_max.empty:
             df_max = _round_cols(df_max, ["VALOR_TOTAL", "ITEM_PRCUNTPED", "PRCTTL_INSUMO", "TOTAL"])
             df_max_fmt = _fmt_df_brl(
@@ -317,7 +611,7 @@ with st.container(border=True):
                 with st.expander("Ver itens da OF (Top 5)"):
                     mostrar_todos = st.checkbox("Mostrar todos os itens", key="itens_maior_of_all", value=False)
                     top_n = None if mostrar_todos else 5
-                    df_itens = itens_da_of(df, of_cdg=of_alvo, top_n=top_n)
+                    df_itens = _com_ultimo_fornecedor(itens_da_of(df, of_cdg=of_alvo, top_n=top_n))
         
                     if isinstance(df_itens, pd.DataFrame) and not df_itens.empty:
                         st.dataframe(
@@ -330,6 +624,7 @@ with st.container(border=True):
                                 "QUANTIDADE":  st.column_config.NumberColumn("QTDE", format="%.2f"),
                                 "PRECO_UNIT":  st.column_config.NumberColumn("PREÇO UNIT.", format="%.2f"),
                                 "PRECO_TOTAL": st.column_config.NumberColumn("PREÇO TOTAL", format="%.2f"),
+                                **_COLS_ULTIMO,
                             },
                         )
                     else:
@@ -339,7 +634,7 @@ with st.container(border=True):
 
     with c2:
         st.markdown("**🧩 Menor OF**")
-        df_min = _safe(menor_ordem_fornecimento, df)
+        df_min = _res("menor_ordem_fornecimento")
         if isinstance(df_min, pd.DataFrame) and not df_min.empty:
             df_min = _round_cols(df_min, ["VALOR_TOTAL", "ITEM_PRCUNTPED", "PRCTTL_INSUMO", "TOTAL"])
             df_min_fmt = _fmt_df_brl(
@@ -368,7 +663,7 @@ with st.container(border=True):
                 with st.expander("Ver itens da OF (Top 5)"):
                     mostrar_todos = st.checkbox("Mostrar todos os itens", key="itens_menor_of_all", value=False)
                     top_n = None if mostrar_todos else 5
-                    df_itens = itens_da_of(df, of_cdg=of_alvo, top_n=top_n)
+                    df_itens = _com_ultimo_fornecedor(itens_da_of(df, of_cdg=of_alvo, top_n=top_n))
         
                     if isinstance(df_itens, pd.DataFrame) and not df_itens.empty:
                         st.dataframe(
@@ -381,6 +676,7 @@ with st.container(border=True):
                                 "QUANTIDADE":  st.column_config.NumberColumn("QTDE", format="%.2f"),
                                 "PRECO_UNIT":  st.column_config.NumberColumn("PREÇO UNIT.", format="%.2f"),
                                 "PRECO_TOTAL": st.column_config.NumberColumn("PREÇO TOTAL", format="%.2f"),
+                                **_COLS_ULTIMO,
                             },
                         )
                     else:
@@ -390,11 +686,11 @@ with st.container(border=True):
 
     with st.container(border=True):
         st.subheader("🧱 Maior compra de um item (única linha)")
-        df_itemmax = _safe(maior_compra_item_unico, df)
+        df_itemmax = _res("maior_compra_item_unico")
         if isinstance(df_itemmax, pd.DataFrame) and not df_itemmax.empty:
             df_itemmax_fmt = _fmt_df_brl(
-                df_itemmax,
-                money=["PRECO_TOTAL"],
+                _com_ultimo_fornecedor(df_itemmax),
+                money=["PRECO_TOTAL", "ULT_PRECO_UNIT"],
                 decimals=["QUANTIDADE"]
             )
             st.dataframe(
@@ -406,6 +702,8 @@ with st.container(border=True):
                     "INSUMO_DESC": st.column_config.TextColumn("DESCRIÇÃO DO INSUMO"),
                     "QUANTIDADE":  st.column_config.TextColumn("QTDE"),
                     "PRECO_TOTAL": st.column_config.TextColumn("PREÇO TOTAL"),
+                    **_COLS_ULTIMO,
+                    "ULT_PRECO_UNIT": st.column_config.TextColumn("ÚLT. PREÇO UNIT."),
                 },
             )
         else:
@@ -413,11 +711,11 @@ with st.container(border=True):
 
     with st.container(border=True):
         st.subheader("🧱 Menor compra de um item (única linha)")
-        df_itemmin = _safe(menor_compra_item_unico, df)
+        df_itemmin = _res("menor_compra_item_unico")
         if isinstance(df_itemmin, pd.DataFrame) and not df_itemmin.empty:
             df_itemmin_fmt = _fmt_df_brl(
-                df_itemmin,
-                money=["PRECO_TOTAL"],
+                _com_ultimo_fornecedor(df_itemmin),
+                money=["PRECO_TOTAL", "ULT_PRECO_UNIT"],
                 decimals=["QUANTIDADE"]
             )
             st.dataframe(
@@ -429,12 +727,107 @@ with st.container(border=True):
                     "INSUMO_DESC": st.column_config.TextColumn("DESCRIÇÃO DO INSUMO"),
                     "QUANTIDADE":  st.column_config.TextColumn("QTDE"),
                     "PRECO_TOTAL": st.column_config.TextColumn("PREÇO TOTAL"),
+                    **_COLS_ULTIMO,
+                    "ULT_PRECO_UNIT": st.column_config.TextColumn("ÚLT. PREÇO UNIT."),
                 },
             )
         else:
             st.info("Sem dados para exibir.")
 
 
+# ---------- Preços fora do histórico ----------
+with st.container(border=True):
+    st.subheader("💲 Linhas com preço acima do histórico do item")
+    df_pfm = _safe(itens_preco_fora_do_mercado, df, indice=_indice_precos(), top_n=20)
+    if isinstance(df_pfm, pd.DataFrame) and not df_pfm.empty:
+        df_pfm = df_pfm.copy()
+        if "OF_DATA" in df_pfm.columns:
+            df_pfm["OF_DATA"] = pd.to_datetime(df_pfm["OF_DATA"], errors="coerce").dt.strftime("%d/%m/%Y")
+        df_pfm_fmt = _fmt_df_brl(
+            df_pfm.drop(columns=["OUTLIER"]),
+            money=["ITEM_PRCUNTPED", "MEDIANA_ITEM"],
+            ints=["N_HIST"],
+            pcts=["PERCENTIL_PRECO", "EXCESSO_%"],
+        )
+        st.dataframe(
+            df_pfm_fmt,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "INSUMO_CDG":      st.column_config.TextColumn("CÓDIGO"),
+                "INSUMO_DESC":     st.column_config.TextColumn("DESCRIÇÃO DO INSUMO"),
+                "ITEM_PRCUNTPED":  st.column_config.TextColumn("PREÇO UNIT."),
+                "MEDIANA_ITEM":    st.column_config.TextColumn("MEDIANA DO ITEM"),
+                "N_HIST":          st.column_config.TextColumn("COMPRAS NO HISTÓRICO"),
+                "PERCENTIL_PRECO": st.column_config.TextColumn("PERCENTIL"),
+                "EXCESSO_%":       st.column_config.TextColumn("ACIMA DA MEDIANA"),
+            },
+        )
+        st.caption("Fora da cerca de Tukey (Q3 + 1,5·IQR) do histórico de preços do item; itens com ao menos 5 compras.")
+    else:
+        st.info("Nenhuma linha acima do histórico do item.")
+
+# ---------- Anomalias ----------
+with st.container(border=True):
+    st.subheader("🚨 Anomalias (prováveis erros de digitação)")
+    det = _safe(_versao.dados["anomalias"].valor)
+    if det is not None:
+        limiar_anom = st.session_state.get("f_limiar_anomalia", 3.5)
+        # recorte dos filtros da barra lateral, sem a própria exclusão de anomalias
+        idx_f = _versao.dados["indice_filtros"].valor()
+        m_anom = idx_f.mascara(**{k: v for k, v in _filtros.items() if k != "sem_anomalias"})
+        ofs_anom = det.ofs(limiar_anom, mascara=m_anom, top_n=None)
+        lin_anom = det.linhas(limiar_anom, mascara=m_anom, top_n=None)
+        a1, a2, a3 = st.columns(3)
+        a1.metric("OFs com total fora do padrão", _format_int_br(len(ofs_anom)))
+        a2.metric("Linhas com total/preço fora do padrão", _format_int_br(len(lin_anom)))
+        n_mask = det.mascara_linhas(limiar_anom) if m_anom is None else det.mascara_linhas(limiar_anom) & m_anom
+        a3.metric("Linhas excluídas ao marcar a opção", _format_int_br(int(n_mask.sum())))
+
+        t1, t2 = st.tabs(["OFs", "Linhas"])
+        with t1:
+            if not ofs_anom.empty:
+                st.dataframe(
+                    _fmt_df_brl(ofs_anom.head(30), money=["VALOR_TOTAL"], decimals=["Z_OF"]),
+                    use_container_width=True, hide_index=True,
+                    column_config={
+                        "OF_CDG":      st.column_config.TextColumn("OF"),
+                        "VALOR_TOTAL": st.column_config.TextColumn("VALOR TOTAL"),
+                        "CATEGORIA":   st.column_config.TextColumn("CATEGORIA PRINCIPAL"),
+                        "Z_OF":        st.column_config.TextColumn("ESCORE"),
+                    },
+                )
+            else:
+                st.info("Nenhuma OF fora do padrão.")
+        with t2:
+            if not lin_anom.empty:
+                vis = lin_anom.head(30).copy()
+                vis["OF_DATA"] = pd.to_datetime(vis["OF_DATA"], errors="coerce").dt.strftime("%d/%m/%Y")
+                st.dataframe(
+                    _fmt_df_brl(vis, money=["ITEM_PRCUNTPED", "PRCTTL_INSUMO"], decimals=["QTD_PED", "Z_TOTAL", "Z_PU"]),
+                    use_container_width=True, hide_index=True,
+                    column_config={
+                        "OF_CDG":         st.column_config.TextColumn("OF"),
+                        "INSUMO_CDG":     st.column_config.TextColumn("CÓDIGO"),
+                        "INSUMO_DESC":    st.column_config.TextColumn("DESCRIÇÃO DO INSUMO"),
+                        "ITEM_PRCUNTPED": st.column_config.TextColumn("PREÇO UNIT."),
+                        "PRCTTL_INSUMO":  st.column_config.TextColumn("TOTAL"),
+                        "Z_TOTAL":        st.column_config.TextColumn("ESCORE TOTAL"),
+                        "REF_TOTAL":      st.column_config.TextColumn("REF. TOTAL"),
+                        "Z_PU":           st.column_config.TextColumn("ESCORE P.U."),
+                        "REF_PU":         st.column_config.TextColumn("REF. P.U."),
+                    },
+                )
+            else:
+                st.info("Nenhuma linha fora do padrão.")
+        st.caption(
+            f"Escore = z robusto em escala log, (x − mediana) / (1,4826·MAD), com |z| > {limiar_anom:.1f} "
+            "(limiar na barra lateral). Referência: o próprio item quando tem ao menos 8 compras, senão a "
+            "categoria; para o total da OF, a categoria principal da OF."
+        )
+    else:
+        st.info("Sem dados para exibir.")
+
 # ---------- Volumes por período ----------
 with st.container(border=True):
     st.subheader("📈 Volumes por período")
@@ -443,7 +836,7 @@ with st.container(border=True):
     # Top 3 meses (últimos 12 meses)
     with c1:
         st.markdown("**Top 3 meses (últimos 12 meses)**")
-        df_mes_12 = _safe(mes_maior_volume_ultimo_ano, df, top_n=3)
+        df_mes_12 = _res("mes_maior_volume_ultimo_ano")
         if isinstance(df_mes_12, pd.DataFrame) and not df_mes_12.empty:
             df_mes_12 = _round_cols(df_mes_12, ["VALOR_TOTAL", "PART_%"])
             df_mes_12["ANO_MES"] = df_mes_12["ANO_MES"].astype(str)
@@ -464,7 +857,7 @@ with st.container(border=True):
     # Top 3 meses (geral, agregando todos os anos por mês-do-ano)
     with c2:
         st.markdown("**Top 3 meses (geral)**")
-        df_mes_all = _safe(meses_top3_volume_geral, df, top_n=3)
+        df_mes_all = _res("meses_top3_volume_geral")
         if isinstance(df_mes_all, pd.DataFrame) and not df_mes_all.empty:
             df_mes_all = _round_cols(df_mes_all, ["VALOR_TOTAL", "PART_%"])
             df_mes_all_fmt = _fmt_df_brl(df_mes_all, money=["VALOR_TOTAL"], pcts=["PART_%"])
@@ -481,6 +874,57 @@ with st.container(border=True):
         else:
             st.info("Sem dados para exibir.")
 
+# ---------- Prazo requisição → OF ----------
+with st.container(border=True):
+    st.subheader("⏱️ Prazo requisição → OF")
+    c1, c2 = st.columns(2)
+    with c1:
+        dim_lt = st.radio("Agrupar por", ["Categoria", "UF", "Fornecedor"], horizontal=True, key="lt_dim")
+    with c2:
+        anos_lt = st.selectbox("Período", [1, 3, 5, 10, 0], index=1, key="lt_anos",
+                               format_func=lambda n: "Histórico completo" if n == 0
+                               else (f"Últimos {n} anos" if n > 1 else "Último ano"))
+    anos_lt = anos_lt or None
+
+    geral = _safe(_lead_time, None, anos_lt, _chave)
+    if isinstance(geral, pd.DataFrame) and not geral.empty:
+        g1, g2, g3, g4 = st.columns(4)
+        g1.metric("Linhas com as duas datas", _format_int_br(geral.loc[0, "N_LINHAS"]))
+        g2.metric("Prazo médio (dias)", f"{geral.loc[0, 'MEDIA_DIAS']:.1f}".replace(".", ","))
+        g3.metric("Mediana (dias)", f"{geral.loc[0, 'P50_DIAS']:.1f}".replace(".", ","))
+        g4.metric("P90 (dias)", f"{geral.loc[0, 'P90_DIAS']:.1f}".replace(".", ","))
+
+        col_lt = {"Categoria": "INSUMO_CATEGORIA", "UF": "FORNECEDOR_UF", "Fornecedor": "FORNECEDOR_DESC"}[dim_lt]
+        df_lt = _safe(_lead_time, col_lt, anos_lt, _chave)
+        if isinstance(df_lt, pd.DataFrame) and not df_lt.empty:
+            st.dataframe(
+                _fmt_df_brl(df_lt.head(50), ints=["N_LINHAS"], decimals=["MEDIA_DIAS", "P50_DIAS", "P90_DIAS"]),
+                use_container_width=True, hide_index=True,
+            )
+
+        tend = _safe(_lead_time, "MES", anos_lt, _chave)
+        if isinstance(tend, pd.DataFrame) and not tend.empty:
+            alt = _alt()
+            vis = (
+                tend.assign(MES=tend["MES"].dt.to_timestamp())
+                .melt(id_vars="MES", value_vars=["P50_DIAS", "P90_DIAS"], var_name="QUANTIL", value_name="DIAS")
+            )
+            chart_lt = (
+                alt.Chart(vis)
+                .mark_line()
+                .encode(
+                    x=alt.X("MES:T", title="MÊS DA OF"),
+                    y=alt.Y("DIAS:Q", title="DIAS"),
+                    color=alt.Color("QUANTIL:N", title=""),
+                    tooltip=[alt.Tooltip("MES:T", format="%m/%Y"), "QUANTIL", "DIAS"],
+                )
+                .properties(height=260)
+            )
+            st.altair_chart(chart_lt, use_container_width=True)
+        st.caption("Linhas sem data de requisição ou com OF anterior à requisição ficam de fora.")
+    else:
+        st.info("Sem linhas com data de requisição e de OF no período.")
+
 # ---------- Série de Fornecedores Ativos ----------
 with st.container(border=True):
     st.subheader("👥 Fornecedores cadastrados por ano")
@@ -490,6 +934,7 @@ with st.container(border=True):
             serie_cad_vis = serie_cad.copy()
             serie_cad_vis["ANO_TXT"] = serie_cad_vis["ANO"].astype(str)
             
+            alt = _alt()
             chart_cad = (
                 alt.Chart(serie_cad_vis)
                 .mark_line(point=True)
@@ -508,7 +953,7 @@ with st.container(border=True):
 with st.container(border=True):
     st.subheader("📊 Fornecedores ativos por ano (últimos 10 anos)")
 
-    serie, resumo = serie_fornecedores_ativos_ultimos_anos(df, anos=10)
+    serie, resumo = _res("serie_fornecedores_ativos_ultimos_anos") or (None, None)
     if isinstance(serie, pd.DataFrame) and not serie.empty:
         # garante anos contínuos (0 quando não teve fornecedor ativo)
         serie_plot = _fill_last_n_years(serie, year_col="ANO", y_col="FORNECEDORES_ATIVOS", n=10)
@@ -516,6 +961,7 @@ with st.container(border=True):
         serie_plot_vis = serie_plot.copy()
         serie_plot_vis["ANO_TXT"] = serie_plot_vis["ANO"].astype(str)
         
+        alt = _alt()
         chart_ativos = (
             alt.Chart(serie_plot_vis)
             .mark_bar()
@@ -535,13 +981,93 @@ with st.container(border=True):
     else:
         st.info("Sem dados para exibir nos últimos 10 anos.")
 
+with st.container(border=True):
+    st.subheader("📉 Fornecedores ativos — janela móvel (histórico completo)")
+    janela = st.selectbox(
+        "Janela (meses)", options=[3, 6, 12, 24, 36], index=2, key="janela_ativos_rolante",
+    )
+    serie_rol = _safe(_serie_ativos_rolante, int(janela), _chave)
+    if isinstance(serie_rol, pd.DataFrame) and not serie_rol.empty:
+        serie_rol_vis = serie_rol.copy()
+        serie_rol_vis["MES"] = serie_rol_vis["MES"].dt.to_timestamp()
+
+        alt = _alt()
+        chart_rol = (
+            alt.Chart(serie_rol_vis)
+            .mark_line()
+            .encode(
+                x=alt.X("MES:T", title="MÊS"),
+                y=alt.Y("FORNECEDORES_ATIVOS:Q", title=f"FORNECEDORES ATIVOS ({janela} MESES)"),
+                tooltip=[alt.Tooltip("MES:T", format="%m/%Y"), "FORNECEDORES_ATIVOS"],
+            )
+            .properties(height=300)
+        )
+        st.altair_chart(chart_rol, use_container_width=True)
+    else:
+        st.info("Sem dados para exibir.")
+
+# ---------- Coortes e churn ----------
+with st.container(border=True):
+    st.subheader("🔁 Coortes e churn de fornecedores")
+    co = _safe(_coortes)
+    if co is not None:
+        tipo_coorte = st.radio("Coorte por", list(COORTES), horizontal=True, key="coorte_tipo",
+                               format_func=lambda c: COORTES[c])
+        ret = co.retencao(tipo_coorte, desde=pd.Timestamp.today().year - 15)
+        if not ret.empty:
+            alt = _alt()
+            longo = (
+                ret.drop(columns="TAMANHO")
+                .rename_axis(columns="ANOS_DEPOIS")
+                .stack()
+                .rename("ATIVOS_%")
+                .reset_index()
+                .merge(ret["TAMANHO"].reset_index(), on="COORTE")
+            )
+            longo["COORTE"] = longo["COORTE"].astype(str)
+            heat = (
+                alt.Chart(longo)
+                .mark_rect()
+                .encode(
+                    x=alt.X("ANOS_DEPOIS:O", title="ANOS DESDE A COORTE"),
+                    y=alt.Y("COORTE:O", title="COORTE"),
+                    color=alt.Color("ATIVOS_%:Q", title="% ATIVOS", scale=alt.Scale(scheme="blues")),
+                    tooltip=["COORTE", "ANOS_DEPOIS", alt.Tooltip("ATIVOS_%:Q", format=".1f"), "TAMANHO"],
+                )
+                .properties(height=22 * len(ret) + 40)
+            )
+            st.altair_chart(heat, use_container_width=True)
+            st.caption("% da coorte com ao menos uma compra k anos depois. Anos completos (o ano corrente fica de fora).")
+        else:
+            st.info("Sem coortes para exibir.")
+
+        ch = co.churn()
+        ch = ch[ch["ANO"] >= pd.Timestamp.today().year - 10]
+        if not ch.empty:
+            st.dataframe(
+                _fmt_df_brl(ch, ints=["ATIVOS", "ATIVOS_ANO_ANTERIOR", "RETIDOS", "PERDIDOS", "NOVOS", "REATIVADOS"],
+                            pcts=["CHURN_%", "RETENCAO_%"]),
+                use_container_width=True, hide_index=True,
+                column_config={
+                    "ANO":                 st.column_config.NumberColumn("ANO", format="%d"),
+                    "ATIVOS_ANO_ANTERIOR": st.column_config.TextColumn("ATIVOS NO ANO ANTERIOR"),
+                    "PERDIDOS":            st.column_config.TextColumn("PERDIDOS (CHURN)"),
+                    "CHURN_%":             st.column_config.TextColumn("CHURN"),
+                    "RETENCAO_%":          st.column_config.TextColumn("RETENÇÃO"),
+                },
+            )
+            st.caption("Churn = ativos no ano anterior sem compra no ano. Reativados = compraram antes, "
+                       "mas não no ano anterior.")
+    else:
+        st.info("Sem dados para exibir.")
+
 # ---------- Série de Categorias ----------
 with st.container(border=True):
     st.subheader("📦 Categorias de materiais")
 
     # --- Mais compradas (últimos 5 anos) — gráfico único, largura total ---
     st.markdown("**Mais compradas (últimos 5 anos)**")
-    df_cat5 = _safe(categorias_mais_compradas_ultimos_anos, df, anos=5)
+    df_cat5 = _res("categorias_5")
     if isinstance(df_cat5, pd.DataFrame) and not df_cat5.empty:
         df_cat5 = df_cat5.copy()
         df_cat5["VALOR_TOTAL"] = pd.to_numeric(df_cat5["VALOR_TOTAL"], errors="coerce")
@@ -551,6 +1077,7 @@ with st.container(border=True):
 
         # altura maior para caber rótulos completos
         _altura = max(360, 36 * len(toplot))
+        alt = _alt()
         chart_cat = (
             alt.Chart(toplot)
             .mark_bar()
@@ -604,6 +1131,133 @@ with st.container(border=True):
     except Exception as e:
         st.caption(f"Não foi possível calcular o crescimento desde 2015: {e}")
         
+# ---------- Previsão por categoria ----------
+with st.container(border=True):
+    st.subheader("🔮 Previsão de gastos por categoria (próximos 12 meses)")
+    modelo_prev = st.selectbox("Modelo", list(MODELOS_PREVISAO), key="prev_modelo",
+                               format_func=lambda m: MODELOS_PREVISAO[m])
+    prev = _safe(_previsao, modelo_prev, _chave)
+    res_prev = prev.resumo() if prev is not None else pd.DataFrame()
+    if not res_prev.empty:
+        cat_prev = st.selectbox("Categoria (ordenadas pelo gasto previsto)", res_prev["CATEGORIA"].tolist(),
+                                key="prev_categoria")
+        hist = prev.historico(cat_prev)
+        fut = prev.serie(cat_prev)
+        alt = _alt()
+        base_hist = hist.assign(MES=hist["MES"].dt.to_timestamp())
+        base_fut = fut.assign(MES=fut["MES"].dt.to_timestamp())
+        chart_prev = (
+            alt.Chart(base_fut).mark_area(opacity=0.25).encode(
+                x=alt.X("MES:T", title="MÊS"), y=alt.Y("INFERIOR:Q", title="GASTO NO MÊS"), y2="SUPERIOR:Q",
+            )
+            + alt.Chart(base_fut).mark_line(strokeDash=[4, 3], point=True).encode(
+                x="MES:T", y="PREVISTO:Q",
+                tooltip=[alt.Tooltip("MES:T", format="%m/%Y"), "PREVISTO", "INFERIOR", "SUPERIOR"],
+            )
+            + alt.Chart(base_hist).mark_line().encode(
+                x="MES:T", y="VALOR:Q", tooltip=[alt.Tooltip("MES:T", format="%m/%Y"), "VALOR"],
+            )
+        ).properties(height=280)
+        st.altair_chart(chart_prev, use_container_width=True)
+
+        st.dataframe(
+            _fmt_df_brl(res_prev.head(15), money=["ULTIMOS_12M", "PREVISTO_12M", "INFERIOR_12M", "SUPERIOR_12M"],
+                        pcts=["VAR_%"]),
+            use_container_width=True, hide_index=True,
+            column_config={
+                "ULTIMOS_12M":  st.column_config.TextColumn("ÚLTIMOS 12 MESES"),
+                "PREVISTO_12M": st.column_config.TextColumn("PREVISTO 12 MESES"),
+                "INFERIOR_12M": st.column_config.TextColumn("INFERIOR (95%)"),
+                "SUPERIOR_12M": st.column_config.TextColumn("SUPERIOR (95%)"),
+                "VAR_%":        st.column_config.TextColumn("VARIAÇÃO"),
+            },
+        )
+        st.caption(f"Histórico: {len(prev.meses)} meses completos até {prev.meses[-1].strftime('%m/%Y')}; "
+                   "faixa sombreada = intervalo de 95%. Soma das faixas mensais nas colunas INFERIOR/SUPERIOR.")
+    else:
+        st.info("Sem dados para exibir.")
+
+# ---------- Empreendimentos ----------
+with st.container(border=True):
+    st.subheader("🏗️ Gastos por empreendimento")
+    cubo = _safe(_cubo_projetos)
+    nomes_proj = cubo.nomes() if cubo is not None else []
+    if nomes_proj:
+        proj = st.selectbox("Empreendimento (ordenados por gasto)", nomes_proj, key="proj_sel")
+        linha = cubo.resumo.set_index("EMPREENDIMENTO").loc[proj]
+        p1, p2, p3, p4 = st.columns(4)
+        p1.metric("Gasto total", _format_brl(round(float(linha["VALOR_TOTAL"]), 2)))
+        p2.metric("OFs", _format_int_br(linha["N_OFS"]))
+        p3.metric("Fornecedores", _format_int_br(linha["N_FORNECEDORES"]))
+        p4.metric("% BÁSICO (valor)", _format_pct_br(linha["PART_BASICO_%"]))
+
+        serie_proj = cubo.por_mes(proj)
+        if not serie_proj.empty:
+            alt = _alt()
+            vis = serie_proj.assign(MES=serie_proj["MES"].dt.to_timestamp())
+            chart_proj = (
+                alt.Chart(vis)
+                .mark_bar()
+                .encode(
+                    x=alt.X("MES:T", title="MÊS"),
+                    y=alt.Y("VALOR_TOTAL:Q", title="GASTO NO MÊS"),
+                    tooltip=[alt.Tooltip("MES:T", format="%m/%Y"), "VALOR_TOTAL", "VALOR_BASICO"],
+                )
+                .properties(height=260)
+            )
+            st.altair_chart(chart_proj, use_container_width=True)
+
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown("**Categorias**")
+            st.dataframe(
+                _fmt_df_brl(cubo.por_categoria(proj, top_n=10), money=["VALOR_TOTAL"], pcts=["PART_%"]),
+                use_container_width=True, hide_index=True,
+            )
+        with c2:
+            st.markdown("**Fornecedores**")
+            st.dataframe(
+                _fmt_df_brl(cubo.por_fornecedor(proj, top_n=10), money=["VALOR_TOTAL"], pcts=["PART_%"]),
+                use_container_width=True, hide_index=True,
+            )
+    else:
+        st.info("Sem empreendimentos para exibir.")
+
+# ---------- Concentração de fornecedores ----------
+with st.container(border=True):
+    st.subheader("🎯 Concentração de fornecedores (HHI / Pareto)")
+    c1, c2 = st.columns(2)
+    with c1:
+        dim = st.radio("Agrupar por", ["Categoria", "UF"], horizontal=True, key="conc_dim")
+    with c2:
+        anos_conc = st.selectbox("Período", [1, 3, 5, 10], index=2, key="conc_anos",
+                                 format_func=lambda n: f"Últimos {n} anos" if n > 1 else "Último ano")
+    col_dim = "INSUMO_CATEGORIA" if dim == "Categoria" else "FORNECEDOR_UF"
+    df_conc = _safe(concentracao_fornecedores, df, por=col_dim, anos=anos_conc)
+    if isinstance(df_conc, pd.DataFrame) and not df_conc.empty:
+        df_conc_fmt = _fmt_df_brl(
+            df_conc.sort_values("HHI", ascending=False),
+            money=["VALOR_TOTAL"],
+            ints=["N_FORNECEDORES", "HHI", "N_FORN_80%"],
+            pcts=["TOP1_PART_%"],
+        )
+        st.dataframe(
+            df_conc_fmt,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "VALOR_TOTAL":     st.column_config.TextColumn("VALOR TOTAL"),
+                "N_FORNECEDORES":  st.column_config.TextColumn("FORNECEDORES"),
+                "HHI":             st.column_config.TextColumn("HHI"),
+                "TOP1_FORNECEDOR": st.column_config.TextColumn("MAIOR FORNECEDOR"),
+                "TOP1_PART_%":     st.column_config.TextColumn("PART. MAIOR"),
+                "N_FORN_80%":      st.column_config.TextColumn("FORN. P/ 80% DO GASTO"),
+            },
+        )
+        st.caption("HHI acima de 2.500 indica gasto muito concentrado; abaixo de 1.500, pulverizado.")
+    else:
+        st.info("Sem dados para exibir.")
+
 with st.container(border=True):
     st.subheader("🧱 Materiais BÁSICOS — cobertura de cadastro por local")
 
@@ -617,7 +1271,9 @@ with st.container(border=True):
 
     # 2) & 3) Fornecedores CADASTRADOS aptos a vender básico por local (UF)
     st.markdown("**Fornecedores cadastrados aptos (básico) por local**")
-    df_res = fornecedores_basicos_por_local_cadastro(df_forn, df, locais=("RJ","SP","SC"))
+    ind_bas = _safe(_matriz_basicos_uf)
+    df_res = (fornecedores_basicos_por_local_cadastro(df_forn, df, locais=("RJ","SP","SC"), indice=ind_bas)
+              if ind_bas is not None else None)
 
     if isinstance(df_res, pd.DataFrame) and not df_res.empty:
         # normaliza chave para evitar case/acentos
@@ -637,7 +1293,89 @@ with st.container(border=True):
 
     else:
         st.info("Sem dados para compor os contadores por local.")
-        
+
+    # 4) Mapa nacional: UF × categoria básica (0 = nenhum fornecedor cadastrado = lacuna)
+    if ind_bas is not None and len(ind_bas[0].columns) > 1:
+        st.markdown("**Cobertura nacional — UF × categoria básica**")
+        cats_bas = [c for c in ind_bas[0].columns if c != "UF"]
+        sel_bas = st.multiselect("Categorias básicas", cats_bas, key="bas_categorias", placeholder="Todas")
+        ufs_bas = sorted(UFS_BR | set(ind_bas[1].index))
+        longo = (
+            ind_bas[1].reindex(index=ufs_bas, columns=sel_bas or cats_bas, fill_value=0)
+            .rename_axis(index="UF", columns="CATEGORIA").stack().rename("FORNECEDORES").reset_index()
+        )
+        alt = _alt()
+        heat = (
+            alt.Chart(longo)
+            .mark_rect()
+            .encode(
+                x=alt.X("CATEGORIA:N", title=None, axis=alt.Axis(labelAngle=-40)),
+                y=alt.Y("UF:O", title="UF"),
+                color=alt.condition(
+                    "datum.FORNECEDORES == 0",
+                    alt.value("#e45756"),
+                    alt.Color("FORNECEDORES:Q", title="FORNECEDORES",
+                              scale=alt.Scale(type="symlog", scheme="greens")),
+                ),
+                tooltip=["UF", "CATEGORIA", "FORNECEDORES"],
+            )
+            .properties(height=18 * len(ufs_bas) + 40)
+        )
+        st.altair_chart(heat, use_container_width=True)
+        st.caption("Em vermelho: UF sem nenhum fornecedor cadastrado para a categoria.")
+
+        cob = cobertura_basicos_por_uf(ufs=ufs_bas, categorias=sel_bas or None, indice=ind_bas)
+        sem_cob = int((cob["FORNECEDORES_BÁSICO_CAD"] == 0).sum())
+        st.caption(f"{sem_cob} de {len(cob)} UFs sem nenhum fornecedor cadastrado nas categorias selecionadas.")
+        st.dataframe(
+            _fmt_df_brl(cob.sort_values(["CATEGORIAS_SEM_FORNECEDOR", "UF"], ascending=[False, True]),
+                        ints=["FORNECEDORES_BÁSICO_CAD", "CATEGORIAS_COBERTAS", "CATEGORIAS_SEM_FORNECEDOR"]),
+            use_container_width=True, hide_index=True,
+            column_config={
+                "FORNECEDORES_BÁSICO_CAD":   st.column_config.TextColumn("FORNECEDORES (CAD.)"),
+                "CATEGORIAS_COBERTAS":       st.column_config.TextColumn("CATEGORIAS COBERTAS"),
+                "CATEGORIAS_SEM_FORNECEDOR": st.column_config.TextColumn("LACUNAS (QTD.)"),
+                "LACUNAS":                   st.column_config.TextColumn("CATEGORIAS SEM FORNECEDOR"),
+            },
+        )
+
+# ---------- Exportação de recortes ----------
+with st.container(border=True):
+    st.subheader("📤 Exportar recorte das bases")
+    datas_ok = df_erp["OF_DATA"].dropna()
+    d_min = datas_ok.min().date() if not datas_ok.empty else datetime.today().date()
+    d_max = datas_ok.max().date() if not datas_ok.empty else datetime.today().date()
+
+    _opcoes = lambda col: sorted(df_erp[col].dropna().astype(str).unique()) if col in df_erp.columns else []
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        periodo = st.date_input("Período (OF_DATA)", value=(d_min, d_max),
+                                min_value=d_min, max_value=d_max, format="DD/MM/YYYY", key="exp_periodo")
+        ufs_exp = st.multiselect("UF", _opcoes("FORNECEDOR_UF"), key="exp_ufs")
+    with c2:
+        cats_exp = st.multiselect("Categoria", _opcoes("INSUMO_CATEGORIA"), key="exp_cats")
+        tipos_exp = st.multiselect("Tipo de material", _opcoes("TIPO_MATERIAL"), key="exp_tipos")
+    with c3:
+        forn_exp = st.multiselect("Fornecedor", _opcoes("FORNECEDOR_DESC"), key="exp_forn")
+        formato = st.radio("Formato", list(FORMATOS), horizontal=True, key="exp_fmt")
+
+    ini, fim = (periodo + (None, None))[:2] if isinstance(periodo, tuple) else (periodo, None)
+    filtros = dict(inicio=ini, fim=fim, ufs=ufs_exp, categorias=cats_exp,
+                   fornecedores=forn_exp, tipos=tipos_exp)
+    n_rec = int(mascara_erp(df_erp, **filtros).sum())
+    st.caption(f"{_format_int_br(n_rec)} linhas no recorte. XLSX é o formato mais lento para recortes grandes; "
+               "CSV (separador ';', vírgula decimal) e Parquet saem em segundos.")
+
+    # gerado só no clique, a partir da base já carregada (sem cópia por sessão)
+    st.download_button(
+        f"Baixar recorte (.{formato})",
+        data=lambda: exportar_bytes(filtrar_erp(df_erp, **filtros), formato),
+        file_name=f"recorte_indicadores.{formato}",
+        mime=FORMATOS[formato],
+        disabled=(n_rec == 0),
+        key="exp_download",
+    )
+
 # ---------- Estilo ----------
 st.markdown(
     """
@@ -649,3 +1387,7 @@ section.main > div { padding-top: 0.25rem; }
     unsafe_allow_html=True,
 )
 
+_marcar("fim")
+if os.environ.get("INDICADORES_MARCAS"):
+    import json
+    Path(os.environ["INDICADORES_MARCAS"]).write_text(json.dumps(_MARCAS), encoding="utf-8")
@@ -0,0 +1,95 @@
+# tests/comparacao.py
+"""
+Forma canônica (JSON) dos resultados dos indicadores e comparação com tolerância.
+
+DataFrames viram {colunas, linhas}; o índice só entra quando tem nome (COORTE, UF...).
+Tabelas grandes guardam um resumo (nº de linhas, soma das colunas numéricas, primeiras e
+últimas linhas) para os arquivos de referência não crescerem com a base.
+Números comparam com tolerância relativa (a ordem de soma pode mudar numa otimização) e
+int × float não conta como diferença.
+"""
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MAX_LINHAS = 60
+REL = 1e-6
+
+def _valor(v):
+    if v is None or v is pd.NA or v is pd.NaT:
+        return None
+    if isinstance(v, (bool, np.bool_)):
+        return bool(v)
+    if isinstance(v, (int, np.integer)):
+        return int(v)
+    if isinstance(v, (float, np.floating)):
+        return None if math.isnan(v) else float(v)
+    if isinstance(v, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(v).isoformat()
+    return str(v)
+
+def _linhas(df: pd.DataFrame) -> list:
+    return [[_valor(v) for v in linha] for linha in df.itertuples(index=False, name=None)]
+
+def canonico(obj):
+    if isinstance(obj, pd.Series):
+        obj = obj.to_frame()
+    if isinstance(obj, pd.DataFrame):
+        df = obj.reset_index() if any(n is not None for n in obj.index.names) else obj
+        out = {"colunas": [str(c) for c in df.columns], "n_linhas": len(df)}
+        if len(df) <= MAX_LINHAS:
+            out["linhas"] = _linhas(df)
+            return out
+        num = df.select_dtypes("number")
+        out["somas"] = {str(c): _valor(num[c].sum()) for c in num.columns}
+        out["primeiras"] = _linhas(df.head(10))
+        out["ultimas"] = _linhas(df.tail(10))
+        return out
+    if isinstance(obj, (tuple, list)):
+        return [canonico(x) for x in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted((canonico(x) for x in obj), key=str)
+    if isinstance(obj, dict):
+        return {str(k): canonico(v) for k, v in obj.items()}
+    if isinstance(obj, (np.ndarray, pd.Index)):
+        return [_valor(v) for v in obj]
+    return _valor(obj)
+
+def conferir(atual, esperado, caminho: str = "") -> None:
+    """AssertionError apontando o primeiro ponto em que as duas formas canônicas divergem."""
+    if isinstance(esperado, dict):
+        assert isinstance(atual, dict), f"{caminho}: esperado objeto, veio {type(atual).__name__}"
+        assert atual.keys() == esperado.keys(), f"{caminho}: chaves {sorted(atual)} != {sorted(esperado)}"
+        for k in esperado:
+            conferir(atual[k], esperado[k], f"{caminho}.{k}")
+    elif isinstance(esperado, list):
+        assert isinstance(atual, list), f"{caminho}: esperado lista, veio {type(atual).__name__}"
+        assert len(atual) == len(esperado), f"{caminho}: {len(atual)} itens != {len(esperado)}"
+        for i, (a, e) in enumerate(zip(atual, esperado)):
+            conferir(a, e, f"{caminho}[{i}]")
+    elif isinstance(esperado, (int, float)) and not isinstance(esperado, bool) \
+            and isinstance(atual, (int, float)) and not isinstance(atual, bool):
+        assert math.isclose(atual, esperado, rel_tol=REL, abs_tol=1e-9), f"{caminho}: {atual} != {esperado}"
+    else:
+        assert atual == esperado, f"{caminho}: {atual!r} != {esperado!r}"
+
+def equivalentes(a, b, caminho: str = "") -> None:
+    """Mesmo resultado por dois caminhos (motores, caches), ignorando índice e dtype."""
+    conferir(canonico(_sem_indice(a)), canonico(_sem_indice(b)), caminho)
+
+def _sem_indice(obj):
+    if isinstance(obj, pd.DataFrame):
+        return obj.reset_index(drop=True)
+    if isinstance(obj, (tuple, list)):
+        return [_sem_indice(x) for x in obj]
+    return obj
+
+def gravar(arq: Path, dados) -> None:
+    arq.parent.mkdir(parents=True, exist_ok=True)
+    arq.write_text(json.dumps(dados, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+
+def ler(arq: Path):
+    return json.loads(arq.read_text(encoding="utf-8"))
@@ -0,0 +1,72 @@
+# tests/conftest.py
+"""
+Bases comuns dos testes: ERP sintético determinístico (datas relativas a HOJE) e as
+planilhas que acompanham o repositório (FornecedoresAtivos.xlsx, UltForn.xlsx).
+
+    python -m pytest -q                       # roda tudo, menos os orçamentos de tempo
+    python -m pytest -q --desempenho          # inclui os orçamentos de tempo (tests/test_desempenho.py)
+    python -m pytest -q --atualizar-golden    # regrava os arquivos de referência
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+import comparacao
+from benchmarks.sintetico import gerar_erp
+from fornecedores_core import carregar_fornecedores
+
+HOJE = pd.Timestamp("2025-06-30")
+GOLDEN = Path(__file__).resolve().parent / "golden"
+
+def pytest_addoption(parser):
+    parser.addoption("--atualizar-golden", action="store_true", default=False,
+                     help="Regrava tests/golden/*.json com as saídas atuais.")
+    parser.addoption("--desempenho", action="store_true", default=False,
+                     help="Roda os testes de orçamento de tempo (marcados com 'desempenho').")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "desempenho: orçamento de tempo de parede (só com --desempenho)")
+
+def pytest_collection_modifyitems(config, items):
+    # tempo de parede depende da máquina: fora da execução padrão
+    if config.getoption("--desempenho"):
+        return
+    pular = pytest.mark.skip(reason="orçamento de tempo (use --desempenho)")
+    for item in items:
+        if item.get_closest_marker("desempenho"):
+            item.add_marker(pular)
+
+@pytest.fixture(scope="session")
+def erp() -> pd.DataFrame:
+    return gerar_erp(20_000, n_fornecedores=300, n_itens=800, hoje=HOJE)
+
+@pytest.fixture(scope="session")
+def forn() -> pd.DataFrame:
+    return carregar_fornecedores()
+
+@pytest.fixture(scope="session")
+def ult_forn() -> pd.DataFrame:
+    return pd.read_excel(RAIZ / "UltForn.xlsx")
+
+@pytest.fixture
+def golden(request):
+    """golden(nome, resultado): compara com tests/golden/<nome>.json (ou regrava)."""
+    atualizar = request.config.getoption("--atualizar-golden")
+
+    def conferir(nome: str, resultado):
+        arq = GOLDEN / f"{nome}.json"
+        atual = comparacao.canonico(resultado)
+        if atualizar:
+            comparacao.gravar(arq, atual)
+            return
+        if not arq.exists():
+            pytest.fail(f"Sem referência {arq.name}; rode com --atualizar-golden.")
+        comparacao.conferir(atual, comparacao.ler(arq), nome)
+
+    return conferir
@@ -0,0 +1,124 @@
+# tests/test_desempenho.py
+"""
+Orçamentos de tempo e memória por indicador (motor pandas, ERP sintético de 200 mil linhas).
+
+Tempo = melhor de 3 execuções (após uma de aquecimento); memória = pico do tracemalloc
+(alocações do Python e do numpy). Os limites têm folga de ~4x no tempo e ~2x na memória
+sobre o medido numa máquina comum: pegam regressões de complexidade (laço por grupo,
+cópia da base inteira), não ruído. Em máquinas lentas, ORCAMENTO_FOLGA=2 dobra os limites.
+
+A memória não depende da máquina e roda sempre; o tempo de parede só com
+`python -m pytest -q --desempenho`.
+"""
+import gc
+import os
+import time
+import tracemalloc
+
+import pytest
+
+import Tratamento_Indicadores as ti
+from anomalias_core import detectar_anomalias
+from benchmarks.bench_motores import CHAMADAS
+from benchmarks.sintetico import gerar_erp
+from comparativo_core import agregados_mensais
+from coortes_core import coortes_fornecedores
+from distintos_core import indice_atividade
+from filtros_core import indice_filtros
+from previsao_core import prever_categorias
+from projetos_core import cubo_projetos
+from ultimo_fornecedor_core import tabela_ultimo_fornecedor
+from validacao_core import validar_bases
+from conftest import HOJE
+
+LINHAS = 200_000
+FOLGA = float(os.environ.get("ORCAMENTO_FOLGA", "1"))
+
+# nome -> (segundos, MB de pico)
+ORCAMENTOS = {
+    "fornecedor_top_por_uf":                           (0.30, 60),
+    "maior_ordem_fornecimento":                        (0.40, 64),
+    "menor_ordem_fornecimento":                        (0.40, 64),
+    "valor_medio_por_of":                              (0.10, 16),
+    "percentual_ofs_basicas_ultimo_ano":               (0.15, 48),
+    "mes_maior_volume_ultimo_ano":                     (0.10, 48),
+    "quantidade_empresas_que_venderam_ultimos_3_anos": (0.25, 32),
+    "meses_top3_volume_geral":                         (0.15, 72),
+    "maior_compra_item_unico":                         (0.40, 84),
+    "menor_compra_item_unico":                         (0.40, 84),
+    "valor_medio_por_item":                            (0.05, 16),
+    "categorias_mais_compradas_ultimos_anos":          (0.15, 48),
+    "categorias_com_venda_continua_ultimos_anos":      (0.20, 56),
+    "categorias_crescimento_desde_2015":               (0.60, 84),
+    "serie_fornecedores_ativos_ultimos_anos":          (0.20, 32),
+    "concentracao_fornecedores":                       (0.30, 32),
+    "lead_time_requisicao":                            (0.30, 32),
+    "indice_precos_item":                              (0.60, 32),
+    "matriz_basicos_uf":                               (0.25, 8),
+    "indice_atividade":                                (0.25, 32),
+    "indice_filtros":                                  (0.25, 24),
+    "detectar_anomalias":                              (1.30, 80),
+    "validar_bases":                                   (0.60, 40),
+    "coortes_fornecedores":                            (0.40, 24),
+    "agregados_mensais":                               (0.40, 52),
+    "prever_categorias":                               (0.20, 16),
+    "cubo_projetos":                                   (1.10, 84),
+    "tabela_ultimo_fornecedor":                        (0.50, 72),
+}
+
+@pytest.fixture(scope="module")
+def erp_grande():
+    return gerar_erp(LINHAS, hoje=HOJE)
+
+def _chamadas(erp, forn) -> dict:
+    m = ti.motor_indicadores("pandas")
+    fns = {nome: (lambda n=nome, k=kw: getattr(m, n)(erp, **k)) for nome, kw in CHAMADAS}
+    fns.update({
+        "lead_time_requisicao": lambda: ti.lead_time_requisicao(erp),
+        "indice_precos_item":   lambda: ti.indice_precos_item(erp),
+        "matriz_basicos_uf":    lambda: ti.matriz_basicos_uf(forn, erp),
+        "indice_atividade":     lambda: indice_atividade(erp),
+        "indice_filtros":       lambda: indice_filtros(erp),
+        "detectar_anomalias":   lambda: detectar_anomalias(erp),
+        "validar_bases":        lambda: validar_bases(erp, forn, hoje=HOJE),
+        "coortes_fornecedores": lambda: coortes_fornecedores(erp, forn, hoje=HOJE),
+        "agregados_mensais":    lambda: agregados_mensais(erp, forn, hoje=HOJE),
+        "prever_categorias":    lambda: prever_categorias(erp, hoje=HOJE),
+        "cubo_projetos":        lambda: cubo_projetos(erp),
+        "tabela_ultimo_fornecedor": lambda: tabela_ultimo_fornecedor(erp),
+    })
+    return fns
+
+def _tempo(fn, repeticoes: int = 3) -> float:
+    fn()
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+def _pico_mb(fn) -> float:
+    fn()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return pico / 2**20
+
+def test_todos_com_orcamento(erp_grande, forn):
+    assert set(_chamadas(erp_grande, forn)) == set(ORCAMENTOS)
+
+@pytest.mark.parametrize("nome", sorted(ORCAMENTOS))
+def test_orcamento_memoria(erp_grande, forn, nome):
+    mb, lim_mb = _pico_mb(_chamadas(erp_grande, forn)[nome]), ORCAMENTOS[nome][1] * FOLGA
+    assert mb <= lim_mb, f"{nome}: pico de {mb:.1f} MB (orçamento {lim_mb:.0f} MB)"
+
+@pytest.mark.desempenho
+@pytest.mark.parametrize("nome", sorted(ORCAMENTOS))
+def test_orcamento_tempo(erp_grande, forn, nome):
+    seg, lim_seg = _tempo(_chamadas(erp_grande, forn)[nome]), ORCAMENTOS[nome][0] * FOLGA
+    assert seg <= lim_seg, f"{nome}: {seg:.3f}s (orçamento {lim_seg:.2f}s)"
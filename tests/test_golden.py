@@ -0,0 +1,129 @@
+# tests/test_golden.py
+"""
+Saídas congeladas dos indicadores (tests/golden/*.json). Só entram aqui cálculos que não
+dependem da data de hoje — ou que a recebem como parâmetro (hoje=HOJE); as janelas
+"últimos N anos" são cobertas por equivalência em test_motores.py.
+
+As referências foram congeladas depois das reescritas de desempenho (026–048): pegam
+mudanças a partir daqui, não erros que já estivessem nelas. A conferência com os números
+de antes das otimizações fica em test_referencia.py (implementações pandas diretas).
+"""
+import pandas as pd
+import pytest
+
+import Tratamento_Indicadores as ti
+import fornecedores_core as fc
+from anomalias_core import detectar_anomalias
+from comparativo_core import agregados_mensais
+from coortes_core import coortes_fornecedores
+from distintos_core import indice_atividade
+from previsao_core import prever_categorias
+from projetos_core import cubo_projetos
+from ultimo_fornecedor_core import tabela_ultimo_fornecedor
+from validacao_core import UFS_BR, validar_bases
+from conftest import HOJE
+
+# ---------- ERP sintético ----------
+ERP = [
+    ("maior_ordem_fornecimento", {}),
+    ("menor_ordem_fornecimento", {}),
+    ("valor_medio_por_of", {}),
+    ("meses_top3_volume_geral", {"top_n": 3}),
+    ("maior_compra_item_unico", {}),
+    ("menor_compra_item_unico", {}),
+    ("valor_medio_por_item", {}),
+    ("categorias_basicos_distintos", {}),
+    ("categorias_crescimento_desde_2015", {}),
+    ("itens_preco_fora_do_mercado", {"top_n": 20}),
+]
+
+@pytest.mark.parametrize("nome,kw", ERP, ids=[n for n, _ in ERP])
+def test_indicadores_erp(erp, golden, nome, kw):
+    golden(f"erp_{nome}", getattr(ti, nome)(erp, **kw))
+
+@pytest.mark.parametrize("por", ["INSUMO_CATEGORIA", "FORNECEDOR_UF"])
+def test_concentracao_fornecedores(erp, golden, por):
+    golden(f"erp_concentracao_{por.lower()}", ti.concentracao_fornecedores(erp, por=por))
+
+@pytest.mark.parametrize("por", ["INSUMO_CATEGORIA", "MES", None])
+def test_lead_time_requisicao(erp, golden, por):
+    golden(f"erp_lead_time_{str(por).lower()}", ti.lead_time_requisicao(erp, por=por))
+
+def test_itens_da_of(erp, golden):
+    ofs = erp["OF_CDG"].drop_duplicates().sort_values()
+    golden("erp_itens_da_of", [ti.itens_da_of(erp, of, top_n=None) for of in ofs.iloc[[0, 100, 1000]]])
+
+def test_indice_atividade(erp, golden):
+    idx = indice_atividade(erp, col_id="FORNECEDOR_CDG", col_data="OF_DATA", col_valor="PRCTTL_INSUMO")
+    anos = range(HOJE.year - 11, HOJE.year + 1)
+    golden("erp_indice_atividade", {a: idx.contar(pd.Timestamp(a, 1, 1), pd.Timestamp(a + 1, 1, 1)) for a in anos})
+
+# ---------- Cadastro de fornecedores (FornecedoresAtivos.xlsx) ----------
+def test_fornecedores_cadastro(forn, golden):
+    golden("forn_cadastro", {
+        "total": fc.total_empresas_cadastradas(forn),
+        "por_ano": fc.serie_fornecedores_cadastrados_por_ano(forn, anos=None),
+    })
+
+def test_basicos_por_uf(forn, erp, golden):
+    indice = ti.matriz_basicos_uf(forn, erp)
+    golden("forn_basicos_por_uf", {
+        "matriz": indice[1],
+        "locais": ti.fornecedores_basicos_por_local_cadastro(forn, erp, indice=indice),
+        "cobertura": ti.cobertura_basicos_por_uf(ufs=sorted(UFS_BR), indice=indice),
+    })
+
+def test_validacao(erp, forn, golden):
+    golden("validacao_resumo", validar_bases(erp, forn, hoje=HOJE).resumo)
+
+# ---------- Última compra por fornecedor (UltForn.xlsx) ----------
+def test_ult_forn(ult_forn, forn, golden):
+    idx = indice_atividade(ult_forn, col_id="PED_FORNECEDOR", col_data="PED_DT")
+    co = coortes_fornecedores(ult_forn, forn, col_id="PED_FORNECEDOR", col_data="PED_DT", hoje=HOJE)
+    golden("ult_forn", {
+        "total": fc.total_empresas_cadastradas(ult_forn, col_id="PED_FORNECEDOR"),
+        "meses": [str(m) for m in idx.meses()],
+        "ativos_por_ano": {a: idx.contar(pd.Timestamp(a, 1, 1), pd.Timestamp(a + 1, 1, 1))
+                           for a in range(HOJE.year - 5, HOJE.year + 1)},
+        "churn": co.churn(),
+        "retencao": co.retencao("primeira_compra", percentual=False),
+    })
+
+def test_ultimo_fornecedor(erp, golden):
+    # UltForn sintético: 50 OFs do ERP reatribuídas ao fornecedor 7 (prevalece sobre o ERP)
+    ofs = erp["OF_CDG"].drop_duplicates().sort_values().iloc[::40].head(50)
+    ult = pd.DataFrame({"PED_CDG": ofs.to_numpy(), "PED_FORNECEDOR": 7, "PED_DT": HOJE})
+    golden("ultimo_fornecedor", {"erp": tabela_ultimo_fornecedor(erp),
+                                 "com_ult_forn": tabela_ultimo_fornecedor(erp, ult)})
+
+# ---------- Análises com hoje explícito ----------
+@pytest.mark.parametrize("dias", [0, 15])
+def test_comparativo(erp, forn, golden, dias):
+    # dias > 0: hoje no meio do mês (janelas terminando fora do fim do mês)
+    ag = agregados_mensais(erp, forn, hoje=HOJE - pd.Timedelta(days=dias))
+    res = {modo: ag.comparar(modo) for modo in ("12m", "ytd")}
+    golden("comparativo" if not dias else "comparativo_meio_do_mes", {
+        **res, "periodos": {m: [r.attrs["periodo_atual"], r.attrs["periodo_anterior"]] for m, r in res.items()},
+    })
+
+def test_coortes(erp, forn, golden):
+    co = coortes_fornecedores(erp, forn, hoje=HOJE)
+    golden("coortes", {
+        "retencao": co.retencao("primeira_compra"),
+        "churn": co.churn(),
+        "churn_por_coorte": co.churn_por_coorte("primeira_compra"),
+    })
+
+def test_anomalias(erp, golden):
+    det = detectar_anomalias(erp)
+    golden("anomalias", {"ofs": det.ofs(3.5, top_n=20), "linhas": det.linhas(3.5, top_n=20),
+                         "n_linhas": int(det.mascara_linhas(3.5).sum())})
+
+def test_previsao(erp, golden):
+    golden("previsao", prever_categorias(erp, hoje=HOJE).resumo())
+
+def test_cubo_projetos(erp, golden):
+    cubo = cubo_projetos(erp)
+    p = cubo.nomes()[0]
+    golden("cubo_projetos", {"projeto": p, "por_mes": cubo.por_mes(p),
+                             "por_categoria": cubo.por_categoria(p), "por_fornecedor": cubo.por_fornecedor(p)})
@@ -0,0 +1,257 @@
+# tests/test_motores.py
+"""
+Mesmo resultado por todos os caminhos: motores (pandas, SQLite, polars se instalado, plano
+de consultas), caches em disco (Parquet, SQLite, Arrow compartilhado) e índices
+reaproveitados (indice=...). Aqui entram também os indicadores de janela móvel
+("últimos N anos"): todos os caminhos rodam no mesmo instante, então a data de hoje
+não interfere.
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+import Tratamento_Indicadores as ti
+import fornecedores_core as fc
+from benchmarks.bench_motores import CHAMADAS
+from comparacao import equivalentes
+from comparativo_core import agregados_mensais
+from distintos_core import indice_atividade
+from exportacao_core import filtrar_erp, mascara_erp
+from filtros_core import indice_filtros
+from plano_core import PlanoIndicadores, _REQUISITOS
+from ultimo_fornecedor_core import UltimoFornecedor, tabela_ultimo_fornecedor
+
+EXTRAS = [
+    ("categorias_basicos_distintos", {}),
+    ("concentracao_fornecedores", {"por": "FORNECEDOR_UF"}),
+    ("lead_time_requisicao", {"anos": 5}),
+    ("lead_time_requisicao", {"por": "MES"}),
+    ("lead_time_requisicao", {"por": None}),
+]
+CASOS = CHAMADAS + EXTRAS
+IDS = [f"{n}-{i}" for i, (n, _) in enumerate(CASOS)]
+
+@pytest.fixture(scope="module")
+def armazem(erp, forn, tmp_path_factory):
+    from armazem_core import salvar_armazem
+    return salvar_armazem(erp, forn, tmp_path_factory.mktemp("armazem") / "indicadores.sqlite")
+
+@pytest.fixture(scope="module")
+def parquet(erp, tmp_path_factory):
+    pytest.importorskip("polars")
+    from motor_polars import salvar_cache_parquet
+    return salvar_cache_parquet(erp, tmp_path_factory.mktemp("parquet") / "erp.parquet")
+
+@pytest.fixture(scope="module")
+def motor_pandas():
+    return ti.motor_indicadores("pandas")
+
+# ---------- Motores ----------
+@pytest.mark.parametrize("nome,kw", CASOS, ids=IDS)
+def test_sqlite(erp, armazem, motor_pandas, nome, kw):
+    m = ti.motor_indicadores("sqlite")
+    equivalentes(getattr(m, nome)(armazem, **kw), getattr(motor_pandas, nome)(erp, **kw), nome)
+
+@pytest.mark.parametrize("nome,kw", CASOS, ids=IDS)
+def test_polars(erp, parquet, motor_pandas, nome, kw):
+    m = ti.motor_indicadores("polars")
+    esperado = getattr(motor_pandas, nome)(erp, **kw)
+    equivalentes(getattr(m, nome)(parquet, **kw), esperado, f"{nome} (parquet)")
+    equivalentes(getattr(m, nome)(erp, **kw), esperado, f"{nome} (DataFrame)")
+
+def test_fornecedores_entre_motores(erp, forn, armazem, motor_pandas):
+    m = ti.motor_indicadores("sqlite")
+    equivalentes(m.total_empresas_cadastradas(armazem), motor_pandas.total_empresas_cadastradas(forn))
+    equivalentes(m.serie_fornecedores_cadastrados_por_ano(armazem, anos=10),
+                 motor_pandas.serie_fornecedores_cadastrados_por_ano(forn, anos=10))
+    equivalentes(m.fornecedores_basicos_por_local_cadastro(armazem),
+                 motor_pandas.fornecedores_basicos_por_local_cadastro(forn, erp))
+
+def test_itens_da_of_entre_motores(erp, armazem, motor_pandas):
+    of = int(erp["OF_CDG"].iloc[len(erp) // 2])
+    m = ti.motor_indicadores("sqlite")
+    equivalentes(m.itens_da_of(armazem, of, top_n=None), motor_pandas.itens_da_of(erp, of, top_n=None))
+
+def test_plano(erp, motor_pandas):
+    plano = PlanoIndicadores(erp)
+    chamadas = [(n, kw) for n, kw in CHAMADAS if n in _REQUISITOS]
+    for n, kw in chamadas:
+        plano.pedir(n, **kw)
+    res = plano.executar()
+    for n, kw in chamadas:
+        assert not isinstance(res[n], Exception), f"{n}: {res[n]!r}"
+        equivalentes(res[n], getattr(motor_pandas, n)(erp, **kw), n)
+
+# ---------- Janelas móveis: filtro da função = filtro aplicado antes ----------
+def _ultimos(df, anos):
+    return df[df["OF_DATA"] >= pd.Timestamp.today() - pd.DateOffset(years=anos)]
+
+@pytest.mark.parametrize("anos", [1, 3, 5])
+def test_janelas(erp, anos):
+    recorte = _ultimos(erp, anos)
+    equivalentes(ti.concentracao_fornecedores(erp, anos=anos), ti.concentracao_fornecedores(recorte))
+    equivalentes(ti.lead_time_requisicao(erp, anos=anos), ti.lead_time_requisicao(recorte))
+    equivalentes(ti.categorias_mais_compradas_ultimos_anos(erp, anos=anos),
+                 ti.categorias_mais_compradas_ultimos_anos(recorte, anos=50))
+
+def _kpis_referencia(erp, forn, ini, fim) -> dict:
+    """KPIs do resumo calculados direto sobre as linhas de [ini, fim] (dias inteiros)."""
+    dentro = lambda d: (d >= ini) & (d < fim + pd.Timedelta(days=1))
+    val = pd.to_numeric(erp["PRCTTL_INSUMO"], errors="coerce")
+    of = pd.DataFrame({"OF": erp["OF_CDG"], "D": erp["OF_DATA"], "V": val,
+                       "B": erp["TIPO_MATERIAL"].eq("BÁSICO").fillna(False)})
+    g = of.groupby("OF").agg(D=("D", "min"), V=("V", "sum"), B=("B", "max"))
+    g = g[dentro(g["D"])]
+    linhas = erp[dentro(erp["OF_DATA"]) & (val > 0)]
+    cad = forn.groupby("FORN_CNPJ")["FORN_DTCADASTRO"].min()
+    return {
+        "valor_medio_por_of": g["V"].round(2).mean(),
+        "pct_ofs_basicas": g["B"].mean() * 100.0,
+        "empresas_que_venderam": linhas["FORNECEDOR_CDG"].nunique(),
+        "cadastrados": int(dentro(cad).sum()),
+        "ticket_medio_item": val[linhas.index].mean(),
+    }
+
+@pytest.mark.parametrize("hoje", ["2025-06-15", "2024-02-29", "2025-01-09"])
+@pytest.mark.parametrize("modo", ["12m", "ytd"])
+def test_comparativo_mesmo_dia(erp, forn, hoje, modo):
+    # hoje no meio do mês: os dois períodos terminam no mesmo dia do mês
+    hoje = pd.Timestamp(hoje)
+    um_ano, dia = pd.DateOffset(years=1), pd.Timedelta(days=1)
+    if modo == "ytd":
+        ini = hoje.replace(month=1, day=1)
+        ini_ant = ini - um_ano
+    else:
+        # 12 meses móveis, e os 12 imediatamente antes (nenhum dia fica de fora)
+        ini = hoje - um_ano + dia
+        ini_ant = hoje - pd.DateOffset(years=2) + dia
+    ag = agregados_mensais(erp, forn, hoje=hoje)
+    cmp = ag.comparar(modo).set_index("KPI")
+    atual = _kpis_referencia(erp, forn, ini, hoje)
+    anterior = _kpis_referencia(erp, forn, ini_ant, hoje - um_ano)
+    if modo == "12m":
+        (a0, _), (_, b1) = ag.periodos(modo)
+        assert a0 == b1 + 1
+    equivalentes(cmp["ATUAL"].to_dict(), atual)
+    equivalentes(cmp["ANTERIOR"].to_dict(), anterior)
+    assert cmp.attrs["periodo_anterior"].endswith(f"{hoje - um_ano:%d/%m/%Y}")
+
+def test_janela_empresas_que_venderam(erp):
+    recorte = _ultimos(erp, 3)
+    ids = recorte.loc[pd.to_numeric(recorte["PRCTTL_INSUMO"], errors="coerce") > 0, "FORNECEDOR_CDG"]
+    assert ti.quantidade_empresas_que_venderam_ultimos_3_anos(erp) == ids.dropna().nunique()
+
+# ---------- Caches e índices reaproveitados ----------
+def test_indices_reaproveitados(erp, forn):
+    vendas = indice_atividade(erp, col_id="FORNECEDOR_CDG", col_data="OF_DATA", col_valor="PRCTTL_INSUMO")
+    ativos = indice_atividade(erp, col_id="FORNECEDOR_CDG", col_data="OF_DATA")
+    equivalentes(ti.quantidade_empresas_que_venderam_ultimos_3_anos(erp, indice=vendas),
+                 ti.quantidade_empresas_que_venderam_ultimos_3_anos(erp))
+    equivalentes(fc.serie_fornecedores_ativos_ultimos_anos(erp, anos=10, indice=ativos),
+                 fc.serie_fornecedores_ativos_ultimos_anos(erp, anos=10))
+    precos = ti.indice_precos_item(erp)
+    equivalentes(ti.percentil_preco_linhas(erp, indice=precos), ti.percentil_preco_linhas(erp))
+    basicos = ti.matriz_basicos_uf(forn, erp)
+    equivalentes(ti.fornecedores_basicos_por_local_cadastro(forn, erp, indice=basicos),
+                 ti.fornecedores_basicos_por_local_cadastro(forn, erp))
+
+def test_filtros_globais(erp):
+    idx = indice_filtros(erp)
+    ufs, cats = ["RJ", "SP"], ["CIMENTO", "AÇO", "EPI"]
+    meses = idx.opcoes("mes")
+    ini, fim = meses[len(meses) // 3], meses[2 * len(meses) // 3]
+    sub = idx.subconjunto(inicio=str(ini), fim=str(fim), uf=ufs, categoria=cats)
+    ref = filtrar_erp(erp, inicio=ini.start_time, fim=fim.end_time, ufs=ufs, categorias=cats)
+    assert sub.index.equals(ref.index)
+    assert idx.contar(uf=ufs) == int(erp["FORNECEDOR_UF"].isin(ufs).sum())
+    m = mascara_erp(erp, inicio=ini.start_time, fim=fim.end_time, ufs=ufs, categorias=cats)
+    assert int(m.sum()) == len(ref) and ref.index.equals(erp.index[m])
+
+def test_filtros_entre_threads(erp):
+    # o índice é compartilhado pelas sessões: LRU pequeno sob disputa não pode perder chaves
+    from concurrent.futures import ThreadPoolExecutor
+    idx = indice_filtros(erp)
+    idx._max_cache = 4
+    forns = idx.opcoes("fornecedor")[:12]
+    esperado = {f: int((erp["FORNECEDOR_DESC"] == f).sum()) for f in forns}
+    def consultar(i):
+        for k in range(1000):
+            f = forns[(i + k) % len(forns)]
+            assert idx.contar(fornecedor=[f]) == esperado[f]
+    troca = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)            # troca de thread a cada poucas instruções
+    try:
+        with ThreadPoolExecutor(8) as ex:
+            list(ex.map(consultar, range(8)))
+    finally:
+        sys.setswitchinterval(troca)
+
+def test_armazem_reaproveitado(erp, forn, tmp_path):
+    from armazem_core import salvar_armazem
+    arq = tmp_path / "a.sqlite"
+    db = salvar_armazem(erp, forn, arq, impressao="v1")
+    mtime = os.stat(arq).st_mtime_ns
+    db2 = salvar_armazem(erp.head(10), forn, arq, impressao="v1")
+    assert os.stat(arq).st_mtime_ns == mtime and db2.impressao() == "v1"
+    equivalentes(db.ler(["OF_CDG", "FORNECEDOR_CDG", "PRCTTL_INSUMO", "OF_DATA"]),
+                 erp[["OF_CDG", "FORNECEDOR_CDG", "PRCTTL_INSUMO", "OF_DATA"]])
+
+def test_armazem_fecha_conexoes(armazem, monkeypatch):
+    import sqlite3
+    abertas = []
+    class Conexao(sqlite3.Connection):
+        def close(self):
+            abertas.remove(self)
+            super().close()
+    def conectar():
+        con = sqlite3.connect(armazem.path, factory=Conexao)
+        abertas.append(con)
+        return con
+    monkeypatch.setattr(armazem, "conectar", conectar)
+    armazem.ler(["OF_CDG"], where="OF_CDG > ?", params=[0])
+    armazem.impressao()
+    assert abertas == []
+
+def test_parquet_reaproveitado(erp, tmp_path):
+    pytest.importorskip("polars")
+    from motor_polars import impressao_cache_parquet, salvar_cache_parquet
+    arq = salvar_cache_parquet(erp, tmp_path / "erp.parquet", impressao="v1")
+    mtime = os.stat(arq).st_mtime_ns
+    salvar_cache_parquet(erp.head(10), arq, impressao="v1")
+    assert os.stat(arq).st_mtime_ns == mtime and impressao_cache_parquet(arq) == "v1"
+    equivalentes(pd.read_parquet(arq), erp)
+
+def test_base_compartilhada(erp, motor_pandas, tmp_path):
+    pytest.importorskip("pyarrow")
+    from compartilhado_core import base_compartilhada
+    construcoes = []
+    def construir():
+        construcoes.append(1)
+        return erp
+    a = base_compartilhada("erp", "v1", construir, diretorio=tmp_path)
+    b = base_compartilhada("erp", "v1", construir, diretorio=tmp_path)
+    assert len(construcoes) == 1
+    equivalentes(b, erp)
+    for nome, kw in CHAMADAS:
+        equivalentes(getattr(motor_pandas, nome)(a, **kw), getattr(motor_pandas, nome)(erp, **kw), nome)
+
+def test_ultimo_fornecedor(erp, tmp_path):
+    pytest.importorskip("pyarrow")
+    from compartilhado_core import base_compartilhada
+    tabela = tabela_ultimo_fornecedor(erp)
+    # referência: ordena e fica com a última linha de cada item
+    ok = erp[pd.to_numeric(erp["ITEM_PRCUNTPED"], errors="coerce") > 0]
+    ref = ok.sort_values(["INSUMO_CDG", "OF_DATA", "OF_CDG"], kind="stable").groupby("INSUMO_CDG").tail(1)
+    equivalentes(tabela[["ITEM", "FORNECEDOR_CDG", "DATA", "OF_CDG"]],
+                 ref.rename(columns={"INSUMO_CDG": "ITEM", "OF_DATA": "DATA"})
+                    [["ITEM", "FORNECEDOR_CDG", "DATA", "OF_CDG"]].sort_values("ITEM"))
+    # publicada no Arrow compartilhado: mesma consulta, em lote ou item a item
+    idx = UltimoFornecedor(base_compartilhada("ultimo_fornecedor", "v1", lambda: tabela, diretorio=tmp_path))
+    itens = list(erp["INSUMO_CDG"].iloc[::997]) + ["SEM.HISTORICO"]
+    lote = idx.consultar(itens)
+    equivalentes(lote.iloc[:-1], UltimoFornecedor(tabela).consultar(itens).iloc[:-1])
+    for i in (0, 5, len(itens) // 2):
+        equivalentes(lote.iloc[[i]], idx.consultar([itens[i]]))
+    assert lote.iloc[-1].drop("ITEM").isna().all()
@@ -0,0 +1,107 @@
+# tests/test_referencia.py
+"""
+Funções reescritas × implementação pandas direta (a lógica de antes da otimização).
+
+Os arquivos golden foram gerados depois das reescritas; aqui a referência é independente:
+contagens distintas com nunique por janela (distintos_core), normalização de texto sem
+cache (unicodedata a cada valor) e cobertura de básicos com apply por linha e laço por UF.
+"""
+import unicodedata
+
+import pandas as pd
+import pytest
+
+import Tratamento_Indicadores as ti
+import fornecedores_core as fc
+from validacao_core import UFS_BR
+
+# ---------- Referências ----------
+def _distintos(s: pd.Series) -> int:
+    s = s.astype("string").str.strip().replace({"": pd.NA, "nan": pd.NA, "None": pd.NA}).dropna()
+    return int(s.nunique())
+
+def _norm(s) -> str:
+    if s is None:
+        return ""
+    t = unicodedata.normalize("NFKD", str(s))
+    t = "".join(ch for ch in t if not unicodedata.combining(ch))
+    return t.strip().lower()
+
+def _tokens(texto) -> set:
+    if texto is None or texto is pd.NA:
+        return set()
+    t = _norm(texto)
+    for sep in [",", ";", "/", "|", "&", "+"]:
+        t = t.replace(sep, ",")
+    return {p.strip() for p in t.split(",") if len(p.strip()) > 1}
+
+def _basicos(erp) -> set:
+    cats = erp.loc[erp["TIPO_MATERIAL"] == "BÁSICO", "INSUMO_CATEGORIA"].dropna().astype("string").unique()
+    return {_norm(c) for c in cats if str(c).strip()}
+
+def _atende(cel, cats) -> bool:
+    return any(t in b or b in t for t in _tokens(cel) for b in cats)
+
+# ---------- Contagens distintas (user-026) ----------
+def test_empresas_que_venderam(erp):
+    base = erp[erp["OF_DATA"] >= pd.Timestamp.today() - pd.DateOffset(years=3)]
+    base = base[pd.to_numeric(base["PRCTTL_INSUMO"], errors="coerce").fillna(0) > 0]
+    assert ti.quantidade_empresas_que_venderam_ultimos_3_anos(erp) == _distintos(base["FORNECEDOR_CDG"])
+
+def test_empresas_que_venderam_ids_sujos():
+    hoje = pd.Timestamp.today().normalize()
+    df = pd.DataFrame({
+        "FORNECEDOR_CDG": [" 12", "12", "", None, "nan", "None", "7 ", "9", "9"],
+        "OF_DATA": [hoje] * 8 + [hoje - pd.DateOffset(years=5)],
+        "PRCTTL_INSUMO": [10, 5, 1, 1, 1, 1, 3, 0, 8],
+    })
+    # válidos na janela com valor > 0: 12 e 7 ("9" só vendeu fora da janela ou com valor 0)
+    assert ti.quantidade_empresas_que_venderam_ultimos_3_anos(df) == 2
+
+def test_serie_fornecedores_ativos(erp):
+    base = erp[erp["OF_DATA"] >= pd.Timestamp.today() - pd.DateOffset(years=10)]
+    ref = base.groupby(base["OF_DATA"].dt.year)["FORNECEDOR_CDG"].nunique()
+    serie, resumo = fc.serie_fornecedores_ativos_ultimos_anos(erp, anos=10)
+    assert serie["ANO"].tolist() == ref.index.tolist()
+    assert serie["FORNECEDORES_ATIVOS"].tolist() == ref.tolist()
+    assert resumo["var_abs"] == int(ref.iloc[-1] - ref.iloc[0])
+
+def test_total_empresas_cadastradas(forn, ult_forn):
+    assert fc.total_empresas_cadastradas(forn) == _distintos(forn["FORN_CNPJ"])
+    assert fc.total_empresas_cadastradas(ult_forn, col_id="PED_FORNECEDOR") == _distintos(ult_forn["PED_FORNECEDOR"])
+
+# ---------- Normalização de texto (user-030) ----------
+TEXTOS = ["Aço", "  CIMENTO  ", "Elétrica; hidráulica / EPI", "Ç|ã+õ&ü", "", "a,b,,cc", "nan", "Ｆｕｌｌ"]
+
+def test_normalizacao(forn, erp):
+    valores = TEXTOS + forn["CATEGORIAS"].dropna().unique().tolist() + erp["INSUMO_CATEGORIA"].dropna().unique().tolist()
+    for v in valores * 2:   # 2ª passada vem do cache
+        assert ti._norm_txt(v) == _norm(v), v
+        assert set(ti._split_tokens(v)) == _tokens(v), v
+    s = pd.Series(TEXTOS + [None, "Aço"], dtype="string")
+    assert ti._norm_serie(s).tolist() == [_norm(v) if v is not pd.NA else "" for v in s.tolist()]
+
+# ---------- Cobertura de básicos por UF (user-048) ----------
+@pytest.mark.parametrize("locais", [("RJ", "SP", "SC"), tuple(sorted(UFS_BR))])
+def test_basicos_por_local(forn, erp, locais):
+    cats = _basicos(erp)
+    apto = forn["CATEGORIAS"].astype("string").apply(lambda c: _atende(c, cats))
+    uf = forn["FORN_UF"].astype("string").str.upper().str.strip()
+    ref = [{"LOCAL": u, "FORNECEDORES_BÁSICO_CAD":
+            int(forn.loc[apto & (uf == u), "FORN_CNPJ"].astype("string").dropna().nunique())}
+           for u in locais]
+    ref = pd.DataFrame(ref).sort_values("LOCAL").reset_index(drop=True)
+    pd.testing.assert_frame_equal(ti.fornecedores_basicos_por_local_cadastro(forn, erp, locais=locais), ref,
+                                  check_dtype=False)
+
+def test_matriz_basicos_uf(forn, erp):
+    _, matriz = ti.matriz_basicos_uf(forn, erp)
+    uf = forn["FORN_UF"].astype("string").str.upper().str.strip()
+    ids = forn["FORN_CNPJ"].astype("string")
+    assert {_norm(c) for c in matriz.columns} == _basicos(erp)
+    for col in matriz.columns:
+        b = _norm(col)
+        m = forn["CATEGORIAS"].astype("string").apply(lambda c: _atende(c, {b}))
+        ref = ids[m].groupby(uf[m]).nunique()
+        got = matriz[col]
+        assert got[got > 0].sort_index().to_dict() == ref[ref > 0].sort_index().to_dict(), col
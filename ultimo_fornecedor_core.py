@@ -0,0 +1,126 @@
+# ultimo_fornecedor_core.py
+"""
+Último fornecedor e último preço por item (INSUMO_CDG), com consulta em lote.
+
+A tabela sai do ERP numa passada: ordena por (item, data da OF, OF) e fica com a última
+linha de cada item. UltForn.xlsx (PED_CDG | PED_FORNECEDOR | PED_DT) não tem o item;
+quando informado, o fornecedor e a data registrados para o pedido prevalecem sobre os do
+ERP nas OFs em comum (PED_CDG = OF_CDG) antes da ordenação.
+
+A tabela é um DataFrame simples (uma linha por item), próprio para ser publicado na
+memória compartilhada (compartilhado_core); a consulta usa um índice hash sobre o item
+e devolve as colunas alinhadas a qualquer lista/tabela de itens.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from coortes_core import normalizar_ids
+
+COLUNAS = ["ITEM", "FORNECEDOR_CDG", "FORNECEDOR_DESC", "DATA", "PRECO_UNIT", "OF_CDG", "FONTE"]
+
+def carregar_ult_forn(path: Path | str | None = None) -> pd.DataFrame | None:
+    """Lê UltForn.xlsx (padrão: ao lado deste arquivo); None se o arquivo não existir."""
+    arq = Path(path) if path else Path(__file__).parent / "UltForn.xlsx"
+    if not arq.exists():
+        return None
+    df = pd.read_excel(arq)
+    df["PED_DT"] = pd.to_datetime(df["PED_DT"], errors="coerce")
+    return df
+
+def _chave_item(s: pd.Series) -> pd.Series:
+    return s.astype("string").str.strip().replace({"": pd.NA})
+
+def tabela_ultimo_fornecedor(df_erp: pd.DataFrame, ult_forn: pd.DataFrame | None = None,
+                             col_item: str = "INSUMO_CDG", col_data: str = "OF_DATA", col_of: str = "OF_CDG",
+                             col_forn: str = "FORNECEDOR_CDG", col_pu: str = "ITEM_PRCUNTPED") -> pd.DataFrame:
+    """ITEM | FORNECEDOR_CDG | FORNECEDOR_DESC | DATA | PRECO_UNIT | OF_CDG | FONTE (uma linha por item)."""
+    item = _chave_item(df_erp[col_item])
+    data = pd.to_datetime(df_erp[col_data], errors="coerce")
+    pu = pd.to_numeric(df_erp[col_pu], errors="coerce") if col_pu in df_erp.columns else \
+        pd.to_numeric(df_erp["PRCTTL_INSUMO"], errors="coerce") / pd.to_numeric(df_erp["QTD_PED"], errors="coerce")
+    forn = df_erp[col_forn].astype("string")
+    desc = df_erp["FORNECEDOR_DESC"].astype("string") if "FORNECEDOR_DESC" in df_erp.columns \
+        else pd.Series(pd.NA, index=df_erp.index, dtype="string")
+    fonte = np.full(len(df_erp), "ERP", dtype=object)
+
+    if ult_forn is not None and not ult_forn.empty:
+        # fornecedor/data do pedido segundo UltForn nas OFs em comum
+        ped = ult_forn.dropna(subset=["PED_CDG"]).drop_duplicates("PED_CDG", keep="last").set_index("PED_CDG")
+        pos = ped.index.get_indexer(df_erp[col_of])
+        ok = pos >= 0
+        if ok.any():
+            # nome e código (no formato do ERP) a partir do ID normalizado
+            norm = normalizar_ids(forn)
+            nomes = pd.DataFrame({"N": norm, "C": forn, "D": desc}).dropna(subset=["N"]).drop_duplicates("N").set_index("N")
+            novo = normalizar_ids(ped["PED_FORNECEDOR"]).to_numpy()[pos[ok]]
+            k = nomes.index.get_indexer(novo)
+            forn = forn.copy()
+            desc = desc.copy()
+            forn[ok] = np.where(k >= 0, nomes["C"].to_numpy()[k], novo)
+            desc[ok] = np.where(k >= 0, nomes["D"].to_numpy()[k], pd.NA)
+            dt_ped = pd.to_datetime(ped["PED_DT"], errors="coerce").to_numpy()[pos[ok]]
+            data = data.copy()
+            data[ok] = np.where(pd.isna(dt_ped), data[ok].to_numpy(), dt_ped)
+            fonte[ok] = "UltForn"
+
+    valido = item.notna().to_numpy() & data.notna().to_numpy() & (pu > 0).to_numpy()
+    if not valido.any():
+        return pd.DataFrame(columns=COLUNAS)
+    cod, itens = pd.factorize(item[valido])
+    dias = data[valido].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    of_ord, _ = pd.factorize(df_erp[col_of][valido], sort=True)
+    # uma ordenação: item, data, OF (estável -> empate fica com a linha mais abaixo)
+    ordem = np.lexsort((of_ord, dias, cod))
+    ultimo = ordem[np.r_[cod[ordem][1:] != cod[ordem][:-1], True]]
+
+    linhas = np.flatnonzero(valido)[ultimo]
+    out = pd.DataFrame({
+        "ITEM": pd.Series(itens.to_numpy()[cod[ultimo]], dtype="string"),
+        "FORNECEDOR_CDG": forn.to_numpy()[linhas],
+        "FORNECEDOR_DESC": desc.to_numpy()[linhas],
+        "DATA": data.to_numpy()[linhas],
+        "PRECO_UNIT": pu.to_numpy()[linhas],
+        "OF_CDG": df_erp[col_of].to_numpy()[linhas],
+        "FONTE": fonte[linhas],
+    })
+    out["FORNECEDOR_CDG"] = out["FORNECEDOR_CDG"].astype("string")
+    out["FORNECEDOR_DESC"] = out["FORNECEDOR_DESC"].astype("string")
+    return out.sort_values("ITEM", kind="stable").reset_index(drop=True)
+
+class UltimoFornecedor:
+    """Índice hash item -> (último fornecedor, data, preço) sobre a tabela acima."""
+
+    def __init__(self, tabela: pd.DataFrame):
+        self.tabela = tabela.reset_index(drop=True)
+        self.indice = pd.Index(_chave_item(self.tabela["ITEM"]))
+
+    def __len__(self) -> int:
+        return len(self.tabela)
+
+    def consultar(self, itens) -> pd.DataFrame:
+        """Uma linha por item pedido (na mesma ordem); item sem histórico -> valores nulos."""
+        pos = self.indice.get_indexer(_chave_item(pd.Series(itens)))
+        out = self.tabela.reindex(pos).reset_index(drop=True)     # -1 -> linha nula
+        out["ITEM"] = pd.Series(itens).astype("string").to_numpy()
+        return out
+
+    def anexar(self, df: pd.DataFrame, col_item: str = "INSUMO_CDG", com_of: bool = False) -> pd.DataFrame:
+        """
+        Acrescenta ULT_FORNECEDOR | ULT_DATA | ULT_PRECO_UNIT (| ULT_OF) a uma tabela com
+        coluna de item (consulta em lote, sem merge).
+        """
+        if df is None or df.empty or col_item not in df.columns:
+            return df
+        r = self.consultar(df[col_item])
+        out = df.copy()
+        out["ULT_FORNECEDOR"] = r["FORNECEDOR_DESC"].fillna(r["FORNECEDOR_CDG"]).to_numpy()
+        out["ULT_DATA"] = pd.to_datetime(r["DATA"]).to_numpy()
+        out["ULT_PRECO_UNIT"] = pd.to_numeric(r["PRECO_UNIT"], errors="coerce").round(2).to_numpy()
+        if com_of:
+            out["ULT_OF"] = r["OF_CDG"].to_numpy()
+        return out
+
+def ultimo_fornecedor(df_erp: pd.DataFrame, ult_forn: pd.DataFrame | None = None, **cols) -> UltimoFornecedor:
+    return UltimoFornecedor(tabela_ultimo_fornecedor(df_erp, ult_forn, **cols))
@@ -0,0 +1,135 @@
+# validacao_core.py
+"""
+Validação das bases logo após a carga: regras vetorizadas (uma máscara booleana por regra)
+com contagem de violações e linhas de exemplo.
+
+carregar_bases()/carregar_fornecedores() convertem datas e números inválidos em NaT/NaN sem
+avisar; aqui isso aparece como "ausente ou inválido". Cada regra só roda se as colunas de
+que precisa existirem. O relatório é calculado uma vez por versão das bases (mesma
+impressão digital) e fica guardado junto com elas.
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+UFS_BR = frozenset({
+    "AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MT", "MS", "MG", "PA",
+    "PB", "PR", "PE", "PI", "RJ", "RN", "RS", "RO", "RR", "SC", "SP", "SE", "TO",
+})
+
+@dataclass(frozen=True)
+class Regra:
+    nome: str
+    base: str                      # "erp" | "fornecedores"
+    descricao: str
+    severidade: str                # "erro" | "aviso"
+    colunas: tuple[str, ...]
+    avaliar: Callable[[pd.DataFrame, pd.Timestamp], np.ndarray]
+
+def _vazio(s: pd.Series) -> np.ndarray:
+    t = s.astype("string")
+    return (t.isna() | (t.str.strip() == "")).to_numpy(dtype=bool)
+
+def _num(s: pd.Series) -> pd.Series:
+    return pd.to_numeric(s, errors="coerce")
+
+def _data(s: pd.Series) -> pd.Series:
+    return pd.to_datetime(s, errors="coerce")
+
+def _uf_invalida(s: pd.Series) -> np.ndarray:
+    t = s.astype("string").str.strip().str.upper()
+    return (t.notna() & (t != "") & ~t.isin(UFS_BR)).to_numpy(dtype=bool)
+
+def _data_invalida_ou_futura(s: pd.Series, hoje) -> np.ndarray:
+    dt = _data(s)
+    return (dt.isna() | (dt > hoje)).to_numpy(dtype=bool)
+
+def _pu_x_qtd(df: pd.DataFrame, hoje) -> np.ndarray:
+    # tolerância: 1% do total ou R$ 0,05 (arredondamentos de preço unitário)
+    q, pu, tot = _num(df["QTD_PED"]), _num(df["ITEM_PRCUNTPED"]), _num(df["PRCTTL_INSUMO"])
+    dif = (q * pu - tot).abs()
+    return (dif > np.maximum(0.05, 0.01 * tot.abs())).fillna(False).to_numpy(dtype=bool)
+
+REGRAS: list[Regra] = [
+    # ---------- ERP ----------
+    Regra("total_nao_positivo", "erp", "Total da linha (PRCTTL_INSUMO) zero, negativo ou não numérico", "erro",
+          ("PRCTTL_INSUMO",), lambda d, h: ~(_num(d["PRCTTL_INSUMO"]) > 0).to_numpy(dtype=bool)),
+    Regra("pu_nao_positivo", "erp", "Preço unitário (ITEM_PRCUNTPED) zero, negativo ou não numérico", "erro",
+          ("ITEM_PRCUNTPED",), lambda d, h: ~(_num(d["ITEM_PRCUNTPED"]) > 0).to_numpy(dtype=bool)),
+    Regra("pu_x_qtd_diverge", "erp", "Quantidade × preço unitário diferente do total da linha (tolerância 1%)", "aviso",
+          ("QTD_PED", "ITEM_PRCUNTPED", "PRCTTL_INSUMO"), _pu_x_qtd),
+    Regra("fornecedor_ausente", "erp", "Linha sem código de fornecedor", "erro",
+          ("FORNECEDOR_CDG",), lambda d, h: _vazio(d["FORNECEDOR_CDG"])),
+    Regra("uf_ausente", "erp", "Linha sem UF do fornecedor", "aviso",
+          ("FORNECEDOR_UF",), lambda d, h: _vazio(d["FORNECEDOR_UF"])),
+    Regra("uf_invalida", "erp", "UF do fornecedor fora das 27 UFs", "aviso",
+          ("FORNECEDOR_UF",), lambda d, h: _uf_invalida(d["FORNECEDOR_UF"])),
+    Regra("categoria_ausente", "erp", "Linha sem categoria do insumo", "aviso",
+          ("INSUMO_CATEGORIA",), lambda d, h: _vazio(d["INSUMO_CATEGORIA"])),
+    Regra("data_of_ausente", "erp", "Data da OF ausente ou inválida", "erro",
+          ("OF_DATA",), lambda d, h: _data(d["OF_DATA"]).isna().to_numpy(dtype=bool)),
+    Regra("data_futura", "erp", "Data da OF ou da requisição no futuro", "erro",
+          ("OF_DATA", "REQ_DATA"),
+          lambda d, h: ((_data(d["OF_DATA"]) > h) | (_data(d["REQ_DATA"]) > h)).to_numpy(dtype=bool)),
+    Regra("req_apos_of", "erp", "Requisição com data posterior à OF", "aviso",
+          ("OF_DATA", "REQ_DATA"), lambda d, h: (_data(d["REQ_DATA"]) > _data(d["OF_DATA"])).to_numpy(dtype=bool)),
+    Regra("linha_duplicada", "erp", "Linha repetida na mesma OF (item, quantidade, preço e total iguais)", "aviso",
+          ("OF_CDG", "INSUMO_CDG", "QTD_PED", "ITEM_PRCUNTPED", "PRCTTL_INSUMO"),
+          lambda d, h: d.duplicated(["OF_CDG", "INSUMO_CDG", "QTD_PED", "ITEM_PRCUNTPED", "PRCTTL_INSUMO"],
+                                    keep="first").to_numpy(dtype=bool)),
+    # ---------- Fornecedores ----------
+    Regra("id_duplicado", "fornecedores", "Código do fornecedor (FORN_CNPJ) repetido no cadastro", "aviso",
+          ("FORN_CNPJ",), lambda d, h: (d["FORN_CNPJ"].duplicated(keep="first") & d["FORN_CNPJ"].notna()).to_numpy(dtype=bool)),
+    Regra("razao_ausente", "fornecedores", "Fornecedor sem razão social", "aviso",
+          ("FORN_RAZAO",), lambda d, h: _vazio(d["FORN_RAZAO"])),
+    Regra("uf_ausente", "fornecedores", "Fornecedor sem UF", "aviso",
+          ("FORN_UF",), lambda d, h: _vazio(d["FORN_UF"])),
+    Regra("uf_invalida", "fornecedores", "UF fora das 27 UFs", "aviso",
+          ("FORN_UF",), lambda d, h: _uf_invalida(d["FORN_UF"])),
+    Regra("data_cadastro_invalida", "fornecedores", "Data de cadastro ausente, inválida ou no futuro", "aviso",
+          ("FORN_DTCADASTRO",), lambda d, h: _data_invalida_ou_futura(d["FORN_DTCADASTRO"], h)),
+    Regra("sem_categorias", "fornecedores", "Fornecedor sem categorias atendidas", "aviso",
+          ("CATEGORIAS",), lambda d, h: _vazio(d["CATEGORIAS"])),
+]
+
+class RelatorioValidacao:
+    """Resumo por regra e linhas de exemplo de cada violação."""
+
+    def __init__(self, bases: dict[str, pd.DataFrame], regras: list[Regra] | None = None,
+                 n_amostras: int = 5, hoje=None):
+        hoje = pd.Timestamp(hoje) if hoje is not None else pd.Timestamp.today()
+        self.linhas_por_base = {nome: len(df) for nome, df in bases.items()}
+        linhas, self.amostras, com_erro = [], {}, {}
+        for r in regras or REGRAS:
+            df = bases.get(r.base)
+            if df is None or not set(r.colunas) <= set(df.columns):
+                continue
+            m = r.avaliar(df, hoje)
+            n = int(m.sum())
+            if r.severidade == "erro":
+                ant = com_erro.get(r.base)
+                com_erro[r.base] = m if ant is None else (ant | m)
+            linhas.append({
+                "BASE": r.base, "REGRA": r.nome, "DESCRICAO": r.descricao, "SEVERIDADE": r.severidade,
+                "VIOLACOES": n, "PCT_%": (n / len(df) * 100.0) if len(df) else 0.0,
+            })
+            if n:
+                self.amostras[(r.base, r.nome)] = df.loc[m].head(n_amostras)
+        self.resumo = pd.DataFrame(linhas, columns=["BASE", "REGRA", "DESCRICAO", "SEVERIDADE", "VIOLACOES", "PCT_%"])
+        # linhas com ao menos um erro, por base (as máscaras não ficam guardadas)
+        self.linhas_com_erro = {b: int(m.sum()) for b, m in com_erro.items()}
+
+    def violadas(self) -> pd.DataFrame:
+        """Regras com ao menos uma violação: erros primeiro, depois as mais frequentes."""
+        return self.resumo[self.resumo["VIOLACOES"] > 0].sort_values(
+            ["SEVERIDADE", "VIOLACOES"], ascending=[False, False]).reset_index(drop=True)
+
+    def amostra(self, base: str, regra: str) -> pd.DataFrame:
+        return self.amostras.get((base, regra), pd.DataFrame())
+
+def validar_bases(df_erp: pd.DataFrame | None = None, df_forn: pd.DataFrame | None = None,
+                  n_amostras: int = 5, hoje=None) -> RelatorioValidacao:
+    bases = {k: v for k, v in (("erp", df_erp), ("fornecedores", df_forn)) if v is not None}
+    return RelatorioValidacao(bases, n_amostras=n_amostras, hoje=hoje)